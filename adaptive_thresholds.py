@@ -0,0 +1,122 @@
+import numpy as np
+
+# 영상별 자동 임계값: 고정 컷(min_area 3000 / motion_area 5000 / 비율 0.5)은 해상도와 카메라 거리가
+# 바뀌면 맞지 않음 -> 한 번의 감지 패스에서 모은 후보 blob의 면적/비율 분포로 그 영상의 임계값 결정
+# 엔진은 프레임마다 면적 상위 MAX_BLOBS개 후보를 [면적, x, y, w, h]로 기록 (record['candidates'])
+NOISE_FLOOR_RATIO = 0.0005   # 프레임 면적 대비 - 이보다 작은 컨투어는 후보로도 기록 안 함
+MAX_BLOBS = 8
+MIN_SAMPLES = 30             # 후보가 이보다 적으면 분포를 믿지 않고 고정값 사용
+OTSU_BINS = 64
+# 사람 크기 = 프레임별 최대 blob 면적의 이 백분위 (일부만 보이는 프레임에 끌려가지 않게 상위 쪽)
+PERSON_PERCENTILE = 75
+# 프레임별 최대 blob의 세로/가로 비율 중앙값이 이보다 작으면 사람 분포가 아님 (움직이는 상자/그림자) -> 고정값
+PERSON_MIN_ASPECT = 1.2
+# 고정값 기본 비율과 같은 관계: min_area ≈ 사람 크기의 1/4, motion_area = min_area x (5000/3000)
+MIN_AREA_FRACTION = 0.25
+MOTION_MAX_FRACTION = 0.8
+# 노이즈 무리 분리 (log 면적 Otsu): 분리도(클래스 간 분산 / 전체 분산)와 두 무리 중앙값 차이가 모두 클 때만 사용
+# (노이즈가 거의 없는 영상에서는 Otsu가 사람 크기 분포 자체를 둘로 나눠 버림)
+MIN_SEPARABILITY = 0.5
+NOISE_GAP = 2.0
+# 안전 범위 (프레임 면적 대비) - 분포가 이상해도 이 밖으로는 나가지 않음
+MIN_AREA_RATIO = (0.002, 0.05)
+MIN_ASPECT_RANGE = (0.5, 0.8)  # 고정값(0.5)보다 느슨해지지 않음 - 납작한 물체가 사람으로 잡히지 않게
+ASPECT_PERCENTILE = 5        # 사람 blob 비율 분포의 하위 백분위 x 여유
+ASPECT_MARGIN = 0.8
+
+
+def otsu_threshold(values, bins=OTSU_BINS):
+    """1차원 Otsu 분할 (모든 분할점의 클래스 간 분산을 한 번에 계산) -> (임계값, 분리도 0~1)"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2 or np.ptp(values) == 0:
+        return (float(values[0]) if len(values) else 0.0), 0.0
+    hist, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    p = hist / hist.sum()
+    w0 = np.cumsum(p)
+    mu = np.cumsum(p * centers)
+    mu_total = mu[-1]
+    w1 = 1.0 - w0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (mu_total * w0 - mu) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = 0.0
+    k = int(np.argmax(between[:-1]))
+    total = values.var()
+    return float(edges[k + 1]), float(between[k] / total) if total > 0 else 0.0
+
+
+def collect_blobs(person_timeline):
+    """타임라인의 후보 blob -> (타임라인 인덱스 (N,), blob (N, 5))"""
+    rows = [(i, d['candidates']) for i, d in enumerate(person_timeline) if len(d.get('candidates', ()))]
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 5))
+    index = [np.full(len(blobs), i) for i, blobs in rows]
+    blobs = np.concatenate([blobs for _, blobs in rows])
+    return np.concatenate(index), blobs.astype(np.float64)
+
+
+def pick_thresholds(person_timeline, frame_pixels, fixed):
+    """후보 분포로 min_area / min_aspect / motion_area 결정 (분포가 애매하면 해당 값은 고정값)
+
+    fixed: 고정 임계값 dict (DETECTOR_PARAMS) -> {'min_area', 'min_aspect', 'motion_area', 'method'}"""
+    _, blobs = collect_blobs(person_timeline)
+    result = {'min_area': float(fixed['min_area']), 'min_aspect': float(fixed['min_aspect']),
+              'motion_area': float(fixed['motion_area']), 'method': 'fixed'}
+    _, largest = _select(person_timeline, 0, 0)
+    if len(largest) < MIN_SAMPLES:
+        return result
+    if np.median(largest[:, 4] / np.maximum(largest[:, 3], 1)) < PERSON_MIN_ASPECT:
+        return result
+    best = largest[:, 0]
+
+    # 1) 사람 크기 기준 최소 면적
+    person_size = float(np.percentile(best, PERSON_PERCENTILE))
+    min_area = person_size * MIN_AREA_FRACTION
+
+    # 2) 노이즈 blob 무리가 따로 있으면 그 경계보다 위로
+    log_area = np.log(blobs[:, 0])
+    split, separability = otsu_threshold(log_area)
+    lower, upper = blobs[log_area <= split, 0], blobs[log_area > split, 0]
+    if (separability >= MIN_SEPARABILITY and len(lower) and len(upper)
+            and np.median(upper) >= NOISE_GAP * np.median(lower) and np.exp(split) < person_size):
+        min_area = max(min_area, float(np.exp(split)))
+    lo, hi = (r * frame_pixels for r in MIN_AREA_RATIO)
+    min_area = float(np.clip(min_area, lo, hi))
+
+    # 3) 사람 blob 비율 분포의 하위 백분위 (누운 물체/그림자 제외용 하한)
+    large = blobs[blobs[:, 0] > min_area]
+    if len(large):
+        aspect = large[:, 4] / np.maximum(large[:, 3], 1)
+        min_aspect = float(np.clip(np.percentile(aspect, ASPECT_PERCENTILE) * ASPECT_MARGIN, *MIN_ASPECT_RANGE))
+    else:
+        min_aspect = float(fixed['min_aspect'])
+
+    # 4) 움직임 프레임 기준: 고정값과 같은 비율, 사람 크기보다는 작게
+    motion_area = min(min_area * fixed['motion_area'] / fixed['min_area'], person_size * MOTION_MAX_FRACTION)
+
+    return {'min_area': round(min_area, 1), 'min_aspect': round(min_aspect, 3),
+            'motion_area': round(float(max(motion_area, min_area)), 1), 'method': 'adaptive'}
+
+
+def _select(person_timeline, min_area, min_aspect):
+    """임계값 통과 blob 중 프레임별 최대 면적 -> (타임라인 인덱스, blob) (통과 blob 있는 프레임만)"""
+    index, blobs = collect_blobs(person_timeline)
+    keep = (blobs[:, 0] > min_area) & (blobs[:, 4] > min_aspect * blobs[:, 3])
+    index, blobs = index[keep], blobs[keep]
+    if not len(index):
+        return index, blobs
+    # 프레임 순 -> 면적 순 정렬 후 프레임별 마지막 = 최대 면적
+    order = np.lexsort((blobs[:, 0], index))
+    index, blobs = index[order], blobs[order]
+    last = np.flatnonzero(np.append(np.diff(index) != 0, True))
+    return index[last], blobs[last]
+
+
+def apply_thresholds(person_timeline, thresholds):
+    """같은 후보 blob으로 프레임별 사람 감지를 다시 결정 (재디코딩 없음) -> 새 타임라인 (후보 배열 제외)"""
+    timeline = [{'frame': d['frame'], 'detected': False, 'x': None, 'area': 0, 'bbox': None}
+                for d in person_timeline]
+    index, blobs = _select(person_timeline, thresholds['min_area'], thresholds['min_aspect'])
+    for i, (area, x, y, w, h) in zip(index.tolist(), blobs.astype(np.int64).tolist()):
+        timeline[i].update(detected=True, x=x + w // 2, area=area, bbox=(x, y, w, h))
+    return timeline
@@ -2,6 +2,8 @@ import cv2
 import os
 import glob
 
+from video_index import video_meta, frame_time, FrameSeeker
+
 # 동영상 파일 목록
 video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
 
@@ -9,10 +11,15 @@ def select_frames(video_path):
     """동영상에서 START와 FINISH 프레임 선택"""
     cap = cv2.VideoCapture(video_path)
 
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # 실제 PTS/키프레임 인덱스로 탐색 (같은 프레임은 다시 디코딩하지 않음)
+    meta = video_meta(video_path)
+    index = meta['index']
+    seeker = FrameSeeker(cap, index)
+
+    total_frames = meta['total_frames']
+    fps = meta['fps']
+    width = meta['width']
+    height = meta['height']
 
     current_frame = 0
     start_frame = None
@@ -34,7 +41,7 @@ def select_frames(video_path):
 
     print(f"\n{'='*60}")
     print(f"파일: {os.path.basename(video_path)}")
-    print(f"총 프레임: {total_frames}, FPS: {fps}")
+    print(f"총 프레임: {total_frames}, FPS: {fps:.3f}")
     print(f"{'='*60}")
     print("조작법:")
     print("  ← → : 1프레임 이동")
@@ -48,8 +55,7 @@ def select_frames(video_path):
     print(f"{'='*60}\n")
 
     while True:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, current_frame)
-        ret, frame = cap.read()
+        ret, frame = seeker.read(current_frame)
 
         if not ret:
             break
@@ -57,7 +63,7 @@ def select_frames(video_path):
         display = frame.copy()
 
         # 현재 프레임 정보 표시
-        info_text = f"Frame: {current_frame}/{total_frames-1} | Time: {current_frame/fps:.2f}s"
+        info_text = f"Frame: {current_frame}/{total_frames-1} | Time: {frame_time(index, current_frame, fps):.2f}s"
         cv2.putText(display, info_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         cv2.putText(display, info_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 1)
 
@@ -168,10 +174,12 @@ def process_video(input_path, output_path, settings):
     """동영상에 선 추가"""
     cap = cv2.VideoCapture(input_path)
 
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # 29.97 등 소수 FPS를 그대로 유지해야 출력 길이가 원본과 같음
+    meta = video_meta(input_path)
+    fps = meta['fps']
+    width = meta['width']
+    height = meta['height']
+    total_frames = meta['total_frames']
 
     fourcc = cv2.VideoWriter_fourcc(*'mp4v')
     out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
@@ -3,41 +3,28 @@ import os
 import glob
 import numpy as np
 
+from contact_sheet import make_contact_sheets, spread_frames, write_index_page
+from video_index import video_meta
+
 def analyze_video(video_path):
     """동영상을 분석하고 주요 프레임을 추출"""
-    cap = cv2.VideoCapture(video_path)
-
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    meta = video_meta(video_path)
+    total_frames = meta['total_frames']
 
     filename = os.path.basename(video_path)
     print(f"\n{'='*60}")
     print(f"파일: {filename}")
-    print(f"총 프레임: {total_frames}, FPS: {fps}, 해상도: {width}x{height}")
+    print(f"총 프레임: {total_frames}, FPS: {meta['fps']:.3f}, 해상도: {meta['width']}x{meta['height']}")
     print(f"{'='*60}")
 
     # 출력 폴더
     output_dir = "/Users/aisoft/Documents/TUG/analysis"
     os.makedirs(output_dir, exist_ok=True)
 
-    # 주요 프레임 추출 (시작, 25%, 50%, 75%, 끝)
-    key_frames = [0, int(total_frames*0.1), int(total_frames*0.25),
-                  int(total_frames*0.5), int(total_frames*0.75), total_frames-1]
-
-    base_name = os.path.splitext(filename)[0]
-
-    for frame_idx in key_frames:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-        ret, frame = cap.read()
-        if ret:
-            output_path = os.path.join(output_dir, f"{base_name}_frame_{frame_idx:04d}.jpg")
-            cv2.imwrite(output_path, frame)
-            print(f"  프레임 {frame_idx} 저장: {output_path}")
-
-    cap.release()
-    return key_frames
+    # 주요 프레임 (시작, 10%, 25%, 50%, 75%, 끝) -> 컨택트 시트 한 장
+    key_frames = spread_frames(total_frames)
+    sheets = make_contact_sheets([{'video': video_path, 'frames': key_frames}], output_dir, index_page=False)
+    return [f for f, _ in key_frames], sheets
 
 def detailed_motion_analysis(video_path):
     """상세 모션 분석"""
@@ -137,9 +124,11 @@ print("원본 동영상 분석")
 print("="*60)
 
 results = {}
+sheets = []
 for video_path in video_files:
-    # 프레임 추출
-    analyze_video(video_path)
+    # 주요 프레임 컨택트 시트
+    _, video_sheets = analyze_video(video_path)
+    sheets += video_sheets
 
     # 상세 모션 분석
     result = detailed_motion_analysis(video_path)
@@ -150,6 +139,9 @@ for video_path in video_files:
         for issue in result['issues']:
             print(f"  - {issue}")
 
+if sheets:
+    write_index_page(sheets, "/Users/aisoft/Documents/TUG/analysis")
+
 print("\n" + "="*60)
-print("분석 완료! /Users/aisoft/Documents/TUG/analysis 폴더에서 프레임 이미지 확인 가능")
+print("분석 완료! /Users/aisoft/Documents/TUG/analysis/index.html 에서 컨택트 시트 확인 가능")
 print("="*60)
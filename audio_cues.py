@@ -0,0 +1,287 @@
+import os
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+try:
+    import av  # PyAV (선택) - 있으면 ffmpeg 프로세스 없이 오디오 디코딩
+except ImportError:
+    av = None
+
+# 손상/미지원 오디오 트랙 - 오디오 사전 분석만 포기하고 영상 분석은 계속
+DECODE_ERRORS = (OSError, ValueError, EOFError, wave.Error, subprocess.SubprocessError)
+if av is not None:
+    DECODE_ERRORS += (av.error.FFmpegError,)
+
+# 오디오 신호("시작" 구령/박수)로 START 부근을 먼저 찾는 사전 분석
+# 오디오는 모노 16kHz PCM으로만 풀면 영상 디코딩보다 훨씬 싸므로, 찾은 신호로
+# 1) 영상 감지 구간을 좁히고 2) 영상으로 찾은 START와 교차 확인 (신호가 없으면 표시만)
+AUDIO_RATE = 16000
+FRAME_SIZE = 512            # 32ms 창 (FFT 크기)
+HOP_SIZE = 160              # 10ms 간격
+FLUX_BLOCK = 4096           # 스펙트럼 플럭스를 이 프레임 수씩 나눠 계산 (긴 영상 메모리 상한)
+# 신호 판정: 새로움 곡선이 중앙값 + ONSET_K x MAD 이상인 국소 최대 + 소리 크기가 배경보다 MIN_LOUDNESS_DB 이상
+ONSET_K = 8.0
+MIN_LOUDNESS_DB = 8.0
+MIN_GAP_SEC = 0.5           # 앞 피크와 이보다 가까운 피크는 같은 신호 (구령 한 마디 안의 음절들)
+CLAP_MAX_SEC = 0.12         # 최대 크기 -10dB 안쪽 시간이 이보다 짧으면 박수, 길면 음성
+# 'energy' = 에너지 증가량 (빠름, 배경이 조용한 검사실 기본), 'flux' = 스펙트럼 플럭스 (소음 크기가 변하는 곳)
+ONSET_METHOD = 'energy'
+# 감지 구간: 첫 신호 CUE_PRE_SEC 전(+ 배경 학습 프레임)부터 마지막 신호 TRIAL_MAX_SEC 후까지
+CUE_PRE_SEC = 2.0
+TRIAL_MAX_SEC = 45.0
+MIN_SAVING = 0.2            # 영상의 이 비율 이상 줄어들 때만 구간 제한 (아니면 전체 감지)
+# 교차 확인: 영상 START가 신호 후 CUE_MAX_LAG_SEC 안 (구령 후 일어나기까지) 또는 CUE_EARLY_SEC 전까지면 일치
+CUE_MAX_LAG_SEC = 5.0
+CUE_EARLY_SEC = 0.5
+
+
+def _extract_pyav(video_path, rate):
+    with av.open(video_path) as container:
+        if not container.streams.audio:
+            return None
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=rate)
+        chunks = []
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+    return np.concatenate(chunks) if chunks else None
+
+
+def _extract_ffmpeg(video_path, rate):
+    cmd = ['ffmpeg', '-v', 'error', '-i', video_path, '-vn', '-ac', '1', '-ar', str(rate),
+           '-f', 's16le', '-acodec', 'pcm_s16le', '-']
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError:
+        return None  # 오디오 트랙 없음
+    return np.frombuffer(out, dtype='<i2') if out else None
+
+
+def _read_wav(wav_path, rate):
+    """별도 녹음기 WAV (16bit PCM) - 채널 평균 후 선형 보간으로 rate에 맞춤"""
+    with wave.open(wav_path, 'rb') as f:
+        channels, width, source_rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        data = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"16bit PCM WAV만 지원: {wav_path}")
+    samples = np.frombuffer(data, dtype='<i2').reshape(-1, channels).mean(axis=1)
+    if source_rate != rate:
+        n = int(len(samples) * rate / source_rate)
+        samples = np.interp(np.arange(n) * source_rate / rate, np.arange(len(samples)), samples)
+    return samples
+
+
+def extract_audio(video_path, rate=AUDIO_RATE):
+    """모노 PCM float32 (-1~1) -> (samples, 백엔드 이름). 오디오가 없거나 디코더가 없으면 (None, 이유)"""
+    if video_path.lower().endswith('.wav'):
+        extract, backend = _read_wav, 'wav'
+    elif av is not None:
+        extract, backend = _extract_pyav, 'pyav'
+    elif shutil.which('ffmpeg'):
+        extract, backend = _extract_ffmpeg, 'ffmpeg'
+    else:
+        return None, 'no_decoder'
+    try:
+        samples = extract(video_path, rate)
+    except DECODE_ERRORS as e:
+        print(f"  오디오 추출 실패 ({backend}): {e}")
+        return None, 'no_audio'
+    if samples is None or len(samples) < FRAME_SIZE:
+        return None, 'no_audio'
+    return np.asarray(samples, dtype=np.float32) / 32768.0, backend
+
+
+def _frames(samples):
+    """(N, FRAME_SIZE) 창 뷰 (복사 없음)"""
+    return np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+
+
+def short_time_energy(samples):
+    """창별 에너지 (dB)"""
+    frames = _frames(samples)
+    energy = np.einsum('ij,ij->i', frames, frames) / FRAME_SIZE
+    return 10 * np.log10(energy + 1e-10)
+
+
+def spectral_flux(samples):
+    """창별 스펙트럼 플럭스 (로그 압축 크기 스펙트럼의 양의 증가량 합)"""
+    frames = _frames(samples)
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    flux = np.zeros(len(frames), dtype=np.float32)
+    previous = None
+    for lo in range(0, len(frames), FLUX_BLOCK):
+        # 압축 상수 1: 배경 소음 빈은 거의 0 -> 소음 빈 수백 개의 흔들림이 새 소리 몇 빈을 덮지 않음
+        mag = np.log1p(np.abs(np.fft.rfft(frames[lo:lo + FLUX_BLOCK] * window, axis=1)))
+        if previous is not None:
+            mag_prev = np.vstack([previous, mag[:-1]])
+        else:
+            mag_prev = np.vstack([mag[:1], mag[:-1]])
+        flux[lo:lo + len(mag)] = np.maximum(mag - mag_prev, 0).sum(axis=1)
+        previous = mag[-1:]
+    return flux
+
+
+def detect_onsets(samples, rate=AUDIO_RATE, method=ONSET_METHOD):
+    """신호(구령/박수) 시작 시각 목록 -> [{'time', 'strength', 'duration', 'kind'}]"""
+    energy = short_time_energy(samples)
+    if method == 'flux':
+        novelty = spectral_flux(samples)
+    else:
+        # 부호 있는 증가량 그대로 (0에서 자르면 절반이 0이라 MAD가 0이 되어 기준이 의미 없음)
+        novelty = np.diff(energy, prepend=energy[0])
+
+    median = np.median(novelty)
+    mad = np.median(np.abs(novelty - median)) + 1e-6
+    floor_db = np.median(energy)
+    loud = energy > floor_db + MIN_LOUDNESS_DB
+    lookahead = 5  # 새로움 피크는 창이 소리 앞부분만 걸칠 때 - 소리 크기는 그 뒤 50ms 안에서 판정
+    padded = np.append(loud, np.zeros(lookahead, dtype=bool))
+    ahead = np.lib.stride_tricks.sliding_window_view(padded, lookahead + 1).any(axis=1)
+    peak = (novelty >= np.roll(novelty, 1)) & (novelty >= np.roll(novelty, -1))
+    candidates = np.flatnonzero(peak & ahead & (novelty > median + ONSET_K * mad))
+
+    onsets = []
+    gap = int(MIN_GAP_SEC * rate / HOP_SIZE)
+    last = None
+    for i in candidates.tolist():
+        if last is not None and i - last < gap:
+            # 같은 신호 안(음절/잔향)의 피크 - 세기만 갱신, 시작 시각은 유지
+            onsets[-1]['strength'] = max(onsets[-1]['strength'], float(novelty[i]))
+            last = i
+            continue
+        last = i
+        # 시작 시각 = 처음으로 큰 소리가 된 창의 끝 (창 시작 기준이면 최대 32ms 이르게 나옴)
+        first = i + int(np.argmax(loud[i:i + lookahead + 1]))
+        level = energy[first:first + gap]
+        duration = int((level > level.max() - 10).sum()) * HOP_SIZE / rate
+        onsets.append({'time': round((first * HOP_SIZE + FRAME_SIZE) / rate, 3),
+                       'strength': float(novelty[i]), 'duration': round(duration, 3),
+                       'kind': 'clap' if duration < CLAP_MAX_SEC else 'voice'})
+    for onset in onsets:
+        onset['strength'] = round(onset['strength'] / float(mad), 1)  # MAD 배수 (영상 간 비교용)
+    return onsets
+
+
+def audio_cues(video_path, method=ONSET_METHOD):
+    """영상 오디오 사전 분석 -> {'status', 'backend', 'onsets', 'duration'}
+
+    status: 'ok' | 'no_audio' | 'no_decoder' | 'no_cue'"""
+    samples, backend = extract_audio(video_path)
+    if samples is None:
+        return {'status': backend, 'backend': None, 'onsets': [], 'duration': 0.0}
+    onsets = detect_onsets(samples, method=method)
+    return {'status': 'ok' if onsets else 'no_cue', 'backend': backend, 'onsets': onsets,
+            'duration': round(len(samples) / AUDIO_RATE, 3)}
+
+
+def analysis_window(cues, meta, warmup_frames):
+    """신호 기준 영상 감지 구간 -> (start_frame, end_frame) (신호가 없거나 줄어드는 게 적으면 None)"""
+    from video_index import time_to_frame
+
+    if not cues['onsets']:
+        return None
+    index, total = meta['index'], meta['total_frames']
+    start = time_to_frame(index, max(cues['onsets'][0]['time'] - CUE_PRE_SEC, 0), meta['fps']) - warmup_frames
+    end = time_to_frame(index, cues['onsets'][-1]['time'] + TRIAL_MAX_SEC, meta['fps']) + 1
+    start, end = max(start, 0), min(end, total)
+    if end - start > (1 - MIN_SAVING) * total:
+        return None
+    return start, end
+
+
+def cross_check(start_time, cues):
+    """영상 START(초)와 오디오 신호 비교 -> {'status', 'cue_time', 'lag', 'kind'}
+
+    status: 'ok' = 일치하는 신호 있음, 'mismatch' = 신호는 있지만 START 부근에 없음,
+    'no_cue' = 들리는 신호 없음, 'no_audio'/'no_decoder' = 오디오 분석 불가"""
+    if cues['status'] not in ('ok', 'no_cue'):
+        return {'status': cues['status'], 'cue_time': None, 'lag': None, 'kind': None}
+    # START 직전(구령 후 일어나기까지) 신호 중 가장 늦은 것
+    matched = [o for o in cues['onsets'] if -CUE_EARLY_SEC <= start_time - o['time'] <= CUE_MAX_LAG_SEC]
+    if matched:
+        cue = matched[-1]
+        return {'status': 'ok', 'cue_time': cue['time'], 'lag': round(start_time - cue['time'], 3),
+                'kind': cue['kind']}
+    return {'status': 'mismatch' if cues['onsets'] else 'no_cue', 'cue_time': None, 'lag': None, 'kind': None}
+
+
+def describe_check(check):
+    if check['status'] == 'ok':
+        label = '박수' if check['kind'] == 'clap' else '구령'
+        return f"오디오 신호 일치 ({label} {check['cue_time']:.2f}초, START까지 {check['lag']:+.2f}초)"
+    reasons = {'mismatch': "START 부근에 오디오 신호 없음", 'no_cue': "들리는 시작 신호 없음",
+               'no_audio': "오디오 트랙 없음", 'no_decoder': "오디오 디코더(PyAV/ffmpeg) 없음"}
+    return f"확인 필요: {reasons[check['status']]}"
+
+
+def synthetic_session(path, duration=30.0, cues=((3.0, 'voice'), (12.0, 'clap')), noise_db=-45, rate=AUDIO_RATE):
+    """벤치마크용 합성 WAV: 배경 소음 + 구령(배음 0.4초) / 박수(짧은 잡음 폭발)"""
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 10 ** (noise_db / 20), int(duration * rate))
+    for t, kind in cues:
+        lo = int(t * rate)
+        if kind == 'clap':
+            n = int(0.05 * rate)
+            burst = rng.normal(0, 0.5, n) * np.exp(-np.arange(n) / (0.01 * rate))
+        else:
+            n = int(0.4 * rate)
+            tt = np.arange(n) / rate
+            burst = sum(0.15 / k * np.sin(2 * np.pi * 180 * k * tt) for k in range(1, 6))
+            burst *= np.minimum(1, np.minimum(tt / 0.02, (0.4 - tt) / 0.05))
+        samples[lo:lo + n] += burst[:len(samples) - lo]
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+    return path
+
+
+def benchmark(audio_path, repeat=3):
+    """오디오 사전 분석 속도 (추출 제외 / 포함)"""
+    import time
+
+    print(f"\n{'='*60}")
+    print(f"오디오 신호 벤치마크: {os.path.basename(audio_path)}")
+    print(f"{'='*60}")
+    started = time.perf_counter()
+    samples, backend = extract_audio(audio_path)
+    extract_sec = time.perf_counter() - started
+    if samples is None:
+        print(f"  오디오 추출 불가: {backend}")
+        return
+    duration = len(samples) / AUDIO_RATE
+    print(f"  추출 ({backend}): {extract_sec:.3f}초, 길이 {duration:.1f}초")
+    for method in ('energy', 'flux'):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            onsets = detect_onsets(samples, method=method)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        found = ', '.join(f"{o['time']:.2f}초 {o['kind']}" for o in onsets) or '없음'
+        print(f"  {method:<6} {best * 1000:7.1f}ms ({duration / best:,.0f}x 실시간) - 신호: {found}")
+
+
+def main():
+    import glob
+
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+    for video_path in video_files:
+        cues = audio_cues(video_path)
+        found = ', '.join(f"{o['time']:.2f}초 {o['kind']}" for o in cues['onsets']) or '없음'
+        print(f"{os.path.basename(video_path)}: {cues['status']} - {found}")
+
+
+if __name__ == "__main__":
+    main()
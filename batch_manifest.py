@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import time
+
+try:
+    import xxhash  # 선택 - 있으면 더 빠른 해시
+except ImportError:
+    xxhash = None
+
+# 파일 전체를 읽지 않고 앞/중간/뒤 일부만 샘플링해서 해시 (크기도 포함)
+HASH_SAMPLE_BYTES = 1024 * 1024
+
+# 다시 처리할 필요 없는 상태
+FINAL_STATUSES = ('done', 'no_person')
+
+
+def content_hash(path, sample_bytes=HASH_SAMPLE_BYTES):
+    """파일 크기 + 앞/중간/뒤 샘플 기반 빠른 콘텐츠 해시 (이름이 달라도 같은 영상이면 같은 값)"""
+    size = os.path.getsize(path)
+
+    if xxhash is not None:
+        h = xxhash.xxh3_128()
+        algo = 'xxh3'
+    else:
+        h = hashlib.blake2b(digest_size=16)
+        algo = 'b2'
+
+    h.update(size.to_bytes(8, 'little'))
+    with open(path, 'rb') as f:
+        if size <= sample_bytes * 3:
+            h.update(f.read())
+        else:
+            for offset in (0, size // 2 - sample_bytes // 2, size - sample_bytes):
+                f.seek(offset)
+                h.update(f.read(sample_bytes))
+
+    return f"{algo}:{h.hexdigest()}"
+
+
+class BatchManifest:
+    """JSONL 배치 매니페스트 - 한 줄에 한 기록, 같은 해시는 마지막 기록이 유효"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # 중간에 끊긴 마지막 줄 무시
+                    self.entries[entry['hash']] = entry
+
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def get(self, video_hash):
+        return self.entries.get(video_hash)
+
+    def is_done(self, video_hash, params):
+        """같은 검출 파라미터로 이미 처리 완료된 영상인지"""
+        entry = self.entries.get(video_hash)
+        return (entry is not None
+                and entry['status'] in FINAL_STATUSES
+                and entry.get('params') == params)
+
+    def record(self, video_hash, status, **fields):
+        """상태 기록 (바로 디스크에 flush - 중간에 죽어도 여기까지는 남음)"""
+        entry = dict(self.entries.get(video_hash, {}))
+        entry.update(fields)
+        entry['hash'] = video_hash
+        entry['status'] = status
+        entry['updated'] = time.time()
+        self.entries[video_hash] = entry
+
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return entry
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,339 @@
+import glob
+import heapq
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+
+from batch_manifest import BatchManifest, content_hash
+from debug_render import sampled
+from motion_detect_v3 import (DETECTOR_PARAMS, MAKE_FILMSTRIP, DEBUG_SAMPLE_RATE, scan_timeline,
+                              analyze_and_output, analyze_timeline)
+from pipeline_metrics import registry as metrics, export as export_metrics, start_http_server, METRICS_PORT
+from results_store import ResultsStore
+from tug_watch import warm_worker
+
+# 처리 비용 모델: 기준 해상도에서 초당 처리 프레임 수 + 영상당 고정 비용
+COST_MODEL_PATH = "/Users/aisoft/Documents/TUG/cost_model.json"
+DEFAULT_COST_MODEL = {
+    'ref_pixels': 1280 * 720,
+    'ref_fps': 120.0,
+    'overhead_sec': 0.3,
+}
+
+MAX_WORKERS = 4
+# 이 시간(초)보다 오래 걸릴 영상은 구간으로 나눠 병렬 처리
+SPLIT_MIN_SEC = 30.0
+# 구간 앞에 겹쳐 읽는 배경 학습 프레임 수 (MOG2가 구간마다 새로 학습)
+# warmup_frames(50)만으로는 history(200) 프레임 배경 모델이 덜 차서 구간 경계 근처 전경이 달라짐
+CHUNK_WARMUP = max(DETECTOR_PARAMS['history'], DETECTOR_PARAMS['warmup_frames'])
+
+
+def probe_video(video_path):
+    """디코딩 없이 컨테이너 정보만 읽기 (프레임 수는 추정치)"""
+    cap = cv2.VideoCapture(video_path)
+    probe = {
+        'path': video_path,
+        'frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return probe
+
+
+def load_cost_model(path=COST_MODEL_PATH):
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return {**DEFAULT_COST_MODEL, **json.load(f)}
+    return dict(DEFAULT_COST_MODEL)
+
+
+def estimate_cost(frames, width, height, model):
+    """예상 처리 시간(초) = 고정 비용 + 프레임 수 / 해상도 보정 처리 속도"""
+    pixels = max(1, width * height)
+    fps = model['ref_fps'] * model['ref_pixels'] / pixels
+    return model['overhead_sec'] + frames / fps
+
+
+def calibrate(sample_paths, path=COST_MODEL_PATH):
+    """샘플 영상 실제 처리 시간으로 비용 모델 보정 (elapsed = overhead + work / ref_fps)"""
+    model = dict(DEFAULT_COST_MODEL)
+    work = []
+    elapsed = []
+    for video_path in sample_paths:
+        probe = probe_video(video_path)
+        started = time.perf_counter()
+        scan_timeline(video_path)
+        elapsed.append(time.perf_counter() - started)
+        # 기준 해상도로 환산한 프레임 수
+        work.append(probe['frames'] * probe['width'] * probe['height'] / model['ref_pixels'])
+
+    if len(work) >= 2 and np.ptp(work) > 0:
+        slope, intercept = np.polyfit(work, elapsed, 1)
+        model['ref_fps'] = float(1.0 / max(slope, 1e-6))
+        model['overhead_sec'] = float(max(intercept, 0.0))
+    elif work:
+        model['ref_fps'] = float(sum(work) / max(sum(elapsed), 1e-6))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(model, f, indent=2)
+    print(f"비용 모델 보정: 기준 해상도 {model['ref_fps']:.1f} fps, 고정 비용 {model['overhead_sec']:.2f}초")
+    return model
+
+
+def plan_tasks(probes, model, n_workers, split_min_sec=SPLIT_MIN_SEC):
+    """영상별 작업 목록 (긴 영상은 구간 분할), 비용 내림차순 = 가장 긴 작업부터"""
+    costs = [estimate_cost(p['frames'], p['width'], p['height'], model) for p in probes]
+    # 한 작업이 전체 배치의 워커당 평균 몫보다 길면 분할 대상
+    target = max(split_min_sec, sum(costs) / max(1, n_workers))
+
+    tasks = []
+    for probe, cost in zip(probes, costs):
+        splittable = cost > split_min_sec and probe.get('splittable', True)
+        n_chunks = max(1, math.ceil(cost / target)) if splittable else 1
+        bounds = np.linspace(0, probe['frames'], n_chunks + 1).astype(int)
+        for i in range(n_chunks):
+            start, end = int(bounds[i]), int(bounds[i + 1])
+            is_last = i == n_chunks - 1
+            tasks.append({
+                'path': probe['path'],
+                'start': start,
+                'end': None if is_last else end,  # 마지막 구간은 실제 끝까지 (프레임 수 추정 오차 대비)
+                'chunks': n_chunks,
+                'cost': cost / n_chunks,
+            })
+
+    tasks.sort(key=lambda t: t['cost'], reverse=True)
+    return tasks
+
+
+def list_schedule(costs, n_workers):
+    """주어진 순서대로 가장 먼저 비는 워커에 배정 (풀 동작과 동일). makespan 반환"""
+    workers = [0.0] * n_workers
+    heapq.heapify(workers)
+    for cost in costs:
+        heapq.heappush(workers, heapq.heappop(workers) + cost)
+    return max(workers)
+
+
+def fifo_makespan(costs, n_workers):
+    return list_schedule(costs, n_workers)
+
+
+def lpt_makespan(costs, n_workers):
+    """가장 긴 작업 먼저 (Longest Processing Time first)"""
+    return list_schedule(sorted(costs, reverse=True), n_workers)
+
+
+def _scan_chunk(video_path, start, end):
+    """구간 스캔 - 앞쪽 CHUNK_WARMUP 프레임은 배경 학습용으로 읽고 버림
+    -> (기록, 워커 처리 시간, 디코딩한 프레임 수, 워커 pid)"""
+    started = time.perf_counter()
+    read_from = max(0, start - CHUNK_WARMUP)
+    records = scan_timeline(video_path, start_frame=read_from, end_frame=end)
+    return ([r for r in records if r['frame'] >= start], time.perf_counter() - started,
+            len(records), os.getpid())
+
+
+def _splittable(video_path):
+    """구간 분할해도 결과가 같은 영상인지 - 필름스트립/디버그 영상은 한 번의 전체 디코딩에서 만들어야 함"""
+    return not (MAKE_FILMSTRIP or sampled(os.path.basename(video_path), DEBUG_SAMPLE_RATE))
+
+
+def _pending_videos(video_paths, manifest, results):
+    """처리할 영상 {경로: 해시} - 같은 파라미터로 처리 완료된 영상/배치 안 중복 영상은 건너뜀 (완료 결과는 results에)"""
+    todo = {}
+    for video_path in video_paths:
+        filename = os.path.basename(video_path)
+        video_hash = content_hash(video_path)
+        if manifest.is_done(video_hash, DETECTOR_PARAMS):
+            metrics.inc('tug_cache_requests_total', cache='manifest', result='hit')
+            entry = manifest.get(video_hash)
+            if entry['file'] != filename:
+                print(f"  중복 영상: {filename} ({entry['file']}과 동일) - 건너뜀")
+            else:
+                print(f"  이미 처리됨: {filename} - 건너뜀")
+            if entry['status'] == 'done':
+                results.append({'file': filename, **entry['result']})
+            continue
+        same = next((p for p, h in todo.items() if h == video_hash), None)
+        if same is not None:
+            print(f"  중복 영상: {filename} ({os.path.basename(same)}과 동일) - 건너뜀")
+            continue
+        metrics.inc('tug_cache_requests_total', cache='manifest', result='miss')
+        todo[video_path] = video_hash
+    return todo
+
+
+def _record_video(video_path, video_hash, result, error, manifest, store, results):
+    """영상 하나 결과를 매니페스트/저장소에 기록 (저장소는 영상마다 flush - 중단돼도 행이 빠지지 않게)"""
+    filename = os.path.basename(video_path)
+    version = DETECTOR_PARAMS['version']
+    if error is not None:
+        manifest.record(video_hash, 'failed', error=str(error))
+        store.record(video_hash, filename, status='failed', params=DETECTOR_PARAMS)
+        store.flush()
+        metrics.inc('tug_videos_total', status='failed', detector_version=version)
+        print(f"  오류: {filename} - {error}")
+        return
+    if result is None:
+        manifest.record(video_hash, 'no_person')
+        store.record(video_hash, filename, status='no_person', params=DETECTOR_PARAMS)
+        store.flush()
+        metrics.inc('tug_videos_total', status='no_person', detector_version=version)
+        print(f"  사람 미감지: {filename}")
+        return
+
+    store.record(video_hash, filename, result, params=DETECTOR_PARAMS)
+    store.flush()
+    metrics.inc('tug_videos_total', status='done', detector_version=version)
+    # 워커에서 잰 단계별 시간은 부모 지표로 다시 집계
+    for stage, seconds in result['timings'].items():
+        metrics.observe('tug_stage_seconds', seconds, stage=stage)
+    metrics.observe('tug_video_seconds', sum(result['timings'].values()))
+    results.append({'file': filename, **result})
+    outputs = result.pop('outputs')
+    manifest.record(video_hash, 'done', result=result, outputs=outputs)
+    print(f"  완료: {filename} (START {result['start_time']:.2f}초, FINISH {result['finish_time']:.2f}초)")
+
+
+def run_batch(video_paths, output_dir, n_workers=MAX_WORKERS, split_min_sec=SPLIT_MIN_SEC, output_mode=None):
+    """배치 실행 (motion_detect_v3.main): 처리된/중복 영상은 매니페스트로 건너뛰고 긴 작업부터 워커에 배정
+
+    긴 영상은 구간 병렬 스캔 후 합친 타임라인으로 analyze_timeline, 나머지는 analyze_and_output -
+    감지 이후 처리(output_results)가 같아서 어느 쪽으로 처리돼도 결과/저장소 행이 같음.
+    -> 영상별 결과 목록 [{'file', ...}] (이전 배치에서 처리된 영상 포함)"""
+    os.makedirs(output_dir, exist_ok=True)
+    # 배치 매니페스트: 이미 처리된 영상/중복 영상은 건너뛰고, 중단된 배치는 이어서 처리
+    manifest = BatchManifest(os.path.join(output_dir, "manifest.jsonl"))
+    # 워커는 결과만 반환, 저장소 기록/지표 집계는 부모 프로세스에서
+    store = ResultsStore()
+    start_http_server(METRICS_PORT)
+    metrics.set('tug_batch_started_timestamp', time.time())
+    results = []
+    started = time.perf_counter()
+    try:
+        todo = _pending_videos(video_paths, manifest, results)
+        if todo:
+            _run_tasks(todo, output_dir, n_workers, split_min_sec, output_mode, manifest, store, results)
+    finally:
+        manifest.close()
+        store.close()
+        export_metrics(os.path.join(output_dir, 'metrics'))
+    print(f"실제 makespan: {time.perf_counter() - started:.1f}초")
+    return results
+
+
+def _run_tasks(todo, output_dir, n_workers, split_min_sec, output_mode, manifest, store, results):
+    model = load_cost_model()
+    probes = [{**probe_video(p), 'splittable': _splittable(p)} for p in todo]
+    tasks = plan_tasks(probes, model, n_workers, split_min_sec)
+
+    video_costs = [estimate_cost(p['frames'], p['width'], p['height'], model) for p in probes]
+    print(f"작업 {len(tasks)}개 (영상 {len(todo)}개), 워커 {n_workers}개")
+    print(f"  예상 makespan - FIFO: {fifo_makespan(video_costs, n_workers):.1f}초, "
+          f"LPT+분할: {lpt_makespan([t['cost'] for t in tasks], n_workers):.1f}초")
+    for video_path, video_hash in todo.items():
+        manifest.record(video_hash, 'processing', file=os.path.basename(video_path), params=DETECTOR_PARAMS)
+
+    pending = {}  # path -> 받은 (구간 타임라인, 처리 시간) 목록
+    failed = set()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=warm_worker) as executor:
+        running = {}
+        for task in tasks:
+            if task['chunks'] == 1:
+                future = executor.submit(analyze_and_output, task['path'], output_dir, output_mode)
+            else:
+                future = executor.submit(_scan_chunk, task['path'], task['start'], task['end'])
+            running[future] = task
+
+        while running:
+            metrics.set('tug_queue_depth', len(running), queue='scan')
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                path = task['path']
+                if task['chunks'] == 1 or task.get('merge'):
+                    # 영상 하나의 최종 결과 (통째로 처리했거나 구간을 합쳐 후처리한 것)
+                    error = future.exception()
+                    result = future.result() if error is None else None
+                    _record_video(path, todo[path], result, error, manifest, store, results)
+                    continue
+
+                try:
+                    records, seconds, frames, worker = future.result()
+                except Exception as e:
+                    # 한 구간이라도 실패하면 영상 전체를 실패로 (나머지 구간 결과는 버림)
+                    if path not in failed:
+                        failed.add(path)
+                        pending.pop(path, None)
+                        _record_video(path, todo[path], None, e, manifest, store, results)
+                    continue
+                metrics.inc('tug_frames_total', frames, worker=str(worker))
+                metrics.inc('tug_scan_seconds_total', seconds, worker=str(worker))
+                if seconds > 0:
+                    metrics.observe('tug_scan_fps', frames / seconds)
+                if path in failed:
+                    continue
+
+                parts = pending.setdefault(path, [])
+                parts.append((records, seconds))
+                if len(parts) < task['chunks']:
+                    continue
+
+                # 모든 구간 완료 -> 프레임 순서로 합쳐서 통째로 처리한 것과 같은 후처리 (워커에서)
+                parts = pending.pop(path)
+                person_timeline = sorted((r for part, _ in parts for r in part), key=lambda r: r['frame'])
+                timings = {'detect': sum(seconds for _, seconds in parts)}
+                future = executor.submit(analyze_timeline, path, person_timeline, output_dir, output_mode,
+                                         timings=timings)
+                running[future] = {**task, 'merge': True}
+    metrics.set('tug_queue_depth', 0, queue='scan')
+
+
+def report_skewed_batch(n_workers=MAX_WORKERS):
+    """긴 영상 몇 개 + 짧은 TUG 영상 다수인 합성 배치에서 FIFO vs LPT vs LPT+분할 makespan 비교"""
+    model = dict(DEFAULT_COST_MODEL)
+    fps = 30
+    # 이름순 정렬 시 긴 영상이 마지막에 오는 최악의 경우
+    durations = [10] * 40 + [180, 240]
+    probes = [{'path': f"clip_{i:02d}.mp4", 'frames': d * fps, 'width': 1280, 'height': 720}
+              for i, d in enumerate(durations)]
+    costs = [estimate_cost(p['frames'], p['width'], p['height'], model) for p in probes]
+
+    fifo = fifo_makespan(costs, n_workers)
+    lpt = lpt_makespan(costs, n_workers)
+    split = lpt_makespan([t['cost'] for t in plan_tasks(probes, model, n_workers)], n_workers)
+    lower_bound = sum(costs) / n_workers
+
+    print(f"\n{'='*60}")
+    print(f"합성 배치: 10초 x 40개 + 3분/4분 영상, 워커 {n_workers}개")
+    print(f"{'='*60}")
+    print(f"  FIFO      makespan: {fifo:6.1f}초")
+    print(f"  LPT       makespan: {lpt:6.1f}초 ({fifo / lpt:.2f}배)")
+    print(f"  LPT+분할  makespan: {split:6.1f}초 ({fifo / split:.2f}배)")
+    print(f"  이론 하한 (완전 분할): {lower_bound:6.1f}초")
+
+
+def main():
+    report_skewed_batch()
+
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+
+    if not os.path.exists(COST_MODEL_PATH):
+        calibrate(video_files[:3])
+
+    run_batch(video_files, "/Users/aisoft/Documents/TUG/final_output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,813 @@
+import json
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+# src/utils/bbsMotionAnalysis.js 의 Python 배치 버전
+# 한 프레임씩이 아니라 세션 전체 랜드마크 배열 (T x 33 x 4: x, y, z, visibility)을 한 번에 계산
+JS_MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "utils", "bbsMotionAnalysis.js")
+LANDMARK_DIR = "/Users/aisoft/Documents/BBS/landmarks"
+
+# MediaPipe Pose 랜드마크 인덱스
+POSE_LANDMARKS = {
+    'NOSE': 0,
+    'LEFT_EYE_INNER': 1,
+    'LEFT_EYE': 2,
+    'LEFT_EYE_OUTER': 3,
+    'RIGHT_EYE_INNER': 4,
+    'RIGHT_EYE': 5,
+    'RIGHT_EYE_OUTER': 6,
+    'LEFT_EAR': 7,
+    'RIGHT_EAR': 8,
+    'MOUTH_LEFT': 9,
+    'MOUTH_RIGHT': 10,
+    'LEFT_SHOULDER': 11,
+    'RIGHT_SHOULDER': 12,
+    'LEFT_ELBOW': 13,
+    'RIGHT_ELBOW': 14,
+    'LEFT_WRIST': 15,
+    'RIGHT_WRIST': 16,
+    'LEFT_PINKY': 17,
+    'RIGHT_PINKY': 18,
+    'LEFT_INDEX': 19,
+    'RIGHT_INDEX': 20,
+    'LEFT_THUMB': 21,
+    'RIGHT_THUMB': 22,
+    'LEFT_HIP': 23,
+    'RIGHT_HIP': 24,
+    'LEFT_KNEE': 25,
+    'RIGHT_KNEE': 26,
+    'LEFT_ANKLE': 27,
+    'RIGHT_ANKLE': 28,
+    'LEFT_HEEL': 29,
+    'RIGHT_HEEL': 30,
+    'LEFT_FOOT_INDEX': 31,
+    'RIGHT_FOOT_INDEX': 32,
+}
+
+# 앱 landmarksHistoryRef 최대 길이 (measureStability는 그중 최근 10프레임만 사용)
+HISTORY_FRAMES = 60
+STABILITY_RECENT_FRAMES = 10
+STABILITY_MIN_FRAMES = 5
+STABILITY_LEVELS = (
+    (0.005, 'excellent', 100),
+    (0.01, 'good', 80),
+    (0.02, 'moderate', 60),
+    (0.04, 'poor', 40),
+)
+
+# 들어 올린 발 코드 (JS liftedFoot / steppingFoot)
+FOOT_NAMES = (None, 'left', 'right')
+
+
+def load_landmarks(path):
+    """저장된 랜드마크 시퀀스 로드 -> float64 (T, 33, 4)
+
+    .npy / .npz('landmarks') 또는 JSON (프레임별 [{x, y, z, visibility}, ...] 리스트)
+    """
+    if path.endswith('.npy'):
+        return np.load(path).astype(np.float64)
+    if path.endswith('.npz'):
+        return np.load(path)['landmarks'].astype(np.float64)
+    with open(path, encoding='utf-8') as f:
+        frames = json.load(f)
+    if isinstance(frames, dict):
+        frames = frames['landmarks']
+    return np.array([[[p.get('x', 0), p.get('y', 0), p.get('z', 0) or 0, p.get('visibility', 0) or 0]
+                      for p in frame] for frame in frames], dtype=np.float64)
+
+
+def _lm(landmarks, name):
+    return landmarks[..., POSE_LANDMARKS[name], :]
+
+
+def _side(landmarks, side, part):
+    return landmarks[..., POSE_LANDMARKS[f"{side.upper()}_{part}"], :]
+
+
+# ============================================================
+# 기본 유틸리티 (모든 함수는 (..., 4) 점 배열을 받아 (...) 배열 반환)
+# ============================================================
+
+def distance(p1, p2):
+    d = p1[..., :3] - p2[..., :3]
+    return np.sqrt(d[..., 0] * d[..., 0] + d[..., 1] * d[..., 1] + d[..., 2] * d[..., 2])
+
+
+def calculate_angle(p1, p2, p3):
+    """p1-p2-p3 각도 (도), p2가 꼭지점 - 2D"""
+    v1x, v1y = p1[..., 0] - p2[..., 0], p1[..., 1] - p2[..., 1]
+    v2x, v2y = p3[..., 0] - p2[..., 0], p3[..., 1] - p2[..., 1]
+    dot = v1x * v2x + v1y * v2y
+    cross = v1x * v2y - v1y * v2x
+    return np.arctan2(np.abs(cross), dot) * (180 / np.pi)
+
+
+def calculate_angle_3d(p1, p2, p3):
+    v1 = p1[..., :3] - p2[..., :3]
+    v2 = p3[..., :3] - p2[..., :3]
+    dot = (v1 * v2).sum(axis=-1)
+    mag = np.sqrt((v1 * v1).sum(axis=-1)) * np.sqrt((v2 * v2).sum(axis=-1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        angle = np.arccos(np.clip(dot / mag, -1, 1)) * (180 / np.pi)
+    return np.where(mag == 0, 0.0, angle)
+
+
+def midpoint(p1, p2):
+    return (p1[..., :3] + p2[..., :3]) / 2
+
+
+# ============================================================
+# 신체 부위별 각도
+# ============================================================
+
+def get_knee_angle(landmarks, side='left'):
+    return calculate_angle(_side(landmarks, side, 'HIP'), _side(landmarks, side, 'KNEE'),
+                           _side(landmarks, side, 'ANKLE'))
+
+
+def get_hip_angle(landmarks, side='left'):
+    return calculate_angle(_side(landmarks, side, 'SHOULDER'), _side(landmarks, side, 'HIP'),
+                           _side(landmarks, side, 'KNEE'))
+
+
+def get_elbow_angle(landmarks, side='left'):
+    return calculate_angle(_side(landmarks, side, 'SHOULDER'), _side(landmarks, side, 'ELBOW'),
+                           _side(landmarks, side, 'WRIST'))
+
+
+def get_shoulder_angle(landmarks, side='left'):
+    return calculate_angle(_side(landmarks, side, 'HIP'), _side(landmarks, side, 'SHOULDER'),
+                           _side(landmarks, side, 'ELBOW'))
+
+
+def get_trunk_tilt(landmarks):
+    """수직선 대비 몸통 기울기 (도)"""
+    shoulder_mid = midpoint(_lm(landmarks, 'LEFT_SHOULDER'), _lm(landmarks, 'RIGHT_SHOULDER'))
+    hip_mid = midpoint(_lm(landmarks, 'LEFT_HIP'), _lm(landmarks, 'RIGHT_HIP'))
+    dx = shoulder_mid[..., 0] - hip_mid[..., 0]
+    dy = shoulder_mid[..., 1] - hip_mid[..., 1]
+    return np.arctan2(dx, -dy) * (180 / np.pi)
+
+
+def get_shoulder_rotation(landmarks):
+    """어깨 z 차이로 추정한 회전 각도 (도)"""
+    left, right = _lm(landmarks, 'LEFT_SHOULDER'), _lm(landmarks, 'RIGHT_SHOULDER')
+    z_diff = left[..., 2] - right[..., 2]
+    width = distance(left, right)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rotation = np.arcsin(np.clip(z_diff / width, -1, 1)) * (180 / np.pi)
+    return np.where(width == 0, 0.0, rotation)
+
+
+# ============================================================
+# 자세 감지
+# ============================================================
+
+def _avg_angles(landmarks):
+    knee = (get_knee_angle(landmarks, 'left') + get_knee_angle(landmarks, 'right')) / 2
+    hip = (get_hip_angle(landmarks, 'left') + get_hip_angle(landmarks, 'right')) / 2
+    return knee, hip
+
+
+def detect_sitting(landmarks):
+    knee, hip = _avg_angles(landmarks)
+    is_sitting = (knee >= 60) & (knee <= 130) & (hip >= 60) & (hip <= 130)
+    confidence = np.minimum(1, (130 - np.abs(knee - 90)) / 40 * (130 - np.abs(hip - 90)) / 40)
+    return {
+        'is_sitting': is_sitting,
+        'confidence': np.where(is_sitting, confidence, 0.0),
+        'knee_angle': knee,
+        'hip_angle': hip,
+    }
+
+
+def detect_standing(landmarks):
+    knee, hip = _avg_angles(landmarks)
+    is_standing = (knee >= 150) & (hip >= 150)
+    confidence = np.minimum(1, (knee - 150) / 30 * (hip - 150) / 30)
+    return {
+        'is_standing': is_standing,
+        'confidence': np.where(is_standing, confidence, 0.0),
+        'knee_angle': knee,
+        'hip_angle': hip,
+    }
+
+
+def detect_bending(landmarks):
+    knee, hip = _avg_angles(landmarks)
+    return {
+        'is_bending': (hip >= 30) & (hip <= 120),
+        'hip_angle': hip,
+        'knee_angle': knee,
+        'bending_depth': 180 - hip,
+    }
+
+
+def detect_hand_support(landmarks):
+    """손이 무릎/엉덩이 높이 근처면 지지 중 (팔짱 낀 상태 제외)"""
+    near = {}
+    for side in ('left', 'right'):
+        wrist = _side(landmarks, side, 'WRIST')
+        knee = _side(landmarks, side, 'KNEE')
+        hip = _side(landmarks, side, 'HIP')
+        near_knee = np.abs(wrist[..., 1] - knee[..., 1]) < 0.15
+        near_hip = (np.abs(wrist[..., 1] - hip[..., 1]) < 0.1) & (np.abs(wrist[..., 0] - hip[..., 0]) < 0.15)
+        near[side] = near_knee | near_hip
+
+    arms_crossed = (get_elbow_angle(landmarks, 'left') < 90) & (get_elbow_angle(landmarks, 'right') < 90)
+    return {
+        'is_using_hand_support': (near['left'] | near['right']) & ~arms_crossed,
+        'left_hand_support': near['left'],
+        'right_hand_support': near['right'],
+        'arms_crossed': arms_crossed,
+    }
+
+
+def detect_arm_extension(landmarks):
+    """팔 뻗기 (항목 8)"""
+    result = {}
+    reach = []
+    for side in ('left', 'right'):
+        elbow = get_elbow_angle(landmarks, side)
+        shoulder = get_shoulder_angle(landmarks, side)
+        result[f'{side}_arm_extended'] = (elbow > 150) & (shoulder > 70) & (shoulder < 110)
+        result[f'{side}_elbow_angle'] = elbow
+        result[f'{side}_shoulder_angle'] = shoulder
+        # 손목이 어깨보다 앞 (z가 작음)
+        wrist_z = _side(landmarks, side, 'WRIST')[..., 2]
+        shoulder_z = _side(landmarks, side, 'SHOULDER')[..., 2]
+        reach.append(np.where(wrist_z < shoulder_z, np.abs(shoulder_z - wrist_z), 0.0))
+
+    result['is_extending'] = result['left_arm_extended'] | result['right_arm_extended']
+    result['reach_distance'] = np.maximum(reach[0], reach[1])
+    return result
+
+
+def measure_feet_distance(landmarks):
+    """발 간격 (항목 7, 13)"""
+    left_foot, right_foot = _lm(landmarks, 'LEFT_FOOT_INDEX'), _lm(landmarks, 'RIGHT_FOOT_INDEX')
+    ankle_distance = distance(_lm(landmarks, 'LEFT_ANKLE'), _lm(landmarks, 'RIGHT_ANKLE'))
+    foot_y_diff = np.abs(left_foot[..., 1] - right_foot[..., 1])
+    foot_x_diff = np.abs(left_foot[..., 0] - right_foot[..., 0])
+    return {
+        'ankle_distance': ankle_distance,
+        'heel_distance': distance(_lm(landmarks, 'LEFT_HEEL'), _lm(landmarks, 'RIGHT_HEEL')),
+        'foot_distance': distance(left_foot, right_foot),
+        'feet_together': ankle_distance < 0.12,
+        'is_tandem': (foot_x_diff < 0.1) & (foot_y_diff > 0.05),
+        'foot_y_diff': foot_y_diff,
+        'foot_x_diff': foot_x_diff,
+    }
+
+
+def detect_single_leg_stance(landmarks):
+    """한 발 들기 (항목 14). lifted_foot 코드는 FOOT_NAMES 인덱스"""
+    ankle_y_diff = _lm(landmarks, 'RIGHT_ANKLE')[..., 1] - _lm(landmarks, 'LEFT_ANKLE')[..., 1]
+    left_knee = get_knee_angle(landmarks, 'left')
+    right_knee = get_knee_angle(landmarks, 'right')
+    left_lifted = (ankle_y_diff > 0.05) & (left_knee < 160)
+    right_lifted = (ankle_y_diff < -0.05) & (right_knee < 160)
+    return {
+        'is_single_leg': left_lifted | right_lifted,
+        'lifted_foot': np.where(left_lifted, 1, np.where(right_lifted, 2, 0)).astype(np.int8),
+        'left_foot_lifted': left_lifted,
+        'right_foot_lifted': right_lifted,
+        'ankle_y_diff': np.abs(ankle_y_diff),
+        'left_knee_angle': left_knee,
+        'right_knee_angle': right_knee,
+    }
+
+
+def _previous(values, first=False):
+    """이전 프레임 값 (첫 프레임은 first)"""
+    shifted = np.empty_like(values)
+    shifted[1:] = values[:-1]
+    shifted[0] = first
+    return shifted
+
+
+def detect_foot_step(landmarks):
+    """발 올리기 (항목 12) - 이전 프레임 대비 바닥 -> 들림 변화"""
+    current = detect_single_leg_stance(landmarks)
+    left_step = current['left_foot_lifted'] & ~_previous(current['left_foot_lifted'], True)
+    right_step = current['right_foot_lifted'] & ~_previous(current['right_foot_lifted'], True)
+    return {
+        **current,
+        'step_detected': left_step | right_step,
+        # JS와 같이 두 발이 동시면 오른발
+        'stepping_foot': np.where(right_step, 2, np.where(left_step, 1, 0)).astype(np.int8),
+    }
+
+
+def detect_body_rotation(landmarks, initial_landmarks=None):
+    """몸 회전 (항목 10, 11) - initial_landmarks 기준 변화량"""
+    current = get_shoulder_rotation(landmarks)
+    initial = get_shoulder_rotation(initial_landmarks) if initial_landmarks is not None else 0.0
+    change = current - initial
+
+    left, right = _lm(landmarks, 'LEFT_SHOULDER'), _lm(landmarks, 'RIGHT_SHOULDER')
+    body_angle = np.arctan2(right[..., 2] - left[..., 2], right[..., 0] - left[..., 0]) * (180 / np.pi)
+    return {
+        'current_rotation': current,
+        'rotation_change': change,
+        'body_angle': body_angle,
+        'is_rotating_left': change < -15,
+        'is_rotating_right': change > 15,
+    }
+
+
+# ============================================================
+# 안정성 분석
+# ============================================================
+
+def measure_stability(landmarks, history_start=0):
+    """프레임마다 그 시점까지의 히스토리로 measureStability (누적합 이동 평균, O(T))
+
+    history_start 이후 프레임이 히스토리 (앱에서 항목 시작 시 히스토리를 비우는 시점)
+    """
+    n = len(landmarks)
+    center = midpoint(midpoint(_lm(landmarks, 'LEFT_SHOULDER'), _lm(landmarks, 'RIGHT_SHOULDER')),
+                      midpoint(_lm(landmarks, 'LEFT_HIP'), _lm(landmarks, 'RIGHT_HIP')))
+    movement = np.zeros(n)
+    movement[1:] = distance(center[1:], center[:-1])
+
+    history_len = np.minimum(np.arange(n) - history_start + 1, HISTORY_FRAMES)
+    recent = np.minimum(history_len, STABILITY_RECENT_FRAMES) - 1  # 최근 프레임 사이 이동 횟수
+    csum = np.concatenate([[0.0], np.cumsum(movement)])
+    idx = np.arange(n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = (csum[idx + 1] - csum[np.maximum(idx + 1 - recent, 0)]) / recent
+    known = history_len >= STABILITY_MIN_FRAMES
+    avg = np.where(known, avg, np.nan)
+
+    conditions = [avg < limit for limit, _, _ in STABILITY_LEVELS]
+    stability = np.select(conditions, [name for _, name, _ in STABILITY_LEVELS], 'unstable')
+    score = np.select(conditions, [s for _, _, s in STABILITY_LEVELS], 20)
+    return {
+        'stability': np.where(known, stability, 'unknown'),
+        'score': np.where(known, score, 0),
+        'avg_movement': avg,
+    }
+
+
+# ============================================================
+# 항목별 분석 (앱에서 매 프레임 호출하고 state를 갱신하는 것과 같은 결과를 한 번에)
+# ============================================================
+
+def _pose(sitting, standing):
+    return np.where(sitting['is_sitting'], 'sitting', np.where(standing['is_standing'], 'standing', 'transitioning'))
+
+
+def _feet_moved(landmarks, initial):
+    if initial is None:
+        return np.zeros(len(landmarks), dtype=bool)
+    return ((distance(_lm(landmarks, 'LEFT_ANKLE'), _lm(initial, 'LEFT_ANKLE')) > 0.03) |
+            (distance(_lm(landmarks, 'RIGHT_ANKLE'), _lm(initial, 'RIGHT_ANKLE')) > 0.03))
+
+
+def analyze_item1(landmarks):
+    """항목 1: 앉은 자세에서 일어서기"""
+    sitting = detect_sitting(landmarks)
+    standing = detect_standing(landmarks)
+    hand_support = detect_hand_support(landmarks)
+    return {
+        'sitting': sitting,
+        'standing': standing,
+        'hand_support': hand_support,
+        'is_transitioning': ~sitting['is_sitting'] & ~standing['is_standing'],
+        'used_hands': hand_support['is_using_hand_support'],
+        'current_pose': _pose(sitting, standing),
+    }
+
+
+def analyze_item2(landmarks):
+    """항목 2: 지지 없이 서 있기"""
+    standing = detect_standing(landmarks)
+    stability = measure_stability(landmarks)
+    trunk_tilt = get_trunk_tilt(landmarks)
+    return {
+        'standing': standing,
+        'stability': stability,
+        'trunk_tilt': trunk_tilt,
+        'is_stable': standing['is_standing'] & (stability['score'] >= 60),
+        'needs_support': np.abs(trunk_tilt) > 15,
+    }
+
+
+def analyze_item3(landmarks):
+    """항목 3: 지지 없이 앉아 있기"""
+    trunk_tilt = get_trunk_tilt(landmarks)
+    tilt = np.abs(trunk_tilt)
+    return {
+        'sitting': detect_sitting(landmarks),
+        'stability': measure_stability(landmarks),
+        'trunk_tilt': trunk_tilt,
+        'posture_quality': np.where(tilt < 10, 'good', np.where(tilt < 20, 'moderate', 'poor')),
+    }
+
+
+def analyze_item4(landmarks):
+    """항목 4: 선 자세에서 앉기 - 이전 프레임 대비 엉덩이 각도 변화로 조절된 하강 여부"""
+    sitting = detect_sitting(landmarks)
+    standing = detect_standing(landmarks)
+    hip_angle = (get_hip_angle(landmarks, 'left') + get_hip_angle(landmarks, 'right')) / 2
+    knee_angle = (get_knee_angle(landmarks, 'left') + get_knee_angle(landmarks, 'right')) / 2
+    is_controlled = np.abs(hip_angle - _previous(hip_angle, np.nan)) < 10
+    is_controlled[0] = True
+    return {
+        'sitting': sitting,
+        'standing': standing,
+        'hand_support': detect_hand_support(landmarks),
+        'hip_angle': hip_angle,
+        'knee_angle': knee_angle,
+        'is_controlled': is_controlled,
+        'current_pose': _pose(sitting, standing),
+    }
+
+
+def analyze_item5(landmarks):
+    """항목 5: 이동하기 - 이전 프레임 대비 엉덩이 중심 이동"""
+    sitting = detect_sitting(landmarks)
+    standing = detect_standing(landmarks)
+    hip_mid = midpoint(_lm(landmarks, 'LEFT_HIP'), _lm(landmarks, 'RIGHT_HIP'))
+    is_moving = np.zeros(len(landmarks), dtype=bool)
+    is_moving[1:] = distance(hip_mid[1:], hip_mid[:-1]) > 0.05
+    return {
+        'sitting': sitting,
+        'standing': standing,
+        'hand_support': detect_hand_support(landmarks),
+        'is_moving': is_moving,
+        'hip_position': {'x': hip_mid[..., 0], 'y': hip_mid[..., 1], 'z': hip_mid[..., 2]},
+        'current_phase': np.where(sitting['is_sitting'], 'sitting',
+                                  np.where(standing['is_standing'] & ~is_moving, 'standing',
+                                           np.where(standing['is_standing'], 'moving', 'transitioning'))),
+    }
+
+
+def analyze_item6(landmarks):
+    """항목 6: 눈 감고 서 있기"""
+    standing = detect_standing(landmarks)
+    stability = measure_stability(landmarks)
+    return {
+        'standing': standing,
+        'stability': stability,
+        'is_stable': standing['is_standing'] & (stability['score'] >= 50),
+    }
+
+
+def analyze_item7(landmarks):
+    """항목 7: 두 발 모아 서 있기"""
+    standing = detect_standing(landmarks)
+    feet = measure_feet_distance(landmarks)
+    return {
+        'standing': standing,
+        'stability': measure_stability(landmarks),
+        'feet_together': feet['feet_together'],
+        'ankle_distance': feet['ankle_distance'],
+        'is_correct_pose': standing['is_standing'] & feet['feet_together'],
+    }
+
+
+def analyze_item8(landmarks, initial_landmarks=None):
+    """항목 8: 팔 뻗어 앞으로 내밀기 (initial_landmarks 기본값 = 첫 프레임)"""
+    initial = landmarks[0] if initial_landmarks is None else initial_landmarks
+    standing = detect_standing(landmarks)
+    arm = detect_arm_extension(landmarks)
+    feet_moved = _feet_moved(landmarks, initial)
+    return {
+        'standing': standing,
+        'arm_extension': arm,
+        'feet_moved': feet_moved,
+        'is_valid_reach': standing['is_standing'] & arm['is_extending'] & ~feet_moved,
+        'reach_distance': arm['reach_distance'],
+    }
+
+
+def analyze_item9(landmarks):
+    """항목 9: 바닥의 물건 집기"""
+    standing = detect_standing(landmarks)
+    bending = detect_bending(landmarks)
+    floor_y = _lm(landmarks, 'LEFT_ANKLE')[..., 1] - 0.1
+    return {
+        'standing': standing,
+        'bending': bending,
+        'hand_near_floor': ((_lm(landmarks, 'LEFT_WRIST')[..., 1] > floor_y) |
+                            (_lm(landmarks, 'RIGHT_WRIST')[..., 1] > floor_y)),
+        'current_phase': np.where(standing['is_standing'], 'standing',
+                                  np.where(bending['is_bending'], 'bending', 'transitioning')),
+        'can_reach_floor': bending['bending_depth'] > 60,
+    }
+
+
+def analyze_item10(landmarks, initial_landmarks=None):
+    """항목 10: 뒤돌아보기 (initial_landmarks 기본값 = 첫 프레임)"""
+    initial = landmarks[0] if initial_landmarks is None else initial_landmarks
+    standing = detect_standing(landmarks)
+    rotation = detect_body_rotation(landmarks, initial)
+    feet_moved = _feet_moved(landmarks, initial)
+    change = rotation['rotation_change']
+    return {
+        'standing': standing,
+        'rotation': rotation,
+        'feet_moved': feet_moved,
+        'turned_left': change < -30,
+        'turned_right': change > 30,
+        'is_valid_turn': standing['is_standing'] & ~feet_moved & (np.abs(change) > 30),
+    }
+
+
+def analyze_item11(landmarks, initial_landmarks=None):
+    """항목 11: 360도 회전 - 프레임 간 회전 변화량 누적"""
+    initial = landmarks[0] if initial_landmarks is None else initial_landmarks
+    rotation = detect_body_rotation(landmarks, initial)
+    change = rotation['rotation_change']
+    cumulative = np.cumsum(np.diff(change, prepend=0.0))
+    return {
+        'standing': detect_standing(landmarks),
+        'rotation': rotation,
+        'cumulative_rotation': cumulative,
+        'completed_full_turn': np.abs(cumulative) >= 330,
+        'turn_direction': np.where(cumulative > 0, 'right', 'left'),
+    }
+
+
+def analyze_item12(landmarks):
+    """항목 12: 발판에 발 교대로 올리기 - 마지막으로 올린 발을 반복문 없이 전파"""
+    n = len(landmarks)
+    foot_step = detect_foot_step(landmarks)
+    step = foot_step['step_detected']
+    foot = foot_step['stepping_foot']
+
+    # 각 프레임까지 마지막 발 올림 위치 -> 그 발 (없으면 0 = None)
+    last_idx = np.maximum.accumulate(np.where(step, np.arange(n), -1))
+    last_foot = np.where(last_idx >= 0, foot[np.maximum(last_idx, 0)], 0).astype(np.int8)
+    last_before = _previous(last_foot, 0)
+
+    is_alternating = step & (foot != last_before)
+    step_count = np.cumsum(is_alternating) - is_alternating  # 이 프레임 이전까지의 교대 횟수
+    return {
+        'standing': detect_standing(landmarks),
+        'foot_step': foot_step,
+        'is_alternating': is_alternating,
+        'step_count': step_count,
+        'last_stepping_foot': last_foot,
+    }
+
+
+def analyze_item13(landmarks):
+    """항목 13: 일렬로 서기 (탄뎀 서기)"""
+    standing = detect_standing(landmarks)
+    feet = measure_feet_distance(landmarks)
+    return {
+        'standing': standing,
+        'stability': measure_stability(landmarks),
+        'is_tandem': feet['is_tandem'],
+        'foot_alignment': feet['foot_x_diff'],
+        'is_correct_pose': standing['is_standing'] & feet['is_tandem'],
+    }
+
+
+def analyze_item14(landmarks):
+    """항목 14: 한 발로 서기"""
+    single_leg = detect_single_leg_stance(landmarks)
+    stability = measure_stability(landmarks)
+    return {
+        'standing': detect_standing(landmarks),
+        'single_leg': single_leg,
+        'stability': stability,
+        'is_on_one_leg': single_leg['is_single_leg'],
+        'lifted_foot': single_leg['lifted_foot'],
+        'is_stable': single_leg['is_single_leg'] & (stability['score'] >= 40),
+    }
+
+
+ITEM_ANALYZERS = {
+    1: analyze_item1, 2: analyze_item2, 3: analyze_item3, 4: analyze_item4,
+    5: analyze_item5, 6: analyze_item6, 7: analyze_item7, 8: analyze_item8,
+    9: analyze_item9, 10: analyze_item10, 11: analyze_item11, 12: analyze_item12,
+    13: analyze_item13, 14: analyze_item14,
+}
+
+
+def analyze_for_item(item_number, landmarks):
+    """현재 항목에 맞는 분석 (JS analyzeForItem)"""
+    analyzer = ITEM_ANALYZERS.get(item_number)
+    return analyzer(np.asarray(landmarks, dtype=np.float64)) if analyzer else None
+
+
+def flatten(result, prefix=''):
+    """중첩 결과 dict -> {'sitting.is_sitting': 배열, ...} (비교/요약용)"""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def summarize_item(result):
+    """세션 재채점용 요약: 불리언 = 참인 프레임 비율, 숫자 = 평균 (문자열은 최빈값)"""
+    summary = {}
+    for key, value in flatten(result).items():
+        value = np.asarray(value)
+        if value.ndim != 1:
+            continue
+        if value.dtype == bool:
+            summary[key] = round(float(value.mean()), 4)
+        elif value.dtype.kind in 'iuf':
+            summary[key] = round(float(np.nanmean(value)), 4) if np.isfinite(value).any() else None
+        else:
+            labels, counts = np.unique(value, return_counts=True)
+            summary[key] = str(labels[np.argmax(counts)])
+    return summary
+
+
+def rescore_session(landmarks, items=None):
+    """한 세션 랜드마크로 항목별 분석 요약 {항목: 요약}"""
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    return {item: summarize_item(ITEM_ANALYZERS[item](landmarks)) for item in (items or ITEM_ANALYZERS)}
+
+
+# ============================================================
+# JS 결과 비교 / 벤치마크
+# ============================================================
+
+# 앱(BBSTestPage)과 같은 방식으로 매 프레임 analyzeForItem을 호출하고 state를 갱신하는 참조 스크립트
+_JS_REFERENCE = r"""
+import fs from 'fs';
+import { analyzeForItem, getHipAngle, midpoint, POSE_LANDMARKS } from '%(module)s';
+
+const fixture = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const frames = fixture.landmarks.map(f => f.map(([x, y, z, visibility]) => ({ x, y, z, visibility })));
+
+function flat(obj, prefix, out) {
+  for (const [k, v] of Object.entries(obj)) {
+    if (Array.isArray(v)) continue;
+    if (v && typeof v === 'object') flat(v, prefix + k + '.', out);
+    else out[prefix + k] = v;
+  }
+  return out;
+}
+
+const results = {};
+for (const item of fixture.items) {
+  const history = [];
+  const state = { cumulativeRotation: 0, lastRotation: 0, stepCount: 0, lastSteppingFoot: null };
+  const rows = [];
+  frames.forEach((landmarks, i) => {
+    history.push(landmarks);
+    if (history.length > %(history)d) history.shift();
+    const prev = i > 0 ? frames[i - 1] : null;
+    const r = analyzeForItem(item, landmarks, {
+      landmarksHistory: history,
+      previousLandmarks: prev,
+      initialLandmarks: frames[0],
+      previousHipAngle: prev ? (getHipAngle(prev, 'left') + getHipAngle(prev, 'right')) / 2 : undefined,
+      previousHipPosition: prev ? midpoint(prev[POSE_LANDMARKS.LEFT_HIP], prev[POSE_LANDMARKS.RIGHT_HIP]) : undefined,
+      ...state
+    });
+    if (item === 11) {
+      state.cumulativeRotation = r.cumulativeRotation;
+      state.lastRotation = r.rotation.rotationChange;
+    }
+    if (item === 12) {
+      state.stepCount += r.isAlternating ? 1 : 0;
+      state.lastSteppingFoot = r.lastSteppingFoot;
+    }
+    rows.push(flat(r, '', {}));
+  });
+  results[item] = rows;
+}
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def make_fixture(frames=300, seed=0):
+    """앉기 -> 서기 -> 팔 뻗기/회전/한 발 들기가 섞인 합성 랜드마크 시퀀스 (비교/벤치마크용)"""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 1, frames)
+    base = np.zeros((33, 4))
+    base[:, 3] = 0.9
+    base[:, 0] = 0.5
+    for name, (x, y) in {'SHOULDER': (0.05, 0.3), 'ELBOW': (0.07, 0.42), 'WRIST': (0.08, 0.52),
+                         'HIP': (0.04, 0.55), 'KNEE': (0.04, 0.72), 'ANKLE': (0.04, 0.9),
+                         'HEEL': (0.04, 0.92), 'FOOT_INDEX': (0.04, 0.94)}.items():
+        base[POSE_LANDMARKS[f'LEFT_{name}']] = (0.5 + x, y, 0, 0.9)
+        base[POSE_LANDMARKS[f'RIGHT_{name}']] = (0.5 - x, y, 0, 0.9)
+    base[POSE_LANDMARKS['NOSE']] = (0.5, 0.18, -0.05, 0.9)
+
+    landmarks = np.repeat(base[None], frames, axis=0)
+    # 앞 1/3은 앉은 자세: 무릎이 앞으로 나오고 엉덩이가 내려감
+    sit = np.clip(1 - 3 * t, 0, 1)
+    for side in ('LEFT', 'RIGHT'):
+        landmarks[:, POSE_LANDMARKS[f'{side}_KNEE'], 0] += 0.17 * sit
+        landmarks[:, POSE_LANDMARKS[f'{side}_KNEE'], 1] -= 0.17 * sit
+        for part in ('SHOULDER', 'ELBOW', 'WRIST', 'HIP'):
+            landmarks[:, POSE_LANDMARKS[f'{side}_{part}'], 1] += 0.17 * sit
+    # 중간: 몸통 회전 (어깨 z), 마지막: 왼발 들기 / 팔 앞으로
+    turn = np.sin(np.clip(3 * t - 1, 0, 1) * np.pi)
+    landmarks[:, POSE_LANDMARKS['LEFT_SHOULDER'], 2] = -0.08 * turn
+    landmarks[:, POSE_LANDMARKS['RIGHT_SHOULDER'], 2] = 0.08 * turn
+    block = (t * 40).astype(int)
+    for side, phase, dx in (('LEFT', 0, 0.06), ('RIGHT', 2, -0.06)):
+        lift = (t > 0.7) & (block % 4 == phase)
+        landmarks[lift, POSE_LANDMARKS[f'{side}_ANKLE'], 1] -= 0.1
+        landmarks[lift, POSE_LANDMARKS[f'{side}_KNEE'], 0] += dx
+    reach = t > 0.9
+    shoulder = landmarks[reach, POSE_LANDMARKS['LEFT_SHOULDER'], :2]
+    landmarks[reach, POSE_LANDMARKS['LEFT_ELBOW'], :2] = shoulder + (0.12, 0.0)
+    landmarks[reach, POSE_LANDMARKS['LEFT_WRIST'], :2] = shoulder + (0.24, 0.0)
+    landmarks[reach, POSE_LANDMARKS['LEFT_WRIST'], 2] = -0.2
+
+    landmarks[..., :3] += rng.normal(0, 0.004, landmarks[..., :3].shape)
+    return landmarks
+
+
+def _snake(name):
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
+
+
+def compare_with_js(landmarks, items=None, atol=1e-9):
+    """node로 JS 분석기를 프레임별 실행한 결과와 비교. 항목별 불일치 필드 목록 반환 (node 없으면 None)"""
+    items = list(items or ITEM_ANALYZERS)
+    work_dir = tempfile.mkdtemp(prefix='bbs_js_')
+    script_path = os.path.join(work_dir, 'reference.mjs')
+    fixture_path = os.path.join(work_dir, 'fixture.json')
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(_JS_REFERENCE % {'module': 'file://' + JS_MODULE_PATH, 'history': HISTORY_FRAMES})
+    with open(fixture_path, 'w', encoding='utf-8') as f:
+        json.dump({'landmarks': np.asarray(landmarks).tolist(), 'items': items}, f)
+
+    try:
+        output = subprocess.run(['node', script_path, fixture_path], capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"  JS 참조 실행 실패: {e}")
+        return None
+    js_results = json.loads(output)
+
+    mismatches = {}
+    for item in items:
+        py = flatten(ITEM_ANALYZERS[item](np.asarray(landmarks, dtype=np.float64)))
+        rows = js_results[str(item)]
+        bad = []
+        for js_key in rows[0]:
+            key = '.'.join(_snake(k) for k in js_key.split('.'))
+            if key not in py:
+                bad.append(f"{key} (없음)")
+                continue
+            ours = np.asarray(py[key])
+            theirs = [row.get(js_key) for row in rows]
+            if key.endswith(('lifted_foot', 'stepping_foot')):
+                ours = np.array([FOOT_NAMES[v] for v in ours], dtype=object)
+            if ours.dtype.kind in 'iuf':
+                theirs = np.array([np.nan if v is None else v for v in theirs], dtype=np.float64)
+                ok = np.allclose(ours.astype(np.float64), theirs, atol=atol, equal_nan=True)
+            else:
+                ok = all(a == b for a, b in zip(ours.tolist(), theirs))
+            if not ok:
+                bad.append(key)
+        mismatches[item] = bad
+    return mismatches
+
+
+def benchmark(sessions=200, frames=900):
+    """합성 세션 (30초 x 30fps) 전체 14개 항목 재채점 처리량"""
+    landmarks = [make_fixture(frames, seed=i) for i in range(sessions)]
+    started = time.perf_counter()
+    for session in landmarks:
+        rescore_session(session)
+    elapsed = time.perf_counter() - started
+    print(f"  {sessions}개 세션 x {frames}프레임 x 14항목: {elapsed:.2f}초 "
+          f"({sessions / elapsed:.1f} 세션/초, {sessions * frames / elapsed / 1000:.0f}k 프레임/초)")
+
+
+def main():
+    print(f"\n{'='*60}")
+    print("BBS 분석기 JS 비교 (합성 픽스처)")
+    print(f"{'='*60}")
+    mismatches = compare_with_js(make_fixture())
+    if mismatches is not None:
+        for item, bad in mismatches.items():
+            print(f"  항목 {item:2d}: {'일치' if not bad else '불일치 ' + ', '.join(bad)}")
+
+    print(f"\n{'='*60}")
+    print("재채점 벤치마크")
+    print(f"{'='*60}")
+    benchmark()
+
+    if os.path.isdir(LANDMARK_DIR):
+        for name in sorted(os.listdir(LANDMARK_DIR)):
+            if name.endswith(('.npy', '.npz', '.json')):
+                summary = rescore_session(load_landmarks(os.path.join(LANDMARK_DIR, name)))
+                print(f"  {name}: 항목 {len(summary)}개 재채점")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import glob
+import os
+import tempfile
+import time
+
+from motion_detect_v3 import video_meta, scan_timeline, build_settings, engine_warmup
+from load_test import make_synthetic_clip
+
+# 감지 엔진 비교: 같은 영상에서 처리 속도(fps)와 START/FINISH 정확도
+ENGINES = ('mog2', 'flow', 'hybrid', 'multi')
+NUM_SYNTHETIC = 3
+
+
+def benchmark_engine(engine, clips):
+    """clips: [(path, 기준 START, 기준 FINISH)] -> 엔진별 fps, 평균 오차(프레임)"""
+    frames = 0
+    elapsed = 0.0
+    errors = []
+    misses = 0
+
+    for path, ref_start, ref_finish in clips:
+        meta = video_meta(path)
+        started = time.perf_counter()
+        person_timeline = scan_timeline(path, total_frames=meta['total_frames'], engine=engine)
+        elapsed += time.perf_counter() - started
+        frames += len(person_timeline)
+
+        # 배경 학습 구간은 그 엔진 기준 (flow/hybrid는 첫 프레임부터)
+        settings = build_settings(person_timeline, meta, warmup=engine_warmup(engine))
+        if settings is None or ref_start is None:
+            misses += settings is None
+            continue
+        errors.append(abs(settings['start_frame'] - ref_start))
+        errors.append(abs(settings['finish_frame'] - ref_finish))
+
+    return {
+        'engine': engine,
+        'fps': frames / elapsed if elapsed else 0.0,
+        'mean_error': sum(errors) / len(errors) if errors else None,
+        'max_error': max(errors) if errors else None,
+        'misses': misses,
+    }
+
+
+def _reference_clips():
+    """실제 영상이 있으면 MOG2 결과를 기준으로, 없으면 정답을 아는 합성 영상"""
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if video_files:
+        clips = []
+        for path in video_files:
+            settings = build_settings(scan_timeline(path, engine='mog2'), video_meta(path),
+                                      warmup=engine_warmup('mog2'))
+            if settings is None:
+                clips.append((path, None, None))
+            else:
+                clips.append((path, settings['start_frame'], settings['finish_frame']))
+        return clips, 'MOG2 결과 기준'
+
+    work_dir = tempfile.mkdtemp(prefix='tug_engines_')
+    clips = []
+    for i in range(NUM_SYNTHETIC):
+        path = os.path.join(work_dir, f"synthetic_{i}.mp4")
+        start, finish = make_synthetic_clip(path, seed=i)
+        clips.append((path, start, finish))
+    return clips, '합성 영상 정답 기준'
+
+
+def main():
+    clips, reference = _reference_clips()
+
+    results = []
+    for engine in ENGINES:
+        try:
+            results.append(benchmark_engine(engine, clips))
+        except (AttributeError, ImportError) as e:
+            # 예: OpenCV 빌드에 HOG/추적기가 없는 경우
+            print(f"  {engine} 엔진 건너뜀: {e}")
+
+    print(f"\n{'='*60}")
+    print(f"감지 엔진 비교 (영상 {len(clips)}개, {reference})")
+    print(f"{'='*60}")
+    for r in results:
+        error = '-' if r['mean_error'] is None else f"{r['mean_error']:.1f} (최대 {r['max_error']})"
+        print(f"  {r['engine']:7s}: {r['fps']:7.1f} fps, START/FINISH 평균 오차 {error} 프레임, 미감지 {r['misses']}개")
+
+
+if __name__ == "__main__":
+    main()
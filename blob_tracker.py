@@ -0,0 +1,320 @@
+import time
+
+import cv2
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment  # 선택 - 없으면 아래 numpy 헝가리안 사용
+except ImportError:
+    linear_sum_assignment = None
+
+# 다중 blob 추적: 프레임마다 가장 큰 컨투어 하나만 쓰면 치료사/지나가는 사람 쪽으로 x가 튐
+# -> 모든 blob을 트랙에 헝가리안 배정으로 연결하고, 규칙으로 환자 트랙 하나를 고름
+IOU_WEIGHT = 1.0
+DIST_WEIGHT = 1.0
+# 배정 허용 한계: IoU가 0이고 중심 거리가 (bbox 대각선 x 이 값)보다 멀면 같은 사람이 아님
+MAX_DIST_RATIO = 1.0
+GATE_COST = 1e6
+MIN_HITS = 3            # 이 횟수 이상 연결된 트랙만 확정 (노이즈 blob 제외)
+MAX_MISSES = 10         # 이 프레임 수 이상 안 보이면 트랙 삭제
+VELOCITY_SMOOTHING = 0.5
+# 환자 트랙을 잃었을 때 마지막 위치에서 이 거리(bbox 폭 배수) 안의 트랙으로 이어받음
+REACQUIRE_RATIO = 1.5
+
+
+def find_blobs(fg_mask, min_area, min_aspect):
+    """전경 마스크의 사람 비율 blob 전체 -> (N, 5) [x, y, w, h, area]
+
+    connectedComponentsWithStats는 blob 통계를 배열 하나로 주므로 컨투어별 파이썬 루프 없이 필터링"""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(fg_mask, connectivity=8)
+    stats = stats[1:]  # 0번은 배경
+    w = stats[:, cv2.CC_STAT_WIDTH]
+    h = stats[:, cv2.CC_STAT_HEIGHT]
+    area = stats[:, cv2.CC_STAT_AREA]
+    keep = (area > min_area) & (h > min_aspect * w)
+    return stats[keep][:, [cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP, cv2.CC_STAT_WIDTH,
+                           cv2.CC_STAT_HEIGHT, cv2.CC_STAT_AREA]].astype(np.float64)
+
+
+def iou_matrix(a, b):
+    """(T, 4) x (D, 4) bbox [x, y, w, h] -> (T, D) IoU"""
+    ax2 = a[:, 0] + a[:, 2]
+    ay2 = a[:, 1] + a[:, 3]
+    bx2 = b[:, 0] + b[:, 2]
+    by2 = b[:, 1] + b[:, 3]
+    iw = np.minimum(ax2[:, None], bx2[None]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    ih = np.minimum(ay2[:, None], by2[None]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def cost_matrix(tracks, detections):
+    """(T, D) 배정 비용 = (1 - IoU) + 트랙 크기로 정규화한 중심 거리, 허용 한계 밖은 GATE_COST"""
+    iou = iou_matrix(tracks, detections)
+    tc = tracks[:, :2] + tracks[:, 2:4] / 2
+    dc = detections[:, :2] + detections[:, 2:4] / 2
+    dist = np.hypot(tc[:, None, 0] - dc[None, :, 0], tc[:, None, 1] - dc[None, :, 1])
+    scale = np.hypot(tracks[:, 2], tracks[:, 3])[:, None]
+    norm_dist = dist / np.maximum(scale, 1.0)
+    cost = IOU_WEIGHT * (1.0 - iou) + DIST_WEIGHT * norm_dist
+    cost[(iou <= 0) & (norm_dist > MAX_DIST_RATIO)] = GATE_COST
+    return cost
+
+
+def hungarian(cost):
+    """최소 비용 배정 (행 <= 열, 최단 증가 경로 O(n^2 m)) - 열 방향 갱신은 numpy 벡터 연산
+
+    -> (행 인덱스, 열 인덱스)"""
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)    # 열 j에 배정된 행 (1부터, 0 = 없음)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[~used] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.nonzero(p[1:])[0]
+    return p[1:][cols] - 1, cols
+
+
+def assign(cost):
+    """scipy가 있으면 linear_sum_assignment, 없으면 numpy 헝가리안. 허용 한계 밖 쌍은 제외"""
+    if cost.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(cost)
+    elif cost.shape[0] <= cost.shape[1]:
+        rows, cols = hungarian(cost)
+    else:
+        cols, rows = hungarian(cost.T)
+    keep = cost[rows, cols] < GATE_COST
+    return rows[keep], cols[keep]
+
+
+class MultiBlobTracker:
+    """프레임별 blob 목록 -> 프레임 간 유지되는 트랙 ID + 환자 트랙 선택
+
+    환자 트랙 규칙:
+    1. 확정 트랙(MIN_HITS 이상)만 후보
+    2. 현재 환자 트랙이 살아 있으면 계속 유지 (옆을 걷는 치료사가 더 커져도 바꾸지 않음)
+    3. 환자 트랙을 잃으면 마지막 위치 근처(REACQUIRE_RATIO) 트랙으로 이어받음 (교차/가림 후 새 ID)
+    4. 그래도 없으면 가장 먼저 나타난 트랙 (의자에서 시작하는 환자), 같으면 면적이 큰 쪽
+    """
+
+    def __init__(self):
+        self.tracks = []
+        self.next_id = 1
+        self.frame = 0
+        self.patient_id = None
+        self.patient_bbox = None
+
+    def _predicted(self):
+        if not self.tracks:
+            return np.empty((0, 4))
+        boxes = np.array([t['bbox'] for t in self.tracks])
+        velocity = np.array([t['velocity'] for t in self.tracks])
+        boxes[:, :2] += velocity * (1 + np.array([t['misses'] for t in self.tracks]))[:, None]
+        return boxes
+
+    def update(self, blobs):
+        """blobs: (N, 5) [x, y, w, h, area] -> 이번 프레임 환자 트랙 (없으면 None)"""
+        self.frame += 1
+        blobs = np.asarray(blobs, dtype=np.float64).reshape(-1, 5)
+        rows, cols = assign(cost_matrix(self._predicted(), blobs[:, :4])) if self.tracks and len(blobs) else \
+            (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+        matched = set(cols.tolist())
+        seen = set(rows.tolist())
+        for r, c in zip(rows, cols):
+            track = self.tracks[r]
+            bbox = blobs[c, :4]
+            step = (bbox[:2] - track['bbox'][:2]) / (1 + track['misses'])
+            track['velocity'] = VELOCITY_SMOOTHING * track['velocity'] + (1 - VELOCITY_SMOOTHING) * step
+            track['bbox'] = bbox
+            track['area'] = float(blobs[c, 4])
+            track['hits'] += 1
+            track['misses'] = 0
+        for i, track in enumerate(self.tracks):
+            if i not in seen:
+                track['misses'] += 1
+        self.tracks = [t for t in self.tracks if t['misses'] <= MAX_MISSES]
+
+        for c in range(len(blobs)):
+            if c not in matched:
+                self.tracks.append({'id': self.next_id, 'bbox': blobs[c, :4], 'area': float(blobs[c, 4]),
+                                    'velocity': np.zeros(2), 'hits': 1, 'misses': 0, 'first_frame': self.frame})
+                self.next_id += 1
+
+        return self._select_patient()
+
+    def _select_patient(self):
+        confirmed = [t for t in self.tracks if t['hits'] >= MIN_HITS]
+        current = next((t for t in confirmed if t['id'] == self.patient_id), None)
+        if current is None and confirmed and self.patient_bbox is not None:
+            x, y, w, h = self.patient_bbox
+            centers = np.array([t['bbox'][:2] + t['bbox'][2:4] / 2 for t in confirmed])
+            dist = np.hypot(centers[:, 0] - (x + w / 2), centers[:, 1] - (y + h / 2))
+            nearest = int(np.argmin(dist))
+            if dist[nearest] <= REACQUIRE_RATIO * w:
+                current = confirmed[nearest]
+        if current is None and confirmed:
+            current = min(confirmed, key=lambda t: (t['first_frame'], -t['area']))
+        if current is None:
+            return None
+        self.patient_id = current['id']
+        if current['misses'] == 0:
+            self.patient_bbox = current['bbox']
+            return current
+        return None
+
+
+class MultiBlobEngine:
+    """MOG2 배경 제거 + 모든 사람 비율 blob 추적 (motion_detect_v3 엔진 'multi')"""
+
+    def __init__(self, history=200, var_threshold=25, min_area=3000, min_aspect=0.5):
+        self.back_sub = cv2.createBackgroundSubtractorMOG2(history=history, varThreshold=var_threshold,
+                                                           detectShadows=False)
+        self.kernel = np.ones((7, 7), np.uint8)
+        self.min_area = min_area
+        self.min_aspect = min_aspect
+        self.tracker = MultiBlobTracker()
+        self.capture = False
+        self.debug = None
+
+    def apply(self, frame):
+        fg_mask = self.back_sub.apply(frame)
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, self.kernel)
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, self.kernel)
+        fg_mask = cv2.dilate(fg_mask, self.kernel, iterations=2)
+
+        blobs = find_blobs(fg_mask, self.min_area, self.min_aspect)
+        patient = self.tracker.update(blobs)
+        if self.capture:
+            chosen = tuple(patient['bbox']) if patient is not None else None
+            self.debug = {'mask': fg_mask, 'cutoffs': (self.min_area, self.min_aspect), 'candidates': [
+                (*b[:4], b[4], 'chosen' if tuple(b[:4]) == chosen else 'ok') for b in blobs]}
+        if patient is None:
+            return {'detected': False, 'x': None, 'area': 0, 'bbox': None,
+                    'track_id': None, 'blobs': len(blobs)}
+        x, y, w, h = (int(v) for v in patient['bbox'])
+        return {'detected': True, 'x': x + w // 2, 'area': patient['area'], 'bbox': (x, y, w, h),
+                'track_id': patient['id'], 'blobs': len(blobs)}
+
+
+# ============================================================
+# 벤치마크
+# ============================================================
+
+def synthetic_walkers(n_blobs, frames=300, size=(1280, 720), seed=0):
+    """복도를 걷는 n명의 bbox 목록 (프레임별 (N, 5)) + 실제 사람 번호"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    w = rng.uniform(50, 110, n_blobs)
+    h = w * rng.uniform(2.0, 3.0, n_blobs)
+    pos = np.column_stack([rng.uniform(0, width - w), rng.uniform(0, height - h)])
+    vel = rng.uniform(-6, 6, (n_blobs, 2))
+    sequence = []
+    for _ in range(frames):
+        pos += vel
+        bounce = (pos[:, 0] < 0) | (pos[:, 0] > width - w)
+        vel[bounce, 0] *= -1
+        bounce = (pos[:, 1] < 0) | (pos[:, 1] > height - h)
+        vel[bounce, 1] *= -1
+        noise = rng.normal(0, 1.5, (n_blobs, 2))
+        boxes = np.column_stack([pos + noise, w, h, w * h * 0.7])
+        order = rng.permutation(n_blobs)  # 검출 순서는 매 프레임 섞임
+        sequence.append((boxes[order], order))
+    return sequence
+
+
+def corridor_scene(frames=240, fps=30):
+    """환자(왼->오 보행) + 바로 옆에서 더 크게 보이는 치료사(뒤늦게 등장) + 반대로 가로지르는 사람"""
+    sequence = []
+    for f in range(frames):
+        t = f / fps
+        boxes = [[100 + 120 * t, 300, 80, 220, 80 * 220 * 0.7]]  # 환자
+        if f >= 30:
+            boxes.append([60 + 120 * t, 280, 100, 260, 100 * 260 * 0.7])  # 치료사 (살짝 뒤, 더 큼)
+        if 90 <= f < 150:
+            boxes.append([1200 - 400 * (t - 3), 250, 110, 300, 110 * 300 * 0.7])  # 지나가는 사람
+        sequence.append(np.array(boxes))
+    return sequence
+
+
+def benchmark(blob_counts=(1, 5, 20), frames=300):
+    """blob 수별 프레임당 추적 시간 + ID 유지, 복도 장면에서 최대 blob 방식과 x 튐 비교"""
+    solver = 'scipy' if linear_sum_assignment is not None else 'numpy 헝가리안'
+    print(f"\n{'='*60}")
+    print(f"다중 blob 추적 벤치마크 ({frames}프레임, 배정: {solver})")
+    print(f"{'='*60}")
+
+    for n in blob_counts:
+        sequence = synthetic_walkers(n, frames)
+        tracker = MultiBlobTracker()
+        owner = {}
+        switches = 0
+        started = time.perf_counter()
+        for boxes, people in sequence:
+            tracker.update(boxes)
+            # 실제 사람 -> 트랙 ID가 바뀐 횟수 (bbox가 그대로 보존되므로 bbox로 매칭)
+            for track in tracker.tracks:
+                if track['misses'] == 0:
+                    hit = np.nonzero((boxes[:, :4] == track['bbox']).all(axis=1))[0]
+                    if len(hit):
+                        person = int(people[hit[0]])
+                        if owner.get(person, track['id']) != track['id']:
+                            switches += 1
+                        owner[person] = track['id']
+        elapsed = time.perf_counter() - started
+        print(f"  blob {n:>2}개: {elapsed / frames * 1000:6.3f} ms/프레임 ({frames / elapsed:7.0f} fps), "
+              f"ID 교체 {switches}회")
+
+    sequence = corridor_scene()
+    tracker = MultiBlobTracker()
+    tracked_x, largest_x = [], []
+    for boxes in sequence:
+        patient = tracker.update(boxes)
+        largest = boxes[np.argmax(boxes[:, 4])]
+        largest_x.append(largest[0] + largest[2] / 2)
+        tracked_x.append(patient['bbox'][0] + patient['bbox'][2] / 2 if patient is not None else np.nan)
+    truth = np.array([b[0, 0] + b[0, 2] / 2 for b in sequence])
+    largest_err = np.abs(np.array(largest_x) - truth)
+    tracked_err = np.abs(np.array(tracked_x) - truth)
+    print(f"  복도 장면 (환자 + 치료사 + 교차):")
+    print(f"    최대 blob   - 환자가 아닌 프레임 {int((largest_err > 5).sum())}/{len(truth)}, "
+          f"최대 오차 {largest_err.max():.0f}px")
+    print(f"    다중 추적   - 환자가 아닌 프레임 {int((np.nan_to_num(tracked_err, nan=1e9) > 5).sum())}"
+          f"/{len(truth)} (확정 전 {int(np.isnan(tracked_err).sum())}프레임 포함), "
+          f"최대 오차 {np.nanmax(tracked_err):.0f}px")
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import glob
+import html
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from video_index import get_index, video_meta, frame_time, FrameSeeker
+
+# 검증용 컨택트 시트: 영상당 축소 + 라벨 붙인 이미지 한 장 (프레임마다 원본 해상도 JPEG 대신)
+THUMB_WIDTH = 320
+SHEET_COLUMNS = 4
+JPEG_QUALITY = 80
+# JPEG 인코딩 스레드 수 (cv2.imencode는 GIL을 풀어서 스레드로 병렬 처리됨)
+ENCODE_THREADS = 4
+
+LABEL_HEIGHT = 22
+TITLE_HEIGHT = 30
+LABEL_COLORS = {
+    'START': (0, 255, 0),
+    'FINISH': (0, 0, 255),
+}
+DEFAULT_LABEL_COLOR = (255, 255, 255)
+
+
+def verification_frames(start, finish, total_frames):
+    """START/FINISH 전후 검증 프레임 [(프레임, 라벨)] (verify_results/verify_final 기준)"""
+    last = total_frames - 1
+    frames = [
+        (start - 10, 'START-10'), (start, 'START'), (start + 10, 'START+10'), (start + 30, 'START+30'),
+        ((start + finish) // 2, 'MID'),
+        (finish - 10, 'FINISH-10'), (finish, 'FINISH'), (finish + 10, 'FINISH+10'), (finish + 30, 'FINISH+30'),
+    ]
+    return [(min(max(f, 0), last), label) for f, label in frames]
+
+
+def spread_frames(total_frames, ratios=(0.0, 0.1, 0.25, 0.5, 0.75, 1.0)):
+    """영상 전체에 고르게 퍼진 프레임 [(프레임, 라벨)] (analyze_video 주요 프레임)"""
+    last = total_frames - 1
+    return [(min(int(total_frames * r), last), f"{int(r * 100)}%") for r in ratios]
+
+
+def read_thumbnails(video_path, frames, thumb_width=THUMB_WIDTH):
+    """요청 프레임을 번호 순서대로 한 번의 순차 디코딩으로 읽어 바로 축소 -> 요청 순서의 라벨 붙인 썸네일"""
+    cap = cv2.VideoCapture(video_path)
+    meta = video_meta(video_path)
+    index = meta['index']
+    seeker = FrameSeeker(cap, index)
+
+    # 같은 프레임은 한 번만 디코딩, 원본 해상도 이미지는 축소 후 바로 버림
+    small = {}
+    for frame_idx in sorted({f for f, _ in frames}):
+        ret, image = seeker.read(frame_idx)
+        if not ret:
+            break
+        height = int(round(image.shape[0] * thumb_width / image.shape[1]))
+        small[frame_idx] = cv2.resize(image, (thumb_width, height), interpolation=cv2.INTER_AREA)
+    cap.release()
+    return [label_thumbnail(small[f], label, f, frame_time(index, f, meta['fps'])) for f, label in frames if f in small]
+
+
+def label_thumbnail(thumb, label, frame_idx, seconds):
+    """썸네일 아래 라벨 줄: 라벨 / 프레임 번호 / 시간"""
+    tag = label.split('-')[0].split('+')[0]
+    color = LABEL_COLORS.get(tag, DEFAULT_LABEL_COLOR)
+    bar = np.zeros((LABEL_HEIGHT, thumb.shape[1], 3), dtype=np.uint8)
+    cv2.putText(bar, f"{label}  f{frame_idx}  {seconds:.2f}s", (6, LABEL_HEIGHT - 7),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+    return np.vstack([thumb, bar])
+
+
+def build_sheet(thumbs, title, columns=SHEET_COLUMNS):
+    """썸네일 격자 + 제목 줄 한 장"""
+    cell_h = max(t.shape[0] for t in thumbs)
+    cell_w = max(t.shape[1] for t in thumbs)
+    rows = -(-len(thumbs) // columns)
+    columns = min(columns, len(thumbs))
+    sheet = np.full((TITLE_HEIGHT + rows * cell_h, columns * cell_w, 3), 32, dtype=np.uint8)
+    cv2.putText(sheet, title, (8, TITLE_HEIGHT - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.55,
+                (255, 255, 255), 1, cv2.LINE_AA)
+    for i, thumb in enumerate(thumbs):
+        y = TITLE_HEIGHT + (i // columns) * cell_h
+        x = (i % columns) * cell_w
+        sheet[y:y + thumb.shape[0], x:x + thumb.shape[1]] = thumb
+    return sheet
+
+
+def encode_jpeg(image, path, quality=JPEG_QUALITY):
+    """JPEG 인코딩 + 저장 (스레드에서 실행) -> (경로, 바이트 수)"""
+    ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError(f"JPEG 인코딩 실패: {path}")
+    with open(path, 'wb') as f:
+        f.write(data.tobytes())
+    return path, len(data)
+
+
+def make_contact_sheets(jobs, output_dir, threads=ENCODE_THREADS, index_page=True):
+    """jobs: [{'video': 경로, 'frames': [(프레임, 라벨)], 'title': 선택, 'name': 파일 이름 선택}] -> 시트 정보 목록
+
+    디코딩은 영상마다 순차로, 인코딩은 스레드 풀로 넘겨 다음 영상 디코딩과 겹침"""
+    os.makedirs(output_dir, exist_ok=True)
+    sheets = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for job in jobs:
+            thumbs = read_thumbnails(job['video'], job['frames'])
+            if not thumbs:
+                print(f"  프레임을 읽지 못함: {os.path.basename(job['video'])}")
+                continue
+            base = job.get('name') or os.path.splitext(os.path.basename(job['video']))[0]
+            title = job.get('title') or base
+            path = os.path.join(output_dir, f"{base}_sheet.jpg")
+            futures.append(executor.submit(encode_jpeg, build_sheet(thumbs, title), path))
+            sheets.append({'video': job['video'], 'title': title, 'path': path, 'frames': len(thumbs)})
+
+        for sheet, future in zip(sheets, futures):
+            sheet['path'], sheet['bytes'] = future.result()
+            print(f"  시트 저장: {os.path.basename(sheet['path'])} ({sheet['frames']}프레임, {sheet['bytes'] / 1024:.0f}KB)")
+
+    if index_page and sheets:
+        write_index_page(sheets, output_dir)
+    return sheets
+
+
+def write_index_page(sheets, output_dir, title="TUG 검증 시트"):
+    """배치 전체 시트를 한 페이지에서 훑어보기 (index.html)"""
+    items = "\n".join(
+        f'<figure><a href="{html.escape(os.path.basename(s["path"]))}">'
+        f'<img loading="lazy" src="{html.escape(os.path.basename(s["path"]))}"></a>'
+        f'<figcaption>{html.escape(s["title"])}</figcaption></figure>'
+        for s in sheets
+    )
+    page = f"""<!DOCTYPE html>
+<html lang="ko"><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ background: #202020; color: #eee; font-family: sans-serif; }}
+figure {{ display: inline-block; margin: 8px; width: 640px; vertical-align: top; }}
+img {{ width: 100%; }}
+</style></head>
+<body><h1>{html.escape(title)} ({len(sheets)}개)</h1>
+{items}
+</body></html>
+"""
+    path = os.path.join(output_dir, "index.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    print(f"  인덱스 페이지: {path}")
+    return path
+
+
+def benchmark(video_path, copies=20, threads=ENCODE_THREADS):
+    """프레임별 원본 JPEG vs 컨택트 시트 (순차 / 스레드 인코딩) 시간과 디스크 사용량"""
+    work_dir = tempfile.mkdtemp(prefix='tug_sheets_')
+    total = video_meta(video_path)['total_frames']
+    frames = verification_frames(total // 4, total * 3 // 4, total)
+    jobs = [{'video': video_path, 'frames': frames, 'name': f"copy{i}"} for i in range(copies)]
+
+    print(f"\n{'='*60}")
+    print(f"검증 이미지 벤치마크: {os.path.basename(video_path)} x {copies}, 영상당 {len(frames)}프레임")
+    print(f"{'='*60}")
+
+    # 기존 방식: 프레임마다 원본 해상도 JPEG
+    per_frame_dir = os.path.join(work_dir, 'frames')
+    os.makedirs(per_frame_dir)
+    started = time.perf_counter()
+    size = 0
+    for i, job in enumerate(jobs):
+        cap = cv2.VideoCapture(video_path)
+        seeker = FrameSeeker(cap, get_index(video_path))
+        for f, _ in frames:
+            ret, image = seeker.read(f)
+            if ret:
+                path = os.path.join(per_frame_dir, f"{i}_frame_{f:04d}.jpg")
+                cv2.imwrite(path, image)
+                size += os.path.getsize(path)
+        cap.release()
+    print(f"  프레임별 JPEG:      {time.perf_counter() - started:6.2f}초, {size / 1e6:7.2f}MB, "
+          f"파일 {copies * len(frames)}개")
+
+    for n in (1, threads):
+        started = time.perf_counter()
+        sheets = make_contact_sheets(jobs, os.path.join(work_dir, f'sheets_{n}'), threads=n, index_page=False)
+        size = sum(s['bytes'] for s in sheets)
+        print(f"  시트 (스레드 {n}개):  {time.perf_counter() - started:6.2f}초, {size / 1e6:7.2f}MB, 파일 {len(sheets)}개")
+    shutil.rmtree(work_dir)
+
+
+def main():
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+
+    output_dir = "/Users/aisoft/Documents/TUG/analysis/sheets"
+    jobs = [{'video': p, 'frames': spread_frames(video_meta(p)['total_frames'])} for p in video_files]
+    make_contact_sheets(jobs, output_dir)
+    benchmark(video_files[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+import queue
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+from video_writer import open_video_writer
+
+# 감지 디버그 영상: 감지 루프가 이미 만든 전경 마스크/후보 컨투어 판정을 그대로 받아서
+# 저해상도 좌우 분할 영상(원본+판정 | 마스크)으로 백그라운드 스레드에서 저장 (두 번째 디코딩 없음)
+DEBUG_WIDTH = 320          # 한쪽 패널 폭
+DEBUG_STEP = 3             # N 프레임마다 한 장 (30fps -> 10fps)
+DEBUG_QUEUE_SIZE = 32      # 쓰기 스레드가 밀리면 감지 루프를 막지 않고 프레임을 버림
+# 디버그 출력 비용(감지 루프 쪽 축소 + 쓰기 스레드 CPU)이 감지 경과 시간의 이 비율을 넘으면 프레임을 건너뜀
+DEBUG_BUDGET = 0.10
+# close()에서 쓰기 스레드를 기다리는 최대 시간 (초)
+CLOSE_TIMEOUT = 30
+INFO_HEIGHT = 20
+# 면적 미달 후보 중 이보다 작은 것은 표시 안 함 (노이즈 점 수백 개)
+MIN_DRAW_AREA = 300
+
+# 판정 -> 색 (BGR)
+VERDICT_COLORS = {
+    'chosen': (0, 255, 0),
+    'ok': (0, 160, 0),          # 통과했지만 더 큰 후보가 있음
+    'aspect': (0, 200, 255),    # 사람 비율 아님
+    'area': (128, 128, 128),    # 최소 면적 미달
+}
+
+
+def sampled(filename, rate):
+    """운영 중 일부 영상만 디버그 출력 (파일 이름 해시 기준 - 재처리해도 같은 영상이 선택됨)"""
+    if rate <= 0:
+        return False
+    return zlib.crc32(filename.encode('utf-8')) % 10000 < rate * 10000
+
+
+class DebugRecorder:
+    """scan_timeline에서 DEBUG_STEP 프레임마다 받은 (프레임, 마스크, 후보 판정)을 축소해 큐에 넣고
+    쓰기 스레드가 그리기 + 인코딩. 감지 루프 쪽 비용은 축소 두 번 + 큐 삽입뿐"""
+
+    def __init__(self, output_path, fps, step=DEBUG_STEP, width=DEBUG_WIDTH, budget=DEBUG_BUDGET):
+        self.output_path = output_path
+        self.step = step
+        self.width = width
+        self.budget = budget
+        self.fps = fps / step
+        self.queue = queue.Queue(maxsize=DEBUG_QUEUE_SIZE)
+        self.dropped = 0
+        self.skipped = 0
+        self.written = 0
+        self.error = None
+        self.started = time.perf_counter()
+        self.spent_loop = 0.0
+        self.spent_writer = 0.0
+        # 판정별 개수 (사람 미감지 원인 요약용)
+        self.verdicts = {verdict: 0 for verdict in VERDICT_COLORS}
+        self.frames_detected = 0
+        self.frames_seen = 0
+        # 받은 프레임별 후보 [x, y, w, h, 면적] - 자동 임계값이 정해진 뒤 요약을 다시 판정 (relabel)
+        self.captured = []
+        self.thresholds = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def wants(self, frame_idx):
+        if frame_idx % self.step:
+            return False
+        # 예산 초과면 이번 프레임은 건너뜀 (해상도/영상 길이와 상관없이 추가 비용 상한 유지)
+        if self.spent_loop + self.spent_writer > self.budget * (time.perf_counter() - self.started):
+            self.skipped += 1
+            return False
+        return True
+
+    def add(self, frame_idx, frame, record, debug):
+        """감지 루프에서 호출 - debug: 엔진의 {'mask', 'candidates'} (없으면 None)"""
+        started = time.perf_counter()
+        self.frames_seen += 1
+        self.frames_detected += bool(record['detected'])
+        candidates = debug['candidates'] if debug else []
+        for c in candidates:
+            self.verdicts[c[5]] += 1
+        self.captured.append(np.array([c[:5] for c in candidates], dtype=np.float32).reshape(-1, 5))
+        cutoffs = debug.get('cutoffs') if debug else None
+
+        scale = self.width / frame.shape[1]
+        size = (self.width, int(round(frame.shape[0] * scale)))
+        # 저해상도 확인용이라 INTER_AREA 대신 5배 빠른 INTER_LINEAR (감지 루프 쪽 비용)
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        mask = cv2.resize(debug['mask'], size, interpolation=cv2.INTER_NEAREST) if debug else None
+        try:
+            self.queue.put_nowait((frame_idx, small, mask, scale, candidates, record, cutoffs))
+        except queue.Full:
+            self.dropped += 1
+        self.spent_loop += time.perf_counter() - started
+
+    def _run(self):
+        writer = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # 실패 후에도 큐는 계속 비움 (감지 루프/close가 막히지 않게)
+            try:
+                if writer is None:
+                    # 한 번만 드는 준비 비용(생성 + 첫 프레임)은 예산에서 제외 (짧은 영상이 앞부분만 남지 않게)
+                    height = int(round(item[1].shape[0])) + INFO_HEIGHT
+                    writer = open_video_writer(self.output_path, self.fps, (item[1].shape[1] * 2, height))
+                started = time.thread_time()
+                panel = render_panel(*item)
+                writer.write(panel)
+                if self.written:  # 첫 프레임은 인코더/폰트 초기화 비용 (수십 ms)
+                    self.spent_writer += time.thread_time() - started
+                self.written += 1
+            except Exception as e:
+                # 디버그 출력 실패는 분석 결과에 영향 없음 - 기록만 하고 이후 프레임은 버림
+                self.error = f"{type(e).__name__}: {e}"
+        if writer is not None:
+            try:
+                writer.release()
+            except Exception as e:
+                self.error = self.error or f"{type(e).__name__}: {e}"
+
+    def relabel(self, thresholds):
+        """판정 요약(후보 판정 개수/감지 비율)을 실제 결정에 쓴 임계값으로 다시 계산
+
+        자동 임계값은 감지가 끝나야 정해지므로 영상 속 상자 색은 감지 중 판정(엔진 고정 임계값) 그대로 -
+        패널 정보 줄에 그 기준을 표시하고, 요약/describe는 이 임계값 기준"""
+        self.thresholds = thresholds
+        if thresholds.get('method') == 'fixed':
+            return  # 엔진 판정이 곧 최종 판정
+        verdicts = {verdict: 0 for verdict in VERDICT_COLORS}
+        detected = 0
+        for boxes in self.captured:
+            w, h, area = boxes[:, 2], boxes[:, 3], boxes[:, 4]
+            big = area > thresholds['min_area']
+            ok = big & (h > thresholds['min_aspect'] * w)
+            verdicts['area'] += int((~big).sum())
+            verdicts['aspect'] += int((big & ~ok).sum())
+            if ok.any():
+                detected += 1
+                verdicts['chosen'] += 1
+                verdicts['ok'] += int(ok.sum()) - 1
+        self.verdicts = verdicts
+        self.frames_detected = detected
+
+    def close(self):
+        """남은 프레임 저장까지 대기 -> 판정 요약 dict"""
+        if self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=CLOSE_TIMEOUT)
+            except queue.Full:
+                self.error = self.error or "쓰기 스레드 응답 없음"
+            self.thread.join(CLOSE_TIMEOUT)
+        return {
+            'path': self.output_path if self.written and self.error is None else None,
+            'frames': self.written,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'overhead': round((self.spent_loop + self.spent_writer) / max(time.perf_counter() - self.started, 1e-9), 3),
+            'detected_ratio': round(self.frames_detected / max(self.frames_seen, 1), 3),
+            'verdicts': dict(self.verdicts),
+            'thresholds': self.thresholds,
+            'error': self.error,
+        }
+
+
+def render_panel(frame_idx, small, mask, scale, candidates, record, cutoffs=None):
+    """[원본 + 후보 bbox/판정 | 전경 마스크] + 아래 정보 줄 (cutoffs: 판정에 쓴 (면적, 비율) 기준)"""
+    left = small.copy()
+    for x, y, w, h, area, verdict in candidates:
+        if verdict == 'area' and area < MIN_DRAW_AREA:
+            continue
+        p1 = (int(x * scale), int(y * scale))
+        p2 = (int((x + w) * scale), int((y + h) * scale))
+        cv2.rectangle(left, p1, p2, VERDICT_COLORS[verdict], 2 if verdict == 'chosen' else 1)
+        if verdict != 'area':
+            cv2.putText(left, f"{int(area)} {h / w if w else 0:.1f}", (p1[0], max(p1[1] - 3, 10)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.35, VERDICT_COLORS[verdict], 1, cv2.LINE_AA)
+    if record['detected'] and record['x'] is not None:
+        x = int(record['x'] * scale)
+        cv2.line(left, (x, 0), (x, left.shape[0]), VERDICT_COLORS['chosen'], 1)
+
+    right = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR) if mask is not None else np.zeros_like(small)
+    info = np.zeros((INFO_HEIGHT, left.shape[1] * 2, 3), dtype=np.uint8)
+    text = (f"f{frame_idx}  {'DETECTED' if record['detected'] else 'none'}  "
+            f"area={int(record['area'])}  candidates={sum(c[5] != 'area' for c in candidates)}")
+    if cutoffs is not None:
+        text += f"  (area>{cutoffs[0]:.0f} aspect>{cutoffs[1]:.2f})"
+    cv2.putText(info, text, (6, INFO_HEIGHT - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.4,
+                (0, 255, 0) if record['detected'] else (0, 0, 255), 1, cv2.LINE_AA)
+    return np.vstack([np.hstack([left, right]), info])
+
+
+def describe(summary):
+    """사람 미감지 원인 한 줄 요약"""
+    v = summary['verdicts']
+    error = f" - 저장 실패: {summary['error']}" if summary.get('error') else ""
+    t = summary.get('thresholds')
+    if t is not None:
+        error = (f", 임계값 면적 > {t['min_area']:.0f} / 비율 > {t['min_aspect']:.2f} "
+                 f"({'자동 - 영상 속 상자는 고정 임계값 판정' if t['method'] != 'fixed' else '고정'})") + error
+    return (f"디버그 영상 {summary['frames']}프레임 (버림 {summary['dropped']}, 예산 초과 {summary['skipped']}, "
+            f"비용 {summary['overhead']:.0%}), 감지 비율 {summary['detected_ratio']:.0%}, "
+            f"후보 판정 - 통과 {v['chosen'] + v['ok']}, 비율 미달 {v['aspect']}, 면적 미달 {v['area']}{error}")
+
+
+def benchmark(video_path, output_dir):
+    """디버그 출력 켜고/끄고 감지 시간 비교 (목표: 추가 비용 10% 미만)"""
+    import time
+    from motion_detect_v3 import scan_timeline, video_meta
+
+    meta = video_meta(video_path)
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"\n{'='*60}")
+    print(f"디버그 렌더 벤치마크: {os.path.basename(video_path)} ({meta['width']}x{meta['height']}, "
+          f"{meta['total_frames']}프레임)")
+    print(f"{'='*60}")
+
+    timings = {}
+    for label, step in (('끔', None), ('3프레임마다', 3), ('모든 프레임', 1)):
+        # '모든 프레임'도 예산(DEBUG_BUDGET)이 상한
+        best = None
+        for _ in range(3):
+            recorder = None
+            if step:
+                path = os.path.join(output_dir, f"debug_step{step}.mp4")
+                recorder = DebugRecorder(path, meta['fps'], step=step)
+            started = time.perf_counter()
+            scan_timeline(video_path, debug=recorder)
+            summary = recorder.close() if recorder else None
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings[label] = best
+        extra = f" (+{(best / timings['끔'] - 1) * 100:.1f}%)" if step else ""
+        print(f"  {label:<8} {best:6.2f}초{extra}" + (f" - {describe(summary)}" if summary else ""))
+
+
+def main():
+    import glob
+
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+    benchmark(video_files[0], "/Users/aisoft/Documents/TUG/analysis/debug")
+
+
+if __name__ == "__main__":
+    main()
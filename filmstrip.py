@@ -0,0 +1,296 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from contact_sheet import encode_jpeg, ENCODE_THREADS
+from video_index import get_index, frame_times
+
+# 리뷰 UI용 썸네일 피라미드 + 스프라이트 시트: 분석 디코딩 중에 같이 만들어서
+# 스크럽할 때 코덱 작업 없이 (스프라이트 이미지 한 장 + 좌표) 바로 표시
+# 레벨마다 폭/프레임 간격 - 큰 레벨은 듬성듬성, 스크럽 레벨은 모든 프레임
+PYRAMID_LEVELS = (
+    {'width': 320, 'stride': 5},   # 확대 미리보기
+    {'width': 160, 'stride': 1},   # 스크럽 (모든 프레임)
+    {'width': 80, 'stride': 10},   # 타임라인 필름스트립
+)
+SPRITE_COLUMNS = 10
+SPRITE_ROWS = 10
+SPRITE_QUALITY = 75
+
+TIMELINE_WIDTH = 1280
+CURVE_HEIGHT = 48
+FILMSTRIP_SUFFIX = '.filmstrip'
+INDEX_FILENAME = 'index.json'
+
+
+def tile_for(index, frame, level=1):
+    """프레임 -> (스프라이트 파일, x, y, 폭, 높이) - 레벨 간격에 맞춰 직전 타일 사용
+
+    웹 UI도 같은 규칙: tile = frame // stride, sprite = tile // (columns * rows), 나머지로 행/열"""
+    spec = index['levels'][level]
+    tile = min(frame, index['frames'] - 1) // spec['stride']
+    per_sprite = spec['columns'] * spec['rows']
+    sprite, pos = divmod(tile, per_sprite)
+    row, col = divmod(pos, spec['columns'])
+    return (spec['sprites'][sprite], col * spec['tile_width'], row * spec['tile_height'],
+            spec['tile_width'], spec['tile_height'])
+
+
+class FilmstripBuilder:
+    """scan_timeline의 on_frame 콜백으로 프레임을 받아 레벨별 스프라이트 시트를 채움
+
+    시트가 다 차면 바로 인코딩 스레드로 넘기고 버림 (긴 영상도 레벨당 시트 한 장만 메모리에)"""
+
+    def __init__(self, output_base, width, height, total_frames=None, threads=ENCODE_THREADS):
+        self.output_dir = output_base + FILMSTRIP_SUFFIX
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=threads)
+        self.futures = []
+        self.frames = 0
+        self.levels = []
+        for i, level in enumerate(PYRAMID_LEVELS):
+            tile_height = int(round(height * level['width'] / width))
+            self.levels.append({
+                'level': i,
+                'width': level['width'],
+                'stride': level['stride'],
+                'tile_width': level['width'],
+                'tile_height': tile_height,
+                'columns': SPRITE_COLUMNS,
+                'rows': SPRITE_ROWS,
+                'sprites': [],
+                'sheet': None,
+                'tiles': 0,
+            })
+        # 타임라인 줄용: 가장 작은 레벨 타일 중 render_timeline이 고를 것만 보관 {타일 번호: 타일}
+        # (프레임 수를 알면 줄 폭만큼만, 모르면 전부)
+        self.strip = {}
+        self.strip_tiles = 0
+        self.strip_picks = None
+        if total_frames:
+            last = self.levels[-1]
+            count = -(-total_frames // last['stride'])
+            self.strip_picks = set(timeline_picks(count, TIMELINE_WIDTH // last['tile_width']).tolist())
+
+    def add(self, frame_idx, frame):
+        if frame_idx % min(level['stride'] for level in self.levels):
+            self.frames = frame_idx + 1
+            return
+        # 큰 레벨부터 이전 결과를 다시 축소 (원본 해상도 축소는 한 번만)
+        source = frame
+        for level in self.levels:
+            if frame_idx % level['stride']:
+                continue
+            source = cv2.resize(source, (level['tile_width'], level['tile_height']), interpolation=cv2.INTER_AREA)
+            self._place(level, source)
+            if level is self.levels[-1]:
+                if self.strip_picks is None or self.strip_tiles in self.strip_picks:
+                    self.strip[self.strip_tiles] = source
+                self.strip_tiles += 1
+        self.frames = frame_idx + 1
+
+    def _place(self, level, tile):
+        per_sprite = level['columns'] * level['rows']
+        pos = level['tiles'] % per_sprite
+        if pos == 0:
+            level['sheet'] = np.zeros((level['rows'] * level['tile_height'],
+                                       level['columns'] * level['tile_width'], 3), dtype=np.uint8)
+        row, col = divmod(pos, level['columns'])
+        y, x = row * level['tile_height'], col * level['tile_width']
+        level['sheet'][y:y + level['tile_height'], x:x + level['tile_width']] = tile
+        level['tiles'] += 1
+        if pos == per_sprite - 1:
+            self._flush(level)
+
+    def _flush(self, level):
+        if level['sheet'] is None:
+            return
+        # 마지막 시트는 채워진 행까지만
+        used_rows = -(-(((level['tiles'] - 1) % (level['columns'] * level['rows'])) + 1) // level['columns'])
+        sheet = level['sheet'][:used_rows * level['tile_height']]
+        name = f"L{level['level']}_{len(level['sprites']):04d}.jpg"
+        level['sprites'].append(name)
+        self.futures.append(self.executor.submit(encode_jpeg, sheet, os.path.join(self.output_dir, name),
+                                                 SPRITE_QUALITY))
+        level['sheet'] = None
+
+    def finish(self, timeline, source, times=None, settings=None):
+        """남은 시트 저장 + 움직임 곡선 타임라인 + index.json -> index 경로"""
+        for level in self.levels:
+            if level['tiles'] % (level['columns'] * level['rows']):
+                self._flush(level)
+
+        # 프레임별 움직임 면적 (감지 안 된 프레임은 0) - 웹 UI가 직접 곡선을 그릴 수 있게 같이 저장
+        area = np.zeros(self.frames)
+        for d in timeline:
+            if d['frame'] < self.frames:
+                area[d['frame']] = d['area'] if d['detected'] else 0
+        timeline_name = 'timeline.jpg'
+        strip = render_timeline(self._strip_tiles(), area, settings)
+        self.futures.append(self.executor.submit(encode_jpeg, strip, os.path.join(self.output_dir, timeline_name),
+                                                 SPRITE_QUALITY))
+
+        total_bytes = sum(f.result()[1] for f in self.futures)
+        self.executor.shutdown()
+
+        index = {
+            'source': source,
+            'frames': self.frames,
+            'levels': [{k: v for k, v in level.items() if k not in ('sheet', 'tiles', 'level')}
+                       for level in self.levels],
+            'timeline': timeline_name,
+            'motion_area': [round(float(a) / max(area.max(), 1.0), 3) for a in area],
+        }
+        if times is not None:
+            index['times'] = [round(float(t), 4) for t in times]
+        if settings is not None:
+            index['start_frame'] = settings['start_frame']
+            index['finish_frame'] = settings['finish_frame']
+        index_path = os.path.join(self.output_dir, INDEX_FILENAME)
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        self.bytes = total_bytes
+        return index_path
+
+    def _strip_tiles(self):
+        """render_timeline에 넘길 타일 목록 - 실제 타일 수 기준으로 다시 골라 보관한 것 중 가장 가까운 타일"""
+        if not self.strip:
+            return []
+        kept = np.array(sorted(self.strip))
+        picks = timeline_picks(self.strip_tiles, TIMELINE_WIDTH // self.strip[kept[0]].shape[1])
+        nearest = kept[np.abs(kept[None, :] - picks[:, None]).argmin(axis=1)]
+        return [self.strip[i] for i in nearest]
+
+
+def timeline_picks(n, count):
+    """타일 n개 중 타임라인 줄에 쓸 count개 번호 (고르게)"""
+    return np.linspace(0, n - 1, max(1, count)).round().astype(int)
+
+
+def render_timeline(tiles, area, settings=None, width=TIMELINE_WIDTH):
+    """작은 썸네일 줄 + 그 위에 움직임 면적 곡선, START/FINISH 위치 표시"""
+    if not tiles:
+        return np.zeros((CURVE_HEIGHT, width, 3), dtype=np.uint8)
+    tile_h, tile_w = tiles[0].shape[:2]
+    picks = timeline_picks(len(tiles), width // tile_w)
+    strip = np.hstack([tiles[i] for i in picks])
+    strip = cv2.resize(strip, (width, tile_h), interpolation=cv2.INTER_AREA)
+
+    canvas = np.vstack([strip, np.full((CURVE_HEIGHT, width, 3), 24, dtype=np.uint8)])
+    n = len(area)
+    if n:
+        xs = np.linspace(0, width - 1, n)
+        norm = area / max(area.max(), 1.0)
+        base = tile_h + CURVE_HEIGHT - 2
+        ys = base - norm * (CURVE_HEIGHT - 6)
+        points = np.column_stack([xs, ys]).round().astype(np.int32)
+        # 썸네일 위에도 반투명하게 겹쳐서 어느 장면에서 움직임이 컸는지 바로 보이게
+        overlay = canvas.copy()
+        overlay_points = np.column_stack([xs, tile_h - norm * (tile_h - 4)]).round().astype(np.int32)
+        cv2.polylines(overlay, [overlay_points], False, (0, 255, 255), 2, cv2.LINE_AA)
+        canvas = cv2.addWeighted(overlay, 0.6, canvas, 0.4, 0)
+        cv2.polylines(canvas, [points], False, (0, 255, 255), 1, cv2.LINE_AA)
+        if settings is not None:
+            for frame, color in ((settings['start_frame'], (0, 0, 255)), (settings['finish_frame'], (255, 0, 0))):
+                x = int(round(frame / max(n - 1, 1) * (width - 1)))
+                cv2.line(canvas, (x, 0), (x, canvas.shape[0]), color, 2)
+    return canvas
+
+
+def load_filmstrip(video_path, output_dir):
+    """리뷰 도구용 index.json 로드 (없으면 None)"""
+    base = os.path.join(output_dir, os.path.splitext(os.path.basename(video_path))[0])
+    index_path = os.path.join(base + FILMSTRIP_SUFFIX, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+    index['dir'] = base + FILMSTRIP_SUFFIX
+    return index
+
+
+class FilmstripReader:
+    """스프라이트에서 썸네일 잘라내기 (스프라이트 이미지는 한 번 읽으면 캐시)"""
+
+    def __init__(self, index):
+        self.index = index
+        self.sprites = {}
+
+    def thumbnail(self, frame, level=1):
+        name, x, y, w, h = tile_for(self.index, frame, level)
+        sprite = self.sprites.get(name)
+        if sprite is None:
+            sprite = self.sprites[name] = cv2.imread(os.path.join(self.index['dir'], name))
+        return sprite[y:y + h, x:x + w]
+
+
+def build_filmstrip(video_path, output_dir):
+    """분석 없이 따로 생성할 때 (이미 분석된 영상) - 자체 디코딩 + MOG2 움직임 면적"""
+    from motion_detect_v3 import scan_timeline, video_meta
+
+    meta = video_meta(video_path)
+    base = os.path.join(output_dir, os.path.splitext(os.path.basename(video_path))[0])
+    builder = FilmstripBuilder(base, meta['width'], meta['height'], meta['total_frames'])
+    timeline = scan_timeline(video_path, total_frames=meta['total_frames'], on_frame=builder.add)
+    times = frame_times(meta['index'], list(range(builder.frames)), meta['fps'])
+    return builder.finish(timeline, os.path.basename(video_path), times)
+
+
+def benchmark(video_path, output_dir, seeks=200, seed=0):
+    """스크럽: 임의 프레임 표시 시간 - 원본 디코딩(FrameSeeker) vs 스프라이트 타일"""
+    from video_index import FrameSeeker
+    from motion_detect_v3 import scan_timeline
+
+    print(f"\n{'='*60}")
+    print(f"필름스트립 벤치마크: {os.path.basename(video_path)}")
+    print(f"{'='*60}")
+
+    started = time.perf_counter()
+    scan_timeline(video_path)
+    plain = time.perf_counter() - started
+    started = time.perf_counter()
+    index_path = build_filmstrip(video_path, output_dir)
+    with_strip = time.perf_counter() - started
+    index = load_filmstrip(video_path, output_dir)
+    size = sum(os.path.getsize(os.path.join(index['dir'], f)) for f in os.listdir(index['dir']))
+    print(f"  분석 디코딩만:        {plain:6.2f}초")
+    print(f"  + 피라미드/스프라이트: {with_strip:6.2f}초 ({size / 1e6:.2f}MB, {index_path})")
+
+    frames = np.random.default_rng(seed).integers(0, index['frames'], seeks)
+    cap = cv2.VideoCapture(video_path)
+    seeker = FrameSeeker(cap, get_index(video_path))
+    started = time.perf_counter()
+    for f in frames:
+        seeker.read(int(f))
+    decode = (time.perf_counter() - started) / seeks
+    cap.release()
+
+    reader = FilmstripReader(index)
+    started = time.perf_counter()
+    for f in frames:
+        reader.thumbnail(int(f))
+    tiles = (time.perf_counter() - started) / seeks
+    print(f"  임의 프레임 표시:     디코딩 {decode * 1000:7.2f} ms, 스프라이트 {tiles * 1000:7.3f} ms "
+          f"({decode / max(tiles, 1e-9):.0f}배)")
+
+
+def main():
+    import glob
+
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+
+    output_dir = "/Users/aisoft/Documents/TUG/final_output"
+    for video_path in video_files:
+        print(f"  필름스트립: {build_filmstrip(video_path, output_dir)}")
+    benchmark(video_files[0], output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+# 카메라별 바닥 4점 캘리브레이션 (이미지 픽셀 -> 바닥 좌표 m)
+CALIBRATION_DIR = "/Users/aisoft/Documents/TUG/calibration"
+
+# 바닥에 표시한 사각형 실제 크기 (m) - 클릭 순서: 좌상, 우상, 우하, 좌하
+DEFAULT_FLOOR_RECT = (10.0, 1.0)
+
+SMOOTH_WINDOW_SEC = 0.5
+# 10MWT: 가속/감속 구간을 뺀 2m ~ 8m 구간 시간으로 속도 계산
+TEN_METER_MARKS = (2.0, 8.0)
+
+
+def compute_homography(image_points, world_points):
+    """4점 이상 대응점으로 이미지 -> 바닥 호모그래피"""
+    image_points = np.asarray(image_points, dtype=np.float32)
+    world_points = np.asarray(world_points, dtype=np.float32)
+    if len(image_points) == 4:
+        return cv2.getPerspectiveTransform(image_points, world_points)
+    H, _ = cv2.findHomography(image_points, world_points, cv2.RANSAC)
+    return H
+
+
+def rect_world_points(length=DEFAULT_FLOOR_RECT[0], width=DEFAULT_FLOOR_RECT[1]):
+    """좌상, 우상, 우하, 좌하 순서의 바닥 사각형 좌표 (m)"""
+    return [(0.0, width), (length, width), (length, 0.0), (0.0, 0.0)]
+
+
+def save_calibration(camera_id, image_points, world_points):
+    os.makedirs(CALIBRATION_DIR, exist_ok=True)
+    H = compute_homography(image_points, world_points)
+    calibration = {
+        'camera_id': camera_id,
+        'image_points': [list(map(float, p)) for p in image_points],
+        'world_points': [list(map(float, p)) for p in world_points],
+        'homography': H.tolist(),
+    }
+    with open(os.path.join(CALIBRATION_DIR, f"{camera_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+    return calibration
+
+
+def load_calibration(camera_id):
+    """카메라 캘리브레이션 로드 (없으면 None)"""
+    path = os.path.join(CALIBRATION_DIR, f"{camera_id}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        calibration = json.load(f)
+    calibration['homography'] = np.asarray(calibration['homography'], dtype=np.float64)
+    return calibration
+
+
+def select_floor_points(video_path):
+    """첫 프레임에서 바닥 사각형 4점 클릭 (좌상, 우상, 우하, 좌하)"""
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        return None
+
+    points = []
+
+    def mouse_callback(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN and len(points) < 4:
+            points.append((x, y))
+
+    window_name = f"Floor Calibration - {os.path.basename(video_path)}"
+    cv2.namedWindow(window_name)
+    cv2.setMouseCallback(window_name, mouse_callback)
+
+    print("바닥 사각형 4점을 순서대로 클릭: 좌상, 우상, 우하, 좌하")
+    print("  R: 리셋, ENTER: 완료, ESC: 취소")
+
+    while True:
+        display = frame.copy()
+        for i, p in enumerate(points):
+            cv2.circle(display, p, 6, (0, 255, 255), -1)
+            cv2.putText(display, str(i + 1), (p[0] + 8, p[1] - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        if len(points) > 1:
+            cv2.polylines(display, [np.array(points, np.int32)], len(points) == 4, (0, 255, 255), 2)
+        cv2.imshow(window_name, display)
+
+        key = cv2.waitKey(30) & 0xFF
+        if key == ord('r'):
+            points.clear()
+        elif key == 13 and len(points) == 4:  # Enter
+            break
+        elif key == 27:  # ESC
+            points = None
+            break
+
+    cv2.destroyAllWindows()
+    return points
+
+
+def timeline_arrays(person_timeline):
+    """dict 리스트 타임라인 -> NumPy 배열 (미감지 프레임은 NaN)"""
+    n = len(person_timeline)
+    arrays = {
+        'frame': np.fromiter((d['frame'] for d in person_timeline), dtype=np.int64, count=n),
+        'detected': np.fromiter((d['detected'] for d in person_timeline), dtype=bool, count=n),
+        'area': np.fromiter((d['area'] for d in person_timeline), dtype=np.float64, count=n),
+    }
+    bbox = np.full((n, 4), np.nan)
+    for i, d in enumerate(person_timeline):
+        if d.get('bbox') is not None:
+            bbox[i] = d['bbox']
+    arrays['x'] = bbox[:, 0] + bbox[:, 2] / 2
+    arrays['bottom'] = bbox[:, 1] + bbox[:, 3]  # 발 위치
+    arrays['width'] = bbox[:, 2]
+    arrays['height'] = bbox[:, 3]
+    return arrays
+
+
+def to_floor(H, x, bottom):
+    """이미지 (x, 발 y) 배열 -> 바닥 좌표 (m), 한 번의 행렬곱"""
+    pts = np.stack([x, bottom, np.ones_like(x)], axis=1) @ H.T
+    return pts[:, :2] / pts[:, 2:3]
+
+
+def _fill_gaps(values, times):
+    """NaN 구간 선형 보간 (양 끝은 가장 가까운 값)"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    if valid.sum() < 2:
+        return values
+    return np.interp(times, times[valid], values[valid])
+
+
+def moving_average(values, window):
+    """누적합 기반 이동 평균 O(n) (가장자리는 있는 값만 평균)"""
+    window = max(1, int(window))
+    if window == 1:
+        return values.copy()
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    half = window // 2
+    idx = np.arange(len(values))
+    lo = np.clip(idx - half, 0, len(values))
+    hi = np.clip(idx + half + 1, 0, len(values))
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+
+def crossing_times(distance, times, marks):
+    """누적 이동 거리가 각 지점(m)을 처음 지나는 시각 (선형 보간, 못 지나면 None)"""
+    # 누적 최대값으로 단조 증가 보장 -> 이진 탐색
+    reached = np.maximum.accumulate(distance)
+    result = []
+    for mark in marks:
+        i = int(np.searchsorted(reached, mark))
+        if i >= len(reached):
+            result.append(None)
+        elif i == 0:
+            result.append(float(times[0]))
+        else:
+            d0, d1 = reached[i - 1], reached[i]
+            frac = (mark - d0) / (d1 - d0) if d1 > d0 else 0.0
+            result.append(float(times[i - 1] + frac * (times[i] - times[i - 1])))
+    return result
+
+
+def cadence_proxy(width, times, fps):
+    """bbox 폭 진동(다리 벌어짐/모임)으로 분당 걸음 수 추정"""
+    valid = ~np.isnan(width)
+    if valid.sum() < fps:
+        return None
+    w = _fill_gaps(width, times)
+    # 느린 변화(거리에 따른 크기 변화)를 빼고 남은 진동의 평균 교차 횟수
+    detrended = w - moving_average(w, fps)
+    signs = np.sign(detrended[valid])
+    crossings = np.count_nonzero(signs[1:] * signs[:-1] < 0)
+    duration = times[valid][-1] - times[valid][0]
+    if duration <= 0:
+        return None
+    # 한 걸음 = 폭 최대 한 번 = 교차 두 번
+    return float(crossings / 2 / duration * 60)
+
+
+def walking_metrics(person_timeline, times, H, fps, smooth_sec=SMOOTH_WINDOW_SEC):
+    """타임라인 전체를 한 번에 바닥 좌표로 변환해 속도/거리/구간 통과 시간 계산"""
+    arrays = timeline_arrays(person_timeline)
+    times = np.asarray(times, dtype=np.float64)
+    detected = arrays['detected'] & ~np.isnan(arrays['x'])
+    if detected.sum() < 2:
+        return None
+
+    world = to_floor(H, arrays['x'], arrays['bottom'])
+    world[~detected] = np.nan
+
+    window = int(round(smooth_sec * fps))
+    wx = moving_average(_fill_gaps(world[:, 0], times), window)
+    wy = moving_average(_fill_gaps(world[:, 1], times), window)
+
+    step = np.hypot(np.diff(wx), np.diff(wy))
+    distance = np.concatenate([[0.0], np.cumsum(step)])
+    speed = np.gradient(distance, times) if len(times) > 1 else np.zeros_like(distance)
+
+    first = int(np.argmax(detected))
+    last = len(detected) - 1 - int(np.argmax(detected[::-1]))
+    active = slice(first, last + 1)
+    walk_time = times[last] - times[first]
+    walk_distance = distance[last] - distance[first]
+
+    t_start, t_end = crossing_times(distance[active] - distance[first], times[active], TEN_METER_MARKS)
+    ten_meter_speed = None
+    if t_start is not None and t_end is not None and t_end > t_start:
+        ten_meter_speed = (TEN_METER_MARKS[1] - TEN_METER_MARKS[0]) / (t_end - t_start)
+
+    return {
+        'distance_m': round(float(walk_distance), 3),
+        'duration_sec': round(float(walk_time), 3),
+        'mean_speed_ms': round(float(walk_distance / walk_time), 3) if walk_time > 0 else None,
+        'peak_speed_ms': round(float(np.nanmax(speed[active])), 3),
+        'cadence_spm': cadence_proxy(arrays['width'][active], times[active], int(round(fps))),
+        'mark_times': dict(zip(map(str, TEN_METER_MARKS), (t_start, t_end))),
+        'ten_meter_speed_ms': round(ten_meter_speed, 3) if ten_meter_speed else None,
+        'ten_meter_risk': calculate_10m_risk(ten_meter_speed) if ten_meter_speed else None,
+    }
+
+
+def calculate_10m_risk(speed_ms):
+    """src/utils/riskCalculation.js calculate10MRisk와 동일한 기준"""
+    if speed_ms >= 1.0:
+        return 'low'
+    elif speed_ms >= 0.8:
+        return 'medium'
+    return 'high'
+
+
+def main():
+    import glob
+
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
+    if not video_files:
+        print("동영상 파일을 찾을 수 없습니다.")
+        return
+
+    camera_id = input("카메라 ID: ").strip() or 'default'
+    points = select_floor_points(video_files[0])
+    if points is None:
+        print("취소됨")
+        return
+
+    save_calibration(camera_id, points, rect_world_points())
+    print(f"저장: {os.path.join(CALIBRATION_DIR, camera_id + '.json')}")
+
+
+if __name__ == "__main__":
+    main()
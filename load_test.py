@@ -0,0 +1,135 @@
+import http.client
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# tug_server 부하 테스트: 합성 TUG 영상을 동시에 업로드하고 작업 지연시간 측정
+HOST = '127.0.0.1'
+PORT = 5000
+
+NUM_CLIPS = 20
+CONCURRENCY = 8
+CLIP_SECONDS = 10
+CLIP_FPS = 30
+CLIP_SIZE = (640, 360)
+UPLOAD_CHUNK_BYTES = 256 * 1024
+POLL_INTERVAL = 0.25
+
+
+def make_synthetic_clip(path, seconds=CLIP_SECONDS, fps=CLIP_FPS, size=CLIP_SIZE, seed=0):
+    """배경 위를 사람 크기 사각형이 걸어갔다 돌아오는 합성 영상. (실제 START, FINISH) 프레임 반환"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    total = seconds * fps
+    walk_start = int(total * 0.3)
+    walk_end = int(total * 0.85)
+    person_w, person_h = width // 12, int(height * 0.6)
+
+    background = np.full((height, width, 3), 110, np.uint8)
+    # 옷 무늬처럼 특징점이 잡히도록 사람 영역에 체크 무늬 (광류 엔진 평가용)
+    yy, xx = np.mgrid[0:person_h, 0:person_w]
+    checker = ((yy // 8 + xx // 8) % 2).astype(bool)
+    person = np.empty((person_h, person_w, 3), np.uint8)
+    person[checker] = (40, 60, 200)
+    person[~checker] = (20, 30, 120)
+
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(total):
+        frame = background + rng.integers(0, 4, background.shape, dtype=np.uint8)
+        if walk_start <= i < walk_end:
+            # 0 -> 1 -> 0 (갔다가 돌아오기)
+            t = (i - walk_start) / (walk_end - walk_start)
+            pos = 1 - abs(2 * t - 1)
+            x = int(width * 0.1 + (width * 0.7) * pos)
+            y = height - person_h - 10
+            frame[y:y + person_h, x:x + person_w] = person
+        out.write(frame)
+    out.release()
+    return walk_start, walk_end - 1
+
+
+def _request(method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=60)
+    try:
+        conn.request(method, path, body=body, headers=headers or {}, encode_chunked=body is not None)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+    finally:
+        conn.close()
+
+
+def _iter_file(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def run_job(clip_path):
+    """업로드 (429면 Retry-After 후 재시도) -> 완료까지 폴링. (지연시간, 429 횟수, 상태)"""
+    started = time.time()
+    rejected = 0
+    headers = {'X-Filename': os.path.basename(clip_path), 'Transfer-Encoding': 'chunked'}
+
+    while True:
+        status, body = _request('POST', '/api/tug/jobs', _iter_file(clip_path), headers)
+        if status != 429:
+            break
+        rejected += 1
+        time.sleep(min(5.0, 0.5 * rejected))
+
+    if status != 202:
+        return time.time() - started, rejected, f"http_{status}"
+
+    job_id = body['id']
+    while True:
+        time.sleep(POLL_INTERVAL)
+        status, job = _request('GET', f"/api/tug/jobs/{job_id}")
+        if job.get('status') not in ('queued', 'running'):
+            return time.time() - started, rejected, job.get('status')
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q)) if values else 0.0
+
+
+def main():
+    work_dir = tempfile.mkdtemp(prefix='tug_load_')
+    print(f"합성 영상 {NUM_CLIPS}개 생성 중... ({work_dir})")
+    clips = []
+    for i in range(NUM_CLIPS):
+        path = os.path.join(work_dir, f"synthetic_{i:03d}.mp4")
+        make_synthetic_clip(path, seed=i)
+        clips.append(path)
+
+    print(f"동시 {CONCURRENCY}개 업로드 시작")
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        results = list(pool.map(run_job, clips))
+    elapsed = time.time() - started
+
+    latencies = [r[0] for r in results]
+    rejected = sum(r[1] for r in results)
+    statuses = {}
+    for r in results:
+        statuses[r[2]] = statuses.get(r[2], 0) + 1
+
+    print(f"\n{'='*60}")
+    print("부하 테스트 결과")
+    print(f"{'='*60}")
+    print(f"  작업 수: {len(results)} (동시 {CONCURRENCY})")
+    print(f"  상태: {statuses}")
+    print(f"  429 거절: {rejected}회")
+    print(f"  총 소요: {elapsed:.2f}초, 처리량: {len(results) / elapsed:.2f} 작업/초")
+    print(f"  지연시간 p50: {percentile(latencies, 50):.2f}초, p99: {percentile(latencies, 99):.2f}초")
+
+
+if __name__ == "__main__":
+    main()
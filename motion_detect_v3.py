@@ -2,45 +2,76 @@ import cv2
 import numpy as np
 import os
 import glob
-
-def detect_person_timeline(video_path):
-    """사람 감지 타임라인 생성 - 더 정확한 감지"""
-    cap = cv2.VideoCapture(video_path)
-
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-    filename = os.path.basename(video_path)
-    print(f"\n{'='*60}")
-    print(f"파일: {filename}")
-    print(f"총 프레임: {total_frames}, FPS: {fps}")
-    print(f"{'='*60}")
-
-    # 배경 모델 생성을 위해 먼저 전체 영상 스캔
-    back_sub = cv2.createBackgroundSubtractorMOG2(
-        history=200,
-        varThreshold=25,
-        detectShadows=False
-    )
-
-    person_timeline = []
-
-    frame_idx = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
+import time
+
+from sidecar import write_sidecar
+from video_writer import open_video_writer
+from video_index import video_meta, frame_time, frame_times
+from floor_calibration import load_calibration, walking_metrics
+from tug_phases import segment_phases, phase_durations
+from debug_render import DebugRecorder, sampled, describe
+from adaptive_thresholds import NOISE_FLOOR_RATIO, MAX_BLOBS, pick_thresholds, apply_thresholds
+from audio_cues import audio_cues, analysis_window, cross_check, describe_check
+from pipeline_metrics import registry as metrics
+
+# 출력 방식: 'sidecar' = JSON/WebVTT만 저장 (플레이어가 선을 그림), 'burn' = 선을 영상에 직접 렌더링, 'both' = 둘 다
+OUTPUT_MODE = 'sidecar'
+
+# 번인 렌더링 출력 설정 ('auto' = ffmpeg 있으면 조각화 H.264, 없으면 cv2 mp4v)
+WRITER_BACKEND = 'auto'
+WRITER_PRESET = 'veryfast'
+WRITER_CRF = 23
+
+# 리뷰 UI용 썸네일 피라미드/스프라이트 시트를 분석 디코딩 중에 같이 생성 (filmstrip)
+MAKE_FILMSTRIP = False
+
+# 감지 디버그 영상 (debug_render) - 이 비율의 영상만 저장 (0 = 끔, 1 = 전부), 파일 이름 해시로 선택
+DEBUG_SAMPLE_RATE = 0.0
+
+# 바닥 캘리브레이션 카메라 ID (floor_calibration) - 있으면 m 단위 보행 지표도 같은 패스에서 계산
+CAMERA_ID = None
+
+# 검출 파라미터 (매니페스트에 함께 기록 - 값이 바뀌면 다시 처리)
+DETECTOR_PARAMS = {
+    'version': 'v3',
+    'engine': 'mog2',  # 'mog2' = 배경 제거, 'flow' = 희소 광류, 'hybrid' = 사람 검출기 + 추적기, 'multi' = 다중 blob 추적
+    'history': 200,
+    'var_threshold': 25,
+    'min_area': 3000,
+    'min_aspect': 0.5,
+    'motion_area': 5000,
+    'warmup_frames': 50,
+    # 'adaptive' = 영상의 후보 blob 면적/비율 분포로 위 세 임계값을 영상마다 자동 결정 (adaptive_thresholds)
+    # 'fixed' = 위 값 그대로
+    'thresholds': 'adaptive',
+    # 오디오 시작 신호(구령/박수)로 영상 감지 구간을 좁히고 START와 교차 확인 (audio_cues)
+    'audio_cues': True,
+}
+
+class MOG2Engine:
+    """MOG2 배경 제거 + 사람 비율의 가장 큰 컨투어"""
+
+    def __init__(self):
+        self.back_sub = cv2.createBackgroundSubtractorMOG2(
+            history=DETECTOR_PARAMS['history'],
+            varThreshold=DETECTOR_PARAMS['var_threshold'],
+            detectShadows=False
+        )
+        self.kernel = np.ones((7, 7), np.uint8)
+        # True면 이번 프레임의 마스크/후보 판정을 self.debug에 남김 (debug_render)
+        self.capture = False
+        self.debug = None
+        # 자동 임계값용 후보 blob 기록 (고정 임계값 판정은 그대로 함께 계산)
+        self.collect = DETECTOR_PARAMS.get('thresholds') == 'adaptive'
+
+    def apply(self, frame):
         # 배경 제거
-        fg_mask = back_sub.apply(frame)
+        fg_mask = self.back_sub.apply(frame)
 
         # 노이즈 제거
-        kernel = np.ones((7, 7), np.uint8)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
-        fg_mask = cv2.dilate(fg_mask, kernel, iterations=2)
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, self.kernel)
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, self.kernel)
+        fg_mask = cv2.dilate(fg_mask, self.kernel, iterations=2)
 
         # 컨투어 찾기
         contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -49,34 +80,150 @@ def detect_person_timeline(video_path):
         person_found = False
         person_x = None
         person_area = 0
+        person_bbox = None
+        candidates = [] if self.capture else None
+        blobs = [] if self.collect else None
+        noise_floor = NOISE_FLOOR_RATIO * fg_mask.size
 
         for contour in contours:
             area = cv2.contourArea(contour)
-            if area > 3000:  # 최소 크기
+            if blobs is not None and area > noise_floor:
+                blobs.append((area, *cv2.boundingRect(contour)))
+            if area > DETECTOR_PARAMS['min_area']:  # 최소 크기
                 x, y, w, h = cv2.boundingRect(contour)
                 # 사람 비율 체크 (너무 넓거나 낮은 것 제외)
                 aspect_ratio = h / w if w > 0 else 0
-                if aspect_ratio > 0.5:  # 사람은 대체로 세로가 더 김
+                if aspect_ratio > DETECTOR_PARAMS['min_aspect']:  # 사람은 대체로 세로가 더 김
+                    if candidates is not None:
+                        candidates.append((x, y, w, h, area, 'ok'))
                     if area > person_area:
                         person_area = area
                         person_x = x + w // 2
+                        person_bbox = (x, y, w, h)
                         person_found = True
+                elif candidates is not None:
+                    candidates.append((x, y, w, h, area, 'aspect'))
+            elif candidates is not None:
+                candidates.append((*cv2.boundingRect(contour), area, 'area'))
+
+        if candidates is not None:
+            candidates = [(*c[:5], 'chosen') if c[:4] == person_bbox and c[5] == 'ok' else c for c in candidates]
+            self.debug = {'mask': fg_mask, 'candidates': candidates,
+                          'cutoffs': (DETECTOR_PARAMS['min_area'], DETECTOR_PARAMS['min_aspect'])}
 
-        person_timeline.append({
-            'frame': frame_idx,
+        record = {
             'detected': person_found,
             'x': person_x,
-            'area': person_area
-        })
+            'area': person_area,
+            'bbox': person_bbox
+        }
+        if blobs is not None:
+            blobs.sort(reverse=True)
+            record['candidates'] = np.array(blobs[:MAX_BLOBS], dtype=np.float32).reshape(-1, 5)
+        return record
+
+# 배경 모델이 있어 처음 warmup_frames 프레임(배경 학습)을 버려야 하는 엔진
+# ('flow' 광류 / 'hybrid' 검출기 엔진은 배경 학습이 없어 첫 프레임부터 유효)
+BACKGROUND_ENGINES = ('mog2', 'multi')
+
+def engine_warmup(name=None):
+    """엔진별 배경 학습 프레임 수"""
+    name = name or DETECTOR_PARAMS['engine']
+    return DETECTOR_PARAMS['warmup_frames'] if name in BACKGROUND_ENGINES else 0
+
+def make_engine(name=None):
+    """프레임별 감지 엔진 생성 - 모든 엔진은 apply(frame) -> 같은 형식의 기록을 반환"""
+    name = name or DETECTOR_PARAMS['engine']
+    if name == 'mog2':
+        return MOG2Engine()
+    if name == 'flow':
+        from optical_flow_engine import OpticalFlowEngine
+        return OpticalFlowEngine(min_aspect=DETECTOR_PARAMS['min_aspect'])
+    if name == 'hybrid':
+        from person_tracker import TrackerGatedDetector
+        return TrackerGatedDetector()
+    if name == 'multi':
+        from blob_tracker import MultiBlobEngine
+        return MultiBlobEngine(DETECTOR_PARAMS['history'], DETECTOR_PARAMS['var_threshold'],
+                               DETECTOR_PARAMS['min_area'], DETECTOR_PARAMS['min_aspect'])
+    raise ValueError(f"알 수 없는 감지 엔진: {name}")
+
+def scan_timeline(video_path, start_frame=0, end_frame=None, total_frames=None, engine=None, on_frame=None,
+                  debug=None):
+    """[start_frame, end_frame) 구간의 프레임별 사람 감지 기록
+
+    on_frame(frame_idx, frame): 같은 디코딩으로 다른 산출물(필름스트립 등)을 만들 때
+    debug: debug_render.DebugRecorder - 엔진의 마스크/후보 판정을 같은 루프에서 받아 감"""
+    cap = cv2.VideoCapture(video_path)
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    # 배경 모델/추적 상태는 엔진 안에 있으므로 구간마다 새로 생성
+    engine = make_engine(engine)
+
+    person_timeline = []
+    started = time.perf_counter()
+
+    frame_idx = start_frame
+    while end_frame is None or frame_idx < end_frame:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        capture = debug is not None and debug.wants(frame_idx)
+        if capture:
+            engine.capture = True
+        record = engine.apply(frame)
+        person_timeline.append({'frame': frame_idx, **record})
+        if capture:
+            engine.capture = False
+            debug.add(frame_idx, frame, record, getattr(engine, 'debug', None))
+        if on_frame is not None:
+            on_frame(frame_idx, frame)
 
         frame_idx += 1
         if frame_idx % 50 == 0:
-            print(f"  1차 분석: {frame_idx}/{total_frames}")
+            print(f"  1차 분석: {frame_idx}/{total_frames or end_frame or '?'}")
 
     cap.release()
 
-    # 움직임이 있는 프레임들 찾기 (배경 학습 후)
-    motion_frames = [d for d in person_timeline[50:] if d['detected'] and d['area'] > 5000]
+    # 워커별 처리량 (배치 실행기는 워커 결과를 부모에서 다시 집계)
+    elapsed = time.perf_counter() - started
+    worker = str(os.getpid())
+    metrics.inc('tug_frames_total', len(person_timeline), worker=worker)
+    metrics.inc('tug_scan_seconds_total', elapsed, worker=worker)
+    if elapsed > 0 and person_timeline:
+        metrics.observe('tug_scan_fps', len(person_timeline) / elapsed)
+    return person_timeline
+
+def resolve_thresholds(person_timeline, meta):
+    """임계값 결정 + 그 임계값으로 다시 판정한 타임라인 -> (타임라인, 임계값 dict)
+
+    후보 blob이 없는 타임라인(고정 모드, 다른 엔진)은 그대로 + 고정값"""
+    fixed = {k: DETECTOR_PARAMS[k] for k in ('min_area', 'min_aspect', 'motion_area')}
+    # 후보 배열은 MOG2 자동 임계값 모드에서만 있음 (multi 엔진의 'blobs'는 개수)
+    if not any(isinstance(d.get('candidates'), np.ndarray) for d in person_timeline):
+        return person_timeline, {**fixed, 'method': 'fixed'}
+    warmup = engine_warmup()
+    thresholds = pick_thresholds(person_timeline[warmup:], meta['width'] * meta['height'], fixed)
+    if thresholds['method'] == 'fixed':
+        # 고정 판정은 엔진이 이미 했음 - 후보 기록만 버림
+        return [{k: v for k, v in d.items() if k != 'candidates'} for d in person_timeline], thresholds
+    print(f"  자동 임계값: 면적 > {thresholds['min_area']:.0f}, 비율 > {thresholds['min_aspect']:.2f}, "
+          f"움직임 면적 > {thresholds['motion_area']:.0f}")
+    return apply_thresholds(person_timeline, thresholds), thresholds
+
+def build_settings(person_timeline, meta, warmup=None, thresholds=None):
+    """타임라인에서 START/FINISH 결정 -> 렌더링/사이드카 설정 dict (사람이 없으면 None)
+
+    thresholds: resolve_thresholds 결과 (이미 다시 판정한 타임라인이면 넘김, 없으면 여기서 결정)"""
+    if thresholds is None:
+        person_timeline, thresholds = resolve_thresholds(person_timeline, meta)
+    # 움직임이 있는 프레임들 찾기 (배경 학습 후, 영상 중간 구간이면 warmup=0)
+    if warmup is None:
+        warmup = engine_warmup()
+    motion_frames = [d for d in person_timeline[warmup:]
+                     if d['detected'] and d['area'] > thresholds['motion_area']]
 
     if not motion_frames:
         print("  사람을 감지하지 못했습니다.")
@@ -94,37 +241,105 @@ def detect_person_timeline(video_path):
     print(f"  START: 프레임 {start_frame}, X={start_x}")
     print(f"  FINISH: 프레임 {finish_frame}, X={finish_x}")
 
+    index = meta['index']
     return {
         'start_frame': start_frame,
         'start_x': start_x,
+        'start_time': frame_time(index, start_frame, meta['fps']),
         'finish_frame': finish_frame,
         'finish_x': finish_x,
-        'width': width,
-        'height': height,
-        'fps': fps,
-        'total_frames': total_frames
+        'finish_time': frame_time(index, finish_frame, meta['fps']),
+        'width': meta['width'],
+        'height': meta['height'],
+        'fps': meta['fps'],
+        'total_frames': meta['total_frames'],
+        'thresholds': thresholds,
+        'timeline': person_timeline
     }
 
-def process_video(input_path, output_path, settings):
-    """동영상에 START/FINISH 선 추가"""
-    cap = cv2.VideoCapture(input_path)
+def detect_person_timeline(video_path, meta=None, on_frame=None, debug=None):
+    """사람 감지 타임라인 생성 - 더 정확한 감지"""
+    meta = meta or video_meta(video_path)
 
-    fps = settings['fps']
-    width = settings['width']
-    height = settings['height']
-    total_frames = settings['total_frames']
+    filename = os.path.basename(video_path)
+    print(f"\n{'='*60}")
+    print(f"파일: {filename}")
+    print(f"총 프레임: {meta['total_frames']}, FPS: {meta['fps']:.3f}")
+    print(f"{'='*60}")
 
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    # 오디오 사전 분석 - 필름스트립(on_frame)/디버그 영상은 한 번의 전체 감지에서 만들어야 하므로
+    # (구간 감지 후 다시 감지하면 프레임 중복/순서 뒤섞임) 구간 제한 없이 교차 확인만
+    cues = audio_cues(video_path) if DETECTOR_PARAMS.get('audio_cues') else None
+    window = None
+    if cues and on_frame is None and debug is None:
+        window = analysis_window(cues, meta, engine_warmup())
+
+    settings = None
+    if window is not None:
+        print(f"  오디오 신호 {len(cues['onsets'])}개 -> 프레임 {window[0]}~{window[1] - 1}만 감지")
+        person_timeline = scan_timeline(video_path, *window, total_frames=meta['total_frames'])
+        settings = build_settings(person_timeline, meta)
+        # 구간 안 START가 신호와 맞지 않으면 신호를 믿을 수 없음 (다른 소리/시행 일부만 잡힘)
+        if settings is None or cross_check(settings['start_time'], cues)['status'] != 'ok':
+            print("  신호 구간 결과가 신호와 맞지 않음 - 전체 영상 다시 감지")
+            settings = None
+        # 구간 끝 1초 안에서 FINISH = 구간이 시행보다 짧았음
+        elif window[1] < meta['total_frames'] and settings['finish_frame'] >= window[1] - meta['fps']:
+            print("  FINISH가 신호 구간 끝에 걸림 - 전체 영상 다시 감지")
+            settings = None
+    if settings is None:
+        window = None
+        person_timeline = scan_timeline(video_path, total_frames=meta['total_frames'], on_frame=on_frame,
+                                        debug=debug)
+        person_timeline, thresholds = resolve_thresholds(person_timeline, meta)
+        if debug is not None:
+            debug.relabel(thresholds)  # 디버그 요약도 실제 결정에 쓴 (자동) 임계값 기준
+        settings = build_settings(person_timeline, meta, thresholds=thresholds)
+
+    if settings is not None and cues is not None:
+        attach_audio_cue(settings, cues, window)
+    return settings
+
+def attach_audio_cue(settings, cues, window=None):
+    """START와 오디오 신호 교차 확인 결과 기록 (window: 신호로 좁힌 감지 구간)"""
+    settings['audio_cue'] = cross_check(settings['start_time'], cues)
+    settings['audio_window'] = window
+    settings['cues'] = cues  # 시행이 여러 번이면 시행별로 다시 교차 확인 (결과에는 안 남김)
+    print(f"  {describe_check(settings['audio_cue'])}")
+    metrics.inc('tug_audio_cues_total', status=settings['audio_cue']['status'])
+
+def open_output_writer(output_path, settings):
+    """쓰는 도중에도 스트리밍 가능한 조각화 MP4 (ffmpeg 없으면 mp4v로 대체)"""
+    return open_video_writer(output_path, settings['fps'], (settings['width'], settings['height']),
+                             backend=WRITER_BACKEND, preset=WRITER_PRESET, crf=WRITER_CRF)
+
+def draw_lines(frame, frame_idx, settings):
+    """frame_idx 시점에 보여야 할 START/FINISH 선 그리기 (화면 하단 25%)"""
+    line_top = int(settings['height'] * 0.75)
+    line_bottom = settings['height']
 
     start_frame = settings['start_frame']
     start_x = settings['start_x']
     finish_frame = settings['finish_frame']
     finish_x = settings['finish_x']
 
-    # 선 그리기 영역 (화면 하단 25%)
-    line_top = int(height * 0.75)
-    line_bottom = height
+    # START 프레임부터 빨간 선 (고정 위치)
+    if frame_idx >= start_frame and start_x:
+        cv2.line(frame, (start_x, line_top), (start_x, line_bottom), (0, 0, 255), 5)
+        cv2.putText(frame, "START", (start_x - 45, line_top - 15),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+
+    # FINISH 프레임부터 파란 선 (고정 위치)
+    if frame_idx >= finish_frame and finish_x:
+        cv2.line(frame, (finish_x, line_top), (finish_x, line_bottom), (255, 0, 0), 5)
+        cv2.putText(frame, "FINISH", (finish_x - 50, line_top - 15),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
+
+def process_video(input_path, output_path, settings):
+    """동영상에 START/FINISH 선 추가"""
+    cap = cv2.VideoCapture(input_path)
+    total_frames = settings['total_frames']
+    out = open_output_writer(output_path, settings)
 
     frame_idx = 0
     while True:
@@ -132,18 +347,7 @@ def process_video(input_path, output_path, settings):
         if not ret:
             break
 
-        # START 프레임부터 빨간 선 (고정 위치)
-        if frame_idx >= start_frame and start_x:
-            cv2.line(frame, (start_x, line_top), (start_x, line_bottom), (0, 0, 255), 5)
-            cv2.putText(frame, "START", (start_x - 45, line_top - 15),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-
-        # FINISH 프레임부터 파란 선 (고정 위치)
-        if frame_idx >= finish_frame and finish_x:
-            cv2.line(frame, (finish_x, line_top), (finish_x, line_bottom), (255, 0, 0), 5)
-            cv2.putText(frame, "FINISH", (finish_x - 50, line_top - 15),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
-
+        draw_lines(frame, frame_idx, settings)
         out.write(frame)
         frame_idx += 1
 
@@ -153,6 +357,140 @@ def process_video(input_path, output_path, settings):
     cap.release()
     out.release()
 
+def analyze_and_output(video_path, output_dir, output_mode=None, camera_id=None):
+    """한 영상 감지 + 출력 (배치/감시 폴더/서비스 공용). 사람이 없으면 None"""
+    filename = os.path.basename(video_path)
+
+    # 단계별 처리 시간 (결과 저장소 stage_timings)
+    timings = {}
+    output_base = os.path.join(output_dir, os.path.splitext(filename)[0])
+    meta = video_meta(video_path)
+    filmstrip = None
+    if MAKE_FILMSTRIP:
+        from filmstrip import FilmstripBuilder
+        filmstrip = FilmstripBuilder(output_base, meta['width'], meta['height'], meta['total_frames'])
+
+    debug = None
+    if sampled(filename, DEBUG_SAMPLE_RATE):
+        debug = DebugRecorder(f"{output_base}.debug.mp4", meta['fps'])
+
+    started = time.perf_counter()
+    settings = detect_person_timeline(video_path, meta, on_frame=filmstrip.add if filmstrip else None, debug=debug)
+    timings['detect'] = time.perf_counter() - started
+    debug_path = None
+    if debug is not None:
+        summary = debug.close()
+        debug_path = summary['path']
+        print(f"  {describe(summary)}")
+    if settings is None:
+        return None
+    return output_results(video_path, output_dir, settings, meta, timings, output_mode, camera_id,
+                          filmstrip=filmstrip, debug_path=debug_path)
+
+def analyze_timeline(video_path, person_timeline, output_dir, output_mode=None, camera_id=None, timings=None):
+    """이미 감지한 타임라인 (batch_scheduler 구간 병렬 스캔을 합친 것) -> analyze_and_output과 같은 결과
+
+    사람이 없으면 None. 오디오 신호는 교차 확인만 (감지 구간은 이미 전체)"""
+    meta = video_meta(video_path)
+    timings = dict(timings or {})
+    started = time.perf_counter()
+    settings = build_settings(person_timeline, meta)
+    if settings is not None and DETECTOR_PARAMS.get('audio_cues'):
+        attach_audio_cue(settings, audio_cues(video_path))
+    timings['detect'] = timings.get('detect', 0.0) + time.perf_counter() - started
+    if settings is None:
+        return None
+    return output_results(video_path, output_dir, settings, meta, timings, output_mode, camera_id)
+
+def output_results(video_path, output_dir, settings, meta, timings, output_mode=None, camera_id=None,
+                   filmstrip=None, debug_path=None):
+    """감지 이후 공통 처리 (시행 분리/단계 분할/보행 지표/사이드카/번인) -> 결과 dict
+
+    timings: 지금까지의 단계별 처리 시간 (여기서 단계를 더해 결과에 넣음)"""
+    output_mode = output_mode or OUTPUT_MODE
+    camera_id = camera_id or CAMERA_ID
+    filename = os.path.basename(video_path)
+    output_base = os.path.join(output_dir, os.path.splitext(filename)[0])
+
+    started = time.perf_counter()
+    timeline = settings['timeline']
+    cues = settings.pop('cues', None)
+    # 한 영상에 시행이 여러 번이면 합친 구간(첫 시행 START ~ 마지막 시행 FINISH)이 아니라 시행마다 결정
+    from tug_trials import split_trials, trial_settings, write_trial_clips
+    spans = split_trials(timeline, settings['fps'], settings['thresholds']['motion_area'])
+    trials = None
+    if len(spans) > 1:
+        print(f"  시행 {len(spans)}개 감지 - 시행별 START/FINISH")
+        trials = trial_settings(timeline, meta, settings['thresholds']) or None
+    if trials is None:
+        times = frame_times(meta['index'], [d['frame'] for d in timeline], settings['fps'])
+        settings['phase_segments'] = segment_phases(timeline, times, settings['fps'])
+        settings['phases'] = phase_durations(settings['phase_segments'])
+    else:
+        for trial in trials:
+            trial['thresholds'] = settings['thresholds']
+            if cues is not None:
+                trial['audio_cue'] = cross_check(trial['start_time'], cues)
+                print(f"  시행 {trial['trial']}: {describe_check(trial['audio_cue'])}")
+    timings['phases'] = time.perf_counter() - started
+
+    calibration = load_calibration(camera_id) if camera_id else None
+    if calibration is not None:
+        started = time.perf_counter()
+        for s in trials or [settings]:
+            times = frame_times(meta['index'], [d['frame'] for d in s['timeline']], s['fps'])
+            s['walk_metrics'] = walking_metrics(s['timeline'], times, calibration['homography'], s['fps'])
+        timings['walk_metrics'] = time.perf_counter() - started
+
+    outputs = []
+    if filmstrip is not None:
+        started = time.perf_counter()
+        all_times = frame_times(meta['index'], list(range(filmstrip.frames)), meta['fps'])
+        # START/FINISH 표시는 첫 시행 (시행이 하나면 그 영상)
+        outputs.append(filmstrip.finish(timeline, filename, all_times, (trials or [settings])[0]))
+        timings['filmstrip'] = time.perf_counter() - started
+    if output_mode in ('sidecar', 'both'):
+        # 재인코딩 없이 선 정보만 저장 (번인 렌더링은 sidecar.render_deferred로 나중에)
+        started = time.perf_counter()
+        for s in trials or [settings]:
+            base = f"{output_base}_trial{s['trial']}" if trials else output_base
+            json_path, vtt_path = write_sidecar(video_path, base, s)
+            print(f"  사이드카 저장: {os.path.basename(json_path)}, {os.path.basename(vtt_path)}")
+            s['outputs'] = [json_path, vtt_path]
+            outputs += [json_path, vtt_path]
+        timings['sidecar'] = time.perf_counter() - started
+    if output_mode in ('burn', 'both'):
+        started = time.perf_counter()
+        print(f"  영상 생성 중...")
+        if trials:
+            paths = write_trial_clips(video_path, trials, output_dir)
+            for s, path in zip(trials, paths):
+                s.setdefault('outputs', []).append(path)
+        else:
+            paths = [os.path.join(output_dir, f"marked_{filename}")]
+            process_video(video_path, paths[0], settings)
+        print(f"  완료!")
+        outputs += paths
+        timings['render'] = time.perf_counter() - started
+
+    for stage, seconds in timings.items():
+        metrics.observe('tug_stage_seconds', seconds, stage=stage)
+    metrics.observe('tug_video_seconds', sum(timings.values()))
+
+    if debug_path:
+        outputs.append(debug_path)  # 마지막에 (서비스/리뷰 UI는 앞쪽 출력을 본 결과로 씀)
+
+    if trials:
+        # 대표 값(앱/서비스가 보는 START/FINISH)은 첫 시행, 시행별 결과는 'trials' (저장소는 시행마다 한 행)
+        result = {k: v for k, v in trials[0].items() if k not in ('timeline', 'trial', 'outputs')}
+        result['audio_window'] = settings.get('audio_window')
+        result['trials'] = [{k: v for k, v in s.items() if k not in ('timeline', 'thresholds')} for s in trials]
+    else:
+        result = {k: v for k, v in settings.items() if k != 'timeline'}
+    result['timings'] = {k: round(v, 4) for k, v in timings.items()}
+    result['outputs'] = outputs
+    return result
+
 def main():
     video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4"))
 
@@ -165,27 +503,9 @@ def main():
     output_dir = "/Users/aisoft/Documents/TUG/final_output"
     os.makedirs(output_dir, exist_ok=True)
 
-    results = []
-
-    for i, video_path in enumerate(video_files):
-        filename = os.path.basename(video_path)
-        print(f"\n[{i+1}/{len(video_files)}] {filename}")
-
-        settings = detect_person_timeline(video_path)
-
-        if settings is None:
-            print(f"  건너뜀")
-            continue
-
-        results.append({
-            'file': filename,
-            **settings
-        })
-
-        output_path = os.path.join(output_dir, f"marked_{filename}")
-        print(f"  영상 생성 중...")
-        process_video(video_path, output_path, settings)
-        print(f"  완료!")
+    # 매니페스트 이어서 처리/중복 건너뛰기, 결과 저장소 기록, 긴 작업 먼저 배정 + 긴 영상 구간 분할 (batch_scheduler)
+    from batch_scheduler import run_batch
+    results = run_batch(video_files, output_dir)
 
     # 결과 요약
     print(f"\n{'='*60}")
@@ -193,14 +513,17 @@ def main():
     print(f"{'='*60}")
 
     for r in results:
-        start_time = r['start_frame'] / r['fps']
-        finish_time = r['finish_frame'] / r['fps']
-        duration = finish_time - start_time
-
         print(f"\n{r['file']}:")
-        print(f"  START : 프레임 {r['start_frame']} ({start_time:.2f}초), X={r['start_x']}")
-        print(f"  FINISH: 프레임 {r['finish_frame']} ({finish_time:.2f}초), X={r['finish_x']}")
-        print(f"  소요 시간: {duration:.2f}초")
+        for t in r.get('trials') or [r]:
+            start_time = t['start_time']
+            finish_time = t['finish_time']
+            duration = finish_time - start_time
+
+            if 'trial' in t:
+                print(f"  [시행 {t['trial']}]")
+            print(f"  START : 프레임 {t['start_frame']} ({start_time:.2f}초), X={t['start_x']}")
+            print(f"  FINISH: 프레임 {t['finish_frame']} ({finish_time:.2f}초), X={t['finish_x']}")
+            print(f"  소요 시간: {duration:.2f}초")
 
     print(f"\n결과 저장 위치: {output_dir}")
 
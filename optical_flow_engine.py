@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+# 희소 광류 움직임 엔진 - 배경 학습(워밍업)이 없고 조명 변화에 덜 민감
+FLOW_WIDTH = 320           # 축소 흑백 프레임 폭
+MAX_CORNERS = 400
+RESEED_EVERY = 5           # N 프레임마다 특징점 재추출 (새로 들어온 사람에게도 점이 생기도록)
+MIN_POINTS = 50            # 추적 중인 점이 이보다 적으면 다음 프레임용으로 바로 재추출
+MIN_FLOW_PX = 1.0          # 축소 프레임 기준 이 이상 움직인 점만 "움직임"
+MIN_MOVING_POINTS = 6      # 움직이는 점이 이 이상이어야 감지
+GLOBAL_MOTION_SPREAD = 0.6 # 움직이는 점이 가로/세로 모두 이 비율 이상 퍼져 있으면 카메라 움직임으로 판단
+
+
+class OpticalFlowEngine:
+    """goodFeaturesToTrack + calcOpticalFlowPyrLK 기반 엔진 (motion_detect_v3 엔진 'flow')"""
+
+    def __init__(self, min_aspect=0.5):
+        self.min_aspect = min_aspect
+        self.prev_gray = None
+        self.points = None
+        self.frames_since_seed = 0
+
+    def _seed(self, gray):
+        self.points = cv2.goodFeaturesToTrack(gray, maxCorners=MAX_CORNERS, qualityLevel=0.01, minDistance=7)
+        self.frames_since_seed = 0
+
+    def apply(self, frame):
+        scale = FLOW_WIDTH / frame.shape[1]
+        gray = cv2.cvtColor(cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA),
+                            cv2.COLOR_BGR2GRAY)
+
+        empty = {'detected': False, 'x': None, 'area': 0, 'bbox': None}
+
+        if self.prev_gray is None or self.points is None or len(self.points) == 0:
+            self.prev_gray = gray
+            self._seed(gray)
+            return empty
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None,
+                                                         winSize=(15, 15), maxLevel=2)
+        good = status.ravel() == 1
+        old = self.points[good].reshape(-1, 2)
+        new = new_points[good].reshape(-1, 2)
+
+        self.prev_gray = gray
+        self.frames_since_seed += 1
+        if self.frames_since_seed >= RESEED_EVERY or len(new) < MIN_POINTS:
+            self._seed(gray)
+        else:
+            self.points = new.reshape(-1, 1, 2)
+
+        if len(new) == 0:
+            return empty
+
+        flow = new - old
+        moving = np.hypot(flow[:, 0], flow[:, 1]) > MIN_FLOW_PX
+
+        # 카메라 흔들림: 움직이는 점이 화면 대부분에 퍼져 있으면 전체 중앙값 이동을 빼고 다시 판정
+        # (배경이 밋밋하면 특징점 대부분이 사람 위에 있으므로 항상 빼면 사람 움직임이 지워짐)
+        if moving.sum() >= MIN_MOVING_POINTS:
+            spread = np.ptp(new[moving], axis=0) / gray.shape[::-1]
+            if (spread > GLOBAL_MOTION_SPREAD).all():
+                flow -= np.median(flow, axis=0)
+                moving = np.hypot(flow[:, 0], flow[:, 1]) > MIN_FLOW_PX
+
+        if moving.sum() < MIN_MOVING_POINTS:
+            return empty
+
+        # 움직이는 점들의 범위 (양 끝 5%는 이상치로 제외) -> 원본 해상도로 환산
+        pts = new[moving]
+        x0, y0 = np.percentile(pts, 5, axis=0) / scale
+        x1, y1 = np.percentile(pts, 95, axis=0) / scale
+        w, h = int(x1 - x0), int(y1 - y0)
+        if w <= 0 or h / w <= self.min_aspect:
+            return empty
+
+        x, y = int(x0), int(y0)
+        return {
+            'detected': True,
+            'x': x + w // 2,
+            'area': w * h,
+            'bbox': (x, y, w, h)
+        }
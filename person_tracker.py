@@ -0,0 +1,185 @@
+import os
+
+import cv2
+import numpy as np
+
+# 무거운 사람 검출기는 가끔만 실행하고, 그 사이에는 가벼운 추적기로 따라감
+DETECT_EVERY = 15          # N 프레임마다 검출기로 재확인
+DETECT_WIDTH = 640         # 검출기 입력 폭 (축소해서 실행)
+BLOB_WIDTH = 160           # 움직임 이벤트 감지용 축소 폭
+BLOB_TRIGGER_RATIO = 0.01  # 축소 프레임에서 변화 픽셀 비율이 이 이상이면 검출기 실행
+HOG_MIN_WEIGHT = 0.3
+MIN_TRACK_POINTS = 8       # LK 추적 시 최소 특징점 수
+# 추적기 우선순위 - LK는 항상 사용 가능하므로 그 뒤 항목은 쓰이지 않음
+# (MIL은 정확하지만 KCF/LK보다 훨씬 느려서 목록에서 뺌 - 쓰려면 'lk' 앞에)
+TRACKER_PREFERENCE = ('kcf', 'lk')
+
+# 로컬 ONNX 사람 검출 모델 (YOLOv8 형식 출력 [1, 4+클래스, N]) - 있으면 HOG 대신 사용
+ONNX_MODEL_PATH = "/Users/aisoft/Documents/TUG/models/person_detector.onnx"
+ONNX_INPUT_SIZE = 640
+ONNX_MIN_SCORE = 0.4
+
+
+class HOGPersonDetector:
+    """OpenCV 기본 HOG 보행자 검출기"""
+
+    def __init__(self):
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+
+    def detect(self, frame):
+        scale = min(1.0, DETECT_WIDTH / frame.shape[1])
+        small = cv2.resize(frame, None, fx=scale, fy=scale) if scale < 1.0 else frame
+        boxes, weights = self.hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(boxes) == 0:
+            return None
+        weights = np.asarray(weights).ravel()
+        best = int(np.argmax(weights))
+        if weights[best] < HOG_MIN_WEIGHT:
+            return None
+        x, y, w, h = boxes[best]
+        return tuple(int(round(v / scale)) for v in (x, y, w, h))
+
+
+class ONNXPersonDetector:
+    """cv2.dnn으로 로컬 ONNX 검출 모델 실행 (클래스 0 = 사람)"""
+
+    def __init__(self, model_path):
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+
+    def detect(self, frame):
+        height, width = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 1 / 255.0, (ONNX_INPUT_SIZE, ONNX_INPUT_SIZE), swapRB=True)
+        self.net.setInput(blob)
+        output = self.net.forward()[0]  # (4+클래스, N)
+        scores = output[4]
+        best = int(np.argmax(scores))
+        if scores[best] < ONNX_MIN_SCORE:
+            return None
+        cx, cy, w, h = output[:4, best]
+        sx, sy = width / ONNX_INPUT_SIZE, height / ONNX_INPUT_SIZE
+        return (int((cx - w / 2) * sx), int((cy - h / 2) * sy), int(w * sx), int(h * sy))
+
+
+def make_person_detector():
+    if os.path.exists(ONNX_MODEL_PATH):
+        return ONNXPersonDetector(ONNX_MODEL_PATH)
+    return HOGPersonDetector()
+
+
+class LKBoxTracker:
+    """bbox 내부 특징점의 희소 Lucas-Kanade 흐름으로 bbox 이동 (contrib 추적기가 없을 때)"""
+
+    def init(self, frame, bbox):
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.bbox = tuple(int(v) for v in bbox)
+        self.points = self._seed(self.prev_gray, self.bbox)
+
+    def _seed(self, gray, bbox):
+        x, y, w, h = bbox
+        mask = np.zeros_like(gray)
+        mask[max(y, 0):y + h, max(x, 0):x + w] = 255
+        return cv2.goodFeaturesToTrack(gray, maxCorners=60, qualityLevel=0.01, minDistance=5, mask=mask)
+
+    def update(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.points is None or len(self.points) < MIN_TRACK_POINTS:
+            return False, self.bbox
+
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None)
+        good = status.ravel() == 1
+        if good.sum() < MIN_TRACK_POINTS:
+            return False, self.bbox
+
+        # 중앙값 이동량으로 bbox 이동 (이상치에 강함)
+        dx, dy = np.median(new_points[good] - self.points[good], axis=0).ravel()
+        x, y, w, h = self.bbox
+        self.bbox = (int(round(x + dx)), int(round(y + dy)), w, h)
+        self.prev_gray = gray
+        self.points = new_points[good].reshape(-1, 1, 2)
+        if len(self.points) < MIN_TRACK_POINTS * 2:
+            self.points = self._seed(gray, self.bbox)  # 특징점 재추출
+        return True, self.bbox
+
+
+def make_tracker():
+    """TRACKER_PREFERENCE 순서로 사용 가능한 추적기 (KCF는 opencv-contrib 필요)"""
+    for name in TRACKER_PREFERENCE:
+        if name == 'lk':
+            return LKBoxTracker()
+        factory = getattr(cv2, f"Tracker{name.upper()}_create", None)
+        if factory is not None:
+            return factory()
+    return LKBoxTracker()
+
+
+class TrackerGatedDetector:
+    """희소 검출 + 추적 하이브리드 엔진 (motion_detect_v3 엔진 'hybrid')
+
+    - 추적 중: 추적기만 실행, DETECT_EVERY 프레임마다 검출기로 재확인
+    - 추적 실패/화면 밖: 즉시 검출기 재실행
+    - 추적 안 하는 중: 프레임 차이(움직임 이벤트)가 있을 때만 검출기 실행
+    """
+
+    def __init__(self, detector=None):
+        self.detector = detector or make_person_detector()
+        self.tracker = None
+        self.bbox = None
+        self.since_detect = 0
+        self.prev_small = None
+        self.detector_runs = 0
+
+    def _blob_event(self, frame):
+        """축소 흑백 프레임 차이로 뭔가 움직였는지 (검출기보다 수백 배 싼 확인)"""
+        scale = BLOB_WIDTH / frame.shape[1]
+        small = cv2.cvtColor(cv2.resize(frame, None, fx=scale, fy=scale), cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+        prev, self.prev_small = self.prev_small, small
+        if prev is None:
+            return False
+        changed = cv2.absdiff(prev, small) > 25
+        return changed.mean() > BLOB_TRIGGER_RATIO
+
+    def _run_detector(self, frame):
+        self.detector_runs += 1
+        self.since_detect = 0
+        bbox = self.detector.detect(frame)
+        if bbox is None:
+            self.tracker = None
+            self.bbox = None
+            return
+        self.tracker = make_tracker()
+        self.tracker.init(frame, bbox)
+        self.bbox = bbox
+
+    def _inside(self, bbox, frame):
+        x, y, w, h = bbox
+        height, width = frame.shape[:2]
+        cx = x + w / 2
+        return w > 0 and h > 0 and 0 <= cx < width and y < height and y + h > 0
+
+    def apply(self, frame):
+        moved = self._blob_event(frame)
+        self.since_detect += 1
+
+        if self.tracker is None:
+            if moved:
+                self._run_detector(frame)
+        else:
+            ok, bbox = self.tracker.update(frame)
+            if not ok or not self._inside(bbox, frame) or self.since_detect >= DETECT_EVERY:
+                # 추적 실패 또는 주기적 재확인
+                self._run_detector(frame)
+            else:
+                self.bbox = tuple(int(v) for v in bbox)
+
+        if self.bbox is None:
+            return {'detected': False, 'x': None, 'area': 0, 'bbox': None}
+
+        x, y, w, h = self.bbox
+        return {
+            'detected': True,
+            'x': x + w // 2,
+            'area': w * h,
+            'bbox': self.bbox
+        }
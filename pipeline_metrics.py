@@ -0,0 +1,208 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 파이프라인 운영 지표: 프로세스 내 카운터/게이지/히스토그램 -> Prometheus 텍스트 + JSON 스냅샷
+# (단계별 처리 시간은 결과 저장소 stage_timings, 여기는 처리량/큐/캐시/실패 집계)
+METRICS_DIR = "/Users/aisoft/Documents/TUG/metrics"
+PROM_FILENAME = "tug_pipeline.prom"
+SNAPSHOT_FILENAME = "tug_pipeline.json"
+# 로컬 HTTP 엔드포인트 포트 (None = 파일로만 내보냄)
+METRICS_PORT = None
+
+# 히스토그램 버킷 상한
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+FPS_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
+
+# 이름 -> (종류, 설명, 버킷)
+METRICS = {
+    'tug_videos_total': ('counter', "처리 완료 영상 수 (status, detector_version별)", None),
+    'tug_frames_total': ('counter', "감지 루프에서 처리한 프레임 수 (worker별)", None),
+    'tug_scan_seconds_total': ('counter', "감지 루프 처리 시간 합 (worker별)", None),
+    'tug_cache_requests_total': ('counter', "캐시 조회 수 (cache, result=hit/miss별)", None),
+    'tug_audio_cues_total': ('counter', "오디오 시작 신호 교차 확인 결과 (status별)", None),
+    'tug_queue_depth': ('gauge', "대기 + 처리 중 작업 수 (queue별)", None),
+    'tug_batch_started_timestamp': ('gauge', "현재 배치 시작 시각 (unix 초)", None),
+    'tug_stage_seconds': ('histogram', "단계별 처리 시간 (stage별)", SECONDS_BUCKETS),
+    'tug_video_seconds': ('histogram', "영상 하나 전체 처리 시간", SECONDS_BUCKETS),
+    'tug_queue_wait_seconds': ('histogram', "작업 등록부터 워커 처리 시작까지 대기 시간", SECONDS_BUCKETS),
+    'tug_scan_fps': ('histogram', "감지 루프 초당 처리 프레임 (작업 단위)", FPS_BUCKETS),
+}
+
+
+def _key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    """정수는 그대로, 실수는 전체 정밀도 ({:g}는 유효숫자 6자리라 100만 넘는 카운터가 멈춘 것처럼 보임)"""
+    if isinstance(value, int):
+        return str(int(value))  # bool -> 0/1
+    return repr(float(value))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class MetricsRegistry:
+    """스레드 안전한 지표 저장소 (라벨 조합마다 값 하나)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {name: {} for name in METRICS}
+        self.created = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = _key(labels)
+        with self.lock:
+            series = self.values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.values[name][_key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        """히스토그램 관측 - 버킷별 개수 (누적은 내보낼 때 계산)"""
+        buckets = METRICS[name][2]
+        key = _key(labels)
+        with self.lock:
+            series = self.values[name]
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = {'counts': [0] * (len(buckets) + 1), 'sum': 0.0, 'count': 0}
+            hist['counts'][bisect.bisect_left(buckets, value)] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def reset(self):
+        with self.lock:
+            self.values = {name: {} for name in METRICS}
+            self.created = time.time()
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식 (0.0.4)"""
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, buckets) in METRICS.items():
+                series = self.values[name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(series.items()):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    bounds = [f"{b:g}" for b in buckets] + ['+Inf']
+                    for bound, count in zip(bounds, value['counts']):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """배치 종료 시점 JSON 요약: 원시 값 + 운영용 파생 지표"""
+        with self.lock:
+            values = {name: {','.join(f"{k}={v}" for k, v in key): value for key, value in series.items()}
+                      for name, series in self.values.items() if series}
+            raw = {name: dict(series) for name, series in self.values.items()}
+        # 배치 실행기가 시작 시각을 기록했으면 그 기준, 아니면 프로세스(지표 생성) 기준
+        elapsed = time.time() - raw['tug_batch_started_timestamp'].get((), self.created)
+
+        done = sum(raw['tug_videos_total'].values())
+        frames = {dict(k).get('worker', ''): v for k, v in raw['tug_frames_total'].items()}
+        seconds = {dict(k).get('worker', ''): v for k, v in raw['tug_scan_seconds_total'].items()}
+        failures = {}
+        for key, count in raw['tug_videos_total'].items():
+            labels = dict(key)
+            if labels.get('status') == 'failed':
+                version = labels.get('detector_version', '')
+                failures[version] = failures.get(version, 0) + count
+        caches = {}
+        for key, count in raw['tug_cache_requests_total'].items():
+            labels = dict(key)
+            entry = caches.setdefault(labels.get('cache', ''), {'hit': 0, 'miss': 0})
+            entry[labels.get('result', 'miss')] += count
+
+        return {
+            'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed_sec': round(elapsed, 3),
+            'videos': done,
+            'videos_per_hour': round(done * 3600 / elapsed, 2) if elapsed > 0 else 0.0,
+            'worker_fps': {w: round(frames[w] / seconds[w], 1) for w in frames if seconds.get(w)},
+            'cache_hit_rate': {name: round(c['hit'] / (c['hit'] + c['miss']), 4)
+                               for name, c in caches.items() if c['hit'] + c['miss']},
+            'failures_by_detector_version': failures,
+            'metrics': values,
+        }
+
+
+# 프로세스 전역 지표 (배치 실행기/감지 루프/서비스가 함께 사용)
+registry = MetricsRegistry()
+
+
+def write_textfile(path=None, metrics=registry):
+    """node_exporter textfile collector용 .prom 파일 (임시 파일 후 교체 - 읽는 쪽이 반쪽 파일을 보지 않게)"""
+    path = path or os.path.join(METRICS_DIR, PROM_FILENAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(metrics.render_prometheus())
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_snapshot(path=None, metrics=registry):
+    path = path or os.path.join(METRICS_DIR, SNAPSHOT_FILENAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics.snapshot(), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def export(output_dir=METRICS_DIR, metrics=registry):
+    """배치 종료 시 .prom + .json 저장 -> (prom 경로, json 경로)"""
+    prom_path = write_textfile(os.path.join(output_dir, PROM_FILENAME), metrics)
+    json_path = write_snapshot(os.path.join(output_dir, SNAPSHOT_FILENAME), metrics)
+    print(f"  지표 저장: {prom_path}, {os.path.basename(json_path)}")
+    return prom_path, json_path
+
+
+def start_http_server(port=METRICS_PORT, metrics=registry, host='127.0.0.1'):
+    """GET /metrics 로컬 엔드포인트 (데몬 스레드) -> 서버 (port가 None이면 실행 안 함)"""
+    if port is None:
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # 스크레이프마다 로그 남기지 않음
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"지표 엔드포인트: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from batch_manifest import content_hash
+
+# 분석 결과 로컬 SQLite 저장소 - 검증/대시보드/재채점은 감지를 다시 돌리지 않고 여기서 조회
+RESULTS_DB = "/Users/aisoft/Documents/TUG/results.sqlite"
+
+# 이만큼 쌓이면 한 트랜잭션으로 기록 (행마다 커밋하면 커밋/디스크 동기화 비용이 기록마다 붙음)
+BATCH_SIZE = 500
+
+# 환자/세션을 따로 넘길 수 없는 경로(감시 폴더, 일괄 처리)용 파일 이름 규칙: "<환자ID>__<세션ID>__<원래 이름>.mp4"
+SUBJECT_SEPARATOR = '__'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    video_hash TEXT NOT NULL,
+    file TEXT NOT NULL,
+    patient_id TEXT,
+    session_id TEXT,
+    trial INTEGER,
+    detector_version TEXT NOT NULL,
+    detector_params TEXT,
+    status TEXT NOT NULL,
+    start_frame INTEGER,
+    finish_frame INTEGER,
+    start_x INTEGER,
+    finish_x INTEGER,
+    start_time REAL,
+    finish_time REAL,
+    duration_sec REAL,
+    fps REAL,
+    total_frames INTEGER,
+    width INTEGER,
+    height INTEGER,
+    phases TEXT,
+    outputs TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_hash ON runs (video_hash, created);
+CREATE INDEX IF NOT EXISTS idx_runs_file ON runs (file, status, created);
+CREATE INDEX IF NOT EXISTS idx_runs_patient ON runs (patient_id, session_id, created);
+CREATE INDEX IF NOT EXISTS idx_runs_version ON runs (detector_version, status, file);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_timings_stage ON stage_timings (stage, seconds);
+"""
+
+RUN_COLUMNS = ('id', 'video_hash', 'file', 'patient_id', 'session_id', 'trial', 'detector_version',
+               'detector_params', 'status', 'start_frame', 'finish_frame', 'start_x', 'finish_x', 'start_time', 'finish_time',
+               'duration_sec', 'fps', 'total_frames', 'width', 'height', 'phases', 'outputs', 'created')
+JSON_COLUMNS = ('detector_params', 'phases', 'outputs')
+# 목록 조회는 검출 파라미터 JSON 제외 (행마다 디코딩하면 조회 시간 대부분을 차지)
+LIST_COLUMNS = ', '.join(c for c in RUN_COLUMNS if c != 'detector_params')
+
+_INSERT_RUN = f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({', '.join('?' * len(RUN_COLUMNS))})"
+_INSERT_TIMING = "INSERT INTO stage_timings (run_id, stage, seconds) VALUES (?, ?, ?)"
+
+
+def subject_from_filename(file):
+    """파일 이름 규칙 -> (patient_id, session_id). 규칙에 맞지 않으면 (None, None)"""
+    parts = os.path.basename(file).split(SUBJECT_SEPARATOR)
+    if len(parts) < 3 or not parts[0] or not parts[1]:
+        return None, None
+    return parts[0], parts[1]
+
+
+class ResultsStore:
+    """결과 저장소 - 기록은 메모리에 모았다가 BATCH_SIZE마다 한 트랜잭션으로 flush
+
+    SQLite 쓰기는 한 프로세스에서만: 풀 워커는 결과를 반환하고 부모 프로세스가 record()로 모음"""
+
+    def __init__(self, path=RESULTS_DB, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self._params_json = (None, None)  # 같은 파라미터 dict는 한 번만 직렬화
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # WAL: 기록 중에도 대시보드/검증 스크립트가 읽을 수 있음
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        # 시행 번호 열이 없던 이전 저장소
+        if 'trial' not in {row['name'] for row in self.conn.execute("PRAGMA table_info(runs)")}:
+            self.conn.execute("ALTER TABLE runs ADD COLUMN trial INTEGER")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, video_hash, file, result=None, status='done', params=None,
+               patient_id=None, session_id=None, timings=None):
+        """한 영상 분석 기록 추가 (result는 analyze_and_output 결과 dict, 없으면 상태만)
+
+        시행이 여러 번인 영상(result['trials'])은 시행마다 한 행 (단계별 처리 시간은 첫 행에만)
+        patient_id/session_id를 둘 다 주지 않으면 파일 이름 규칙(subject_from_filename)에서 읽음"""
+        result = result or {}
+        params = params or {}
+        if patient_id is None and session_id is None:
+            patient_id, session_id = subject_from_filename(file)
+        if result.get('trials'):
+            for i, trial in enumerate(result['trials']):
+                self.record(video_hash, file, trial, status, params, patient_id, session_id,
+                            (timings or result.get('timings')) if i == 0 else {})
+            return
+        if self._params_json[0] is not params:
+            self._params_json = (params, json.dumps(params, sort_keys=True))
+        start_time, finish_time = result.get('start_time'), result.get('finish_time')
+        row = {
+            'video_hash': video_hash,
+            'file': file,
+            'patient_id': patient_id,
+            'session_id': session_id,
+            'trial': result.get('trial'),
+            'detector_version': params.get('version', 'unknown'),
+            'detector_params': self._params_json[1],
+            'status': status,
+            'start_frame': result.get('start_frame'),
+            'finish_frame': result.get('finish_frame'),
+            'start_x': result.get('start_x'),
+            'finish_x': result.get('finish_x'),
+            'start_time': start_time,
+            'finish_time': finish_time,
+            'duration_sec': round(finish_time - start_time, 3) if start_time is not None and finish_time is not None else None,
+            'fps': result.get('fps'),
+            'total_frames': result.get('total_frames'),
+            'width': result.get('width'),
+            'height': result.get('height'),
+            'phases': json.dumps(result['phases'], ensure_ascii=False) if result.get('phases') else None,
+            'outputs': json.dumps(result['outputs'], ensure_ascii=False) if result.get('outputs') else None,
+            'created': time.time(),
+        }
+        self.pending.append((row, timings or result.get('timings') or {}))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """쌓인 기록을 한 트랜잭션으로 (id를 미리 정해 runs/stage_timings를 각각 executemany)"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM runs").fetchone()[0]
+            runs = []
+            timings = []
+            for i, (row, stages) in enumerate(pending):
+                run_id = next_id + i
+                runs.append((run_id, *(row[c] for c in RUN_COLUMNS[1:])))
+                timings.extend((run_id, stage, float(seconds)) for stage, seconds in stages.items())
+            conn.executemany(_INSERT_RUN, runs)
+            conn.executemany(_INSERT_TIMING, timings)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            self.pending = pending + self.pending
+            raise
+        return len(pending)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------
+
+    def _to_dict(self, row):
+        if row is None:
+            return None
+        run = dict(row)
+        for c in JSON_COLUMNS:
+            if run.get(c) is not None:
+                run[c] = json.loads(run[c])
+        return run
+
+    def latest(self, file=None, video_hash=None, version=None, status='done'):
+        """파일 이름 또는 해시로 가장 최근 기록 (인덱스 조회)"""
+        where, args = ["status = ?"], [status]
+        if file is not None:
+            where.append("file = ?")
+            args.append(file)
+        if video_hash is not None:
+            where.append("video_hash = ?")
+            args.append(video_hash)
+        if version is not None:
+            where.append("detector_version = ?")
+            args.append(version)
+        row = self.conn.execute(
+            f"SELECT * FROM runs WHERE {' AND '.join(where)} ORDER BY created DESC, id DESC LIMIT 1", args
+        ).fetchone()
+        return self._to_dict(row)
+
+    def latest_runs(self, version=None, status='done'):
+        """파일별 가장 최근 기록 목록"""
+        args = [status]
+        version_clause = ""
+        if version is not None:
+            version_clause = "AND detector_version = ?"
+            args.append(version)
+        rows = self.conn.execute(f"""
+            SELECT {LIST_COLUMNS} FROM runs WHERE id IN (
+                SELECT MAX(id) FROM runs WHERE status = ? {version_clause} GROUP BY file
+            ) ORDER BY file
+        """, args).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def patient_runs(self, patient_id, session_id=None):
+        """환자(세션)별 기록 - 시간순"""
+        if session_id is None:
+            rows = self.conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM runs WHERE patient_id = ? ORDER BY session_id, created", (patient_id,))
+        else:
+            rows = self.conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM runs WHERE patient_id = ? AND session_id = ? ORDER BY created",
+                (patient_id, session_id))
+        return [self._to_dict(r) for r in rows]
+
+    def duration_summary(self, version=None):
+        """검출 버전별 TUG 소요 시간 통계 (대시보드)"""
+        sql = """
+            SELECT detector_version, COUNT(*) AS runs, AVG(duration_sec) AS mean_sec,
+                   MIN(duration_sec) AS min_sec, MAX(duration_sec) AS max_sec
+            FROM runs WHERE status = 'done' {} GROUP BY detector_version
+        """
+        if version is None:
+            rows = self.conn.execute(sql.format(""))
+        else:
+            rows = self.conn.execute(sql.format("AND detector_version = ?"), (version,))
+        return [dict(r) for r in rows]
+
+    def stage_summary(self):
+        """단계별 처리 시간 합계/평균"""
+        rows = self.conn.execute("""
+            SELECT stage, COUNT(*) AS runs, SUM(seconds) AS total_sec, AVG(seconds) AS mean_sec
+            FROM stage_timings GROUP BY stage ORDER BY total_sec DESC
+        """)
+        return [dict(r) for r in rows]
+
+
+def record_run(video_path, result=None, status='done', params=None, file=None, path=RESULTS_DB,
+               patient_id=None, session_id=None):
+    """영상 하나씩 처리하는 경로(서비스/CLI)용: 연결을 따로 열어 바로 커밋하고 닫음 (모아 두다 잃지 않게)
+
+    file: 저장할 파일 이름 (업로드 임시 경로처럼 원래 이름과 다를 때)"""
+    with ResultsStore(path) as store:
+        store.record(content_hash(video_path), file or os.path.basename(video_path), result, status=status,
+                     params=params, patient_id=patient_id, session_id=session_id)
+
+
+# ============================================================
+# 벤치마크
+# ============================================================
+
+def _synthetic_result(rng, i):
+    fps = 30.0
+    start = int(rng.integers(20, 200))
+    finish = start + int(rng.integers(200, 900))
+    return {
+        'start_frame': start, 'finish_frame': finish,
+        'start_x': int(rng.integers(0, 1920)), 'finish_x': int(rng.integers(0, 1920)),
+        'start_time': start / fps, 'finish_time': finish / fps,
+        'fps': fps, 'total_frames': finish + 100, 'width': 1920, 'height': 1080,
+        'phases': {'sitToStand': '1.2', 'walkGo': '3.1', 'turn': '1.4', 'walkBack': '3.0', 'standToSit': '1.5'},
+        'outputs': [f"/tmp/clip_{i:06d}.tug.json"],
+        'timings': {'detect': float(rng.random() * 5), 'phases': float(rng.random() * 0.05),
+                    'sidecar': float(rng.random() * 0.01)},
+    }
+
+
+def benchmark(rows=100_000, lookups=10_000):
+    """10만 개 영상 아카이브 규모: 일괄 기록 / 행별 커밋 / 인덱스 조회 속도"""
+    from motion_detect_v3 import DETECTOR_PARAMS
+
+    rng = np.random.default_rng(0)
+    work_dir = tempfile.mkdtemp(prefix='tug_results_')
+    print(f"\n{'='*60}")
+    print(f"결과 저장소 벤치마크 ({rows}개 기록)")
+    print(f"{'='*60}")
+
+    results = [_synthetic_result(rng, i) for i in range(rows)]
+    patients = rng.integers(0, rows // 20, rows)
+
+    # 행마다 커밋 (기존 방식에 해당) - 일부만 측정
+    sample = min(2000, rows)
+    store = ResultsStore(os.path.join(work_dir, 'per_row.sqlite'), batch_size=1)
+    started = time.perf_counter()
+    for i in range(sample):
+        store.record(f"b2:{i:032x}", f"clip_{i:06d}.mp4", results[i], params=DETECTOR_PARAMS)
+    per_row = sample / (time.perf_counter() - started)
+    store.close()
+    print(f"  행별 커밋:   {per_row:10.0f} 기록/초 ({sample}개)")
+
+    store = ResultsStore(os.path.join(work_dir, 'batched.sqlite'))
+    started = time.perf_counter()
+    for i in range(rows):
+        store.record(f"b2:{i:032x}", f"clip_{i:06d}.mp4", results[i], params=DETECTOR_PARAMS,
+                     patient_id=f"P{patients[i]:05d}", session_id=f"S{i % 4}")
+    store.flush()
+    batched = rows / (time.perf_counter() - started)
+    print(f"  일괄 기록:   {batched:10.0f} 기록/초 (트랜잭션당 {BATCH_SIZE}개, {batched / per_row:.0f}배)")
+
+    targets = rng.integers(0, rows, lookups)
+    started = time.perf_counter()
+    for i in targets:
+        store.latest(file=f"clip_{i:06d}.mp4")
+    print(f"  파일 조회:   {lookups / (time.perf_counter() - started):10.0f} 조회/초")
+
+    started = time.perf_counter()
+    for i in targets[:lookups // 10]:
+        store.patient_runs(f"P{patients[i]:05d}")
+    print(f"  환자 조회:   {lookups // 10 / (time.perf_counter() - started):10.0f} 조회/초")
+
+    started = time.perf_counter()
+    latest = store.latest_runs(version=DETECTOR_PARAMS['version'])
+    summary = store.duration_summary()
+    stages = store.stage_summary()
+    print(f"  전체 집계:   {(time.perf_counter() - started) * 1000:10.1f}ms "
+          f"(최근 기록 {len(latest)}개, 버전 {len(summary)}개, 단계 {len(stages)}개)")
+    store.close()
+    print(f"  DB 크기: {os.path.getsize(os.path.join(work_dir, 'batched.sqlite')) / 1e6:.1f}MB")
+
+
+def main():
+    benchmark()
+
+    if os.path.exists(RESULTS_DB):
+        with ResultsStore() as store:
+            print(f"\n{'='*60}")
+            print(f"저장된 결과: {RESULTS_DB}")
+            print(f"{'='*60}")
+            for row in store.duration_summary():
+                print(f"  {row['detector_version']}: {row['runs']}개, 평균 {row['mean_sec']:.2f}초 "
+                      f"({row['min_sec']:.2f} ~ {row['max_sec']:.2f})")
+            for row in store.stage_summary():
+                print(f"  {row['stage']}: 평균 {row['mean_sec']:.3f}초, 합계 {row['total_sec']:.1f}초")
+
+
+if __name__ == "__main__":
+    main()
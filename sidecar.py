@@ -0,0 +1,163 @@
+import json
+import os
+import glob
+
+# 플레이어가 직접 그리는 START/FINISH 선 정보 (재인코딩 없이)
+SIDECAR_VERSION = 1
+
+# 선 그리기 영역 (화면 하단 25%) - process_video와 동일
+LINE_TOP_RATIO = 0.75
+
+LINE_STYLES = {
+    'START': {'color': '#FF0000', 'bgr': (0, 0, 255)},
+    'FINISH': {'color': '#0000FF', 'bgr': (255, 0, 0)},
+}
+
+
+def _vtt_timestamp(seconds):
+    """초 -> WebVTT 타임스탬프 (HH:MM:SS.mmm)"""
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+
+def build_sidecar(video_path, settings):
+    """감지 결과로 사이드카 데이터 생성"""
+    fps = settings['fps']
+    width = settings['width']
+    height = settings['height']
+    total_frames = settings['total_frames']
+    duration = total_frames / fps if fps else 0
+
+    # 시행별 사이드카는 그 시행 끝에서 선을 내림 (tug_trials line_end_frame), 아니면 영상 끝까지
+    end_frame = settings.get('line_end_frame', total_frames - 1)
+    end_time = settings.get('line_end_time', duration)
+
+    lines = []
+    for label in ('START', 'FINISH'):
+        frame = settings.get(f"{label.lower()}_frame")
+        x = settings.get(f"{label.lower()}_x")
+        if frame is None or x is None:
+            continue
+        lines.append({
+            'label': label,
+            'x': x,
+            'x_ratio': round(x / width, 5) if width else None,
+            'from_frame': frame,
+            'to_frame': end_frame,
+            'from_time': round(settings.get(f"{label.lower()}_time", frame / fps if fps else 0), 3),
+            'to_time': round(end_time, 3),
+            'color': LINE_STYLES[label]['color'],
+        })
+
+    # 타임라인은 프레임별 배열로 압축 저장 (dict 리스트보다 훨씬 작음)
+    timeline = settings.get('timeline') or []
+    compact_timeline = {
+        'first_frame': timeline[0]['frame'] if timeline else 0,  # 시행/오디오 구간만 감지한 경우
+        'detected': [1 if d['detected'] else 0 for d in timeline],
+        'x': [d['x'] for d in timeline],
+        'area': [int(d['area']) for d in timeline],
+    }
+
+    return {
+        'version': SIDECAR_VERSION,
+        'source': os.path.basename(video_path),
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'total_frames': total_frames,
+        'duration': round(duration, 3),
+        'line_top_ratio': LINE_TOP_RATIO,
+        'lines': lines,
+        'timeline': compact_timeline,
+        'audio_cue': settings.get('audio_cue'),
+    }
+
+
+def build_webvtt(sidecar):
+    """사이드카 선 정보를 WebVTT 메타데이터 트랙으로 변환"""
+    out = ["WEBVTT", "Kind: metadata", ""]
+    for i, line in enumerate(sidecar['lines'], start=1):
+        payload = {
+            'label': line['label'],
+            'x_ratio': line['x_ratio'],
+            'top_ratio': sidecar['line_top_ratio'],
+            'color': line['color'],
+        }
+        out.append(str(i))
+        out.append(f"{_vtt_timestamp(line['from_time'])} --> {_vtt_timestamp(line['to_time'])}")
+        out.append(json.dumps(payload, ensure_ascii=False))
+        out.append("")
+    return "\n".join(out)
+
+
+def write_sidecar(video_path, output_base, settings):
+    """<output_base>.tug.json 과 <output_base>.tug.vtt 저장"""
+    sidecar = build_sidecar(video_path, settings)
+
+    json_path = f"{output_base}.tug.json"
+    vtt_path = f"{output_base}.tug.vtt"
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False, separators=(',', ':'))
+
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write(build_webvtt(sidecar))
+
+    return json_path, vtt_path
+
+
+def load_sidecar(json_path):
+    """사이드카 JSON 로드"""
+    with open(json_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def settings_from_sidecar(sidecar):
+    """사이드카 -> process_video 설정 dict"""
+    settings = {
+        'fps': sidecar['fps'],
+        'width': sidecar['width'],
+        'height': sidecar['height'],
+        'total_frames': sidecar['total_frames'],
+        'start_frame': None,
+        'start_x': None,
+        'finish_frame': None,
+        'finish_x': None,
+    }
+    for line in sidecar['lines']:
+        key = line['label'].lower()
+        settings[f"{key}_frame"] = line['from_frame']
+        settings[f"{key}_x"] = line['x']
+    return settings
+
+
+def render_deferred(video_dir, sidecar_dir, output_dir):
+    """사이드카만 있고 아직 렌더링되지 않은 영상을 나중에 일괄 렌더링"""
+    from motion_detect_v3 import process_video
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for json_path in sorted(glob.glob(os.path.join(sidecar_dir, "*.tug.json"))):
+        sidecar = load_sidecar(json_path)
+        input_path = os.path.join(video_dir, sidecar['source'])
+        output_path = os.path.join(output_dir, f"marked_{sidecar['source']}")
+
+        if os.path.exists(output_path):
+            continue
+        if not os.path.exists(input_path):
+            print(f"  원본 없음: {input_path}")
+            continue
+
+        print(f"  렌더링: {sidecar['source']}")
+        process_video(input_path, output_path, settings_from_sidecar(sidecar))
+
+
+if __name__ == "__main__":
+    render_deferred(
+        "/Users/aisoft/Documents/TUG",
+        "/Users/aisoft/Documents/TUG/final_output",
+        "/Users/aisoft/Documents/TUG/final_output",
+    )
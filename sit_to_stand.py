@@ -0,0 +1,537 @@
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from bbs_analysis import POSE_LANDMARKS, load_landmarks
+
+# src/utils/sitToStandAnalysis.js (BBS 항목 1) 상태 기계를 저장된 랜드마크 배열 (T x 33 x 4)로 재생
+# 롤링 히스토리는 누적합으로, 상태 안정화만 미리 계산한 배열 위에서 짧은 정수 반복문으로 처리
+JS_MODULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "utils", "sitToStandAnalysis.js")
+TRIAL_DIR = "/Users/aisoft/Documents/BBS/landmarks/item1"
+
+# 상태 코드
+UNKNOWN, SITTING, STANDING = 0, 1, 2
+STATE_NAMES = ('unknown', 'sitting', 'standing')
+
+HAND_POSITIONS = ('unknown', 'hands_up', 'hands_on_knee', 'hands_pushing')
+HAND_SUPPORTS = ('unknown', 'no_support', 'light_support', 'heavy_support')
+POS_UNKNOWN, POS_UP, POS_ON_KNEE, POS_PUSHING = range(4)
+SUP_UNKNOWN, SUP_NONE, SUP_LIGHT, SUP_HEAVY = range(4)
+
+# JS 상수와 같은 기본값 - 재분석 시 일부만 바꿔서 넘길 수 있음
+DEFAULT_THRESHOLDS = {
+    'state_history_size': 30,        # STATE_HISTORY_SIZE
+    'state_confirm_threshold': 10,   # STATE_CONFIRM_THRESHOLD
+    'height_history_size': 30,       # HEIGHT_HISTORY_SIZE
+    'wrist_history_size': 30,        # WRIST_HISTORY_SIZE
+    'sitting_confidence': 35,        # detectSitting 최종 판정
+    'standing_confidence': 55,       # detectStanding 최종 판정
+    'push_rise_ratio': 0.4,          # 어깨 상승 대비 손목 상승률이 이 미만이면 밀기
+    'knee_frames': 6,                # 최근 손목 히스토리 중 무릎 영역 프레임 수
+}
+
+# 앱 analysisHistoryRef 최대 길이 (점수는 완료 시점의 최근 150개로 계산)
+SCORE_HISTORY_FRAMES = 150
+
+
+def _y(landmarks, name):
+    return landmarks[:, POSE_LANDMARKS[name], 1]
+
+
+def _x(landmarks, name):
+    return landmarks[:, POSE_LANDMARKS[name], 0]
+
+
+def _vis(landmarks, name):
+    return np.nan_to_num(landmarks[:, POSE_LANDMARKS[name], 3])
+
+
+def _or(value, fallback):
+    """JS `value || fallback` (0/NaN이면 fallback)"""
+    return np.where(np.isnan(value) | (value == 0), fallback, value)
+
+
+def _angle(landmarks, a, b, c):
+    """sitToStandAnalysis.js calculateAngle (atan2 차이, 180도 초과는 반대각)"""
+    ax, ay = landmarks[:, POSE_LANDMARKS[a], 0], landmarks[:, POSE_LANDMARKS[a], 1]
+    bx, by = landmarks[:, POSE_LANDMARKS[b], 0], landmarks[:, POSE_LANDMARKS[b], 1]
+    cx, cy = landmarks[:, POSE_LANDMARKS[c], 0], landmarks[:, POSE_LANDMARKS[c], 1]
+    radians = np.arctan2(cy - by, cx - bx) - np.arctan2(ay - by, ax - bx)
+    angle = np.abs(radians * 180.0 / np.pi)
+    return np.where(angle > 180, 360 - angle, angle)
+
+
+def _visible_angle(landmarks, a, b, c):
+    """세 점 모두 보일 때만 각도, 아니면 180"""
+    visible = (_vis(landmarks, a) > 0.3) & (_vis(landmarks, b) > 0.3) & (_vis(landmarks, c) > 0.3)
+    return np.where(visible, _angle(landmarks, a, b, c), 180.0)
+
+
+def trailing_mean(values, size):
+    """각 위치에서 최근 size개 (앞쪽은 있는 만큼) 평균 - 누적합 O(n)"""
+    n = len(values)
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    idx = np.arange(1, n + 1)
+    lo = np.maximum(idx - size, 0)
+    return (csum[idx] - csum[lo]) / (idx - lo)
+
+
+def _window_slice_mean(values, window, k, from_start):
+    """최근 window개 히스토리에서 앞쪽(from_start) 또는 뒤쪽 k개 평균 (JS slice(0, k) / slice(-k))"""
+    n = len(values)
+    csum = np.concatenate([[0.0], np.cumsum(values)])
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    count = np.minimum(end - start, k)
+    if from_start:
+        return (csum[start + count] - csum[start]) / count
+    return (csum[end] - csum[end - count]) / count
+
+
+def _scatter(values, mask, fill):
+    """유효 프레임만 모아 계산한 값을 전체 프레임 위치로 (나머지는 fill)"""
+    out = np.full(len(mask), fill, dtype=np.float64)
+    out[mask] = values
+    return out
+
+
+# ============================================================
+# 앉음 / 서있음 신뢰도 (정면 인식 다중 지표)
+# ============================================================
+
+def posture_confidences(landmarks, thresholds):
+    """프레임별 (앉음 신뢰도, 서있음 신뢰도, 유효 프레임) - detectSitting / detectStanding"""
+    n = len(landmarks)
+    hip_vis = (_vis(landmarks, 'LEFT_HIP') + _vis(landmarks, 'RIGHT_HIP')) / 2
+    knee_vis = (_vis(landmarks, 'LEFT_KNEE') + _vis(landmarks, 'RIGHT_KNEE')) / 2
+    shoulder_vis = (_vis(landmarks, 'LEFT_SHOULDER') + _vis(landmarks, 'RIGHT_SHOULDER')) / 2
+    valid = (hip_vis >= 0.3) & (shoulder_vis >= 0.3)
+
+    shoulder_y = (_y(landmarks, 'LEFT_SHOULDER') + _y(landmarks, 'RIGHT_SHOULDER')) / 2
+    shoulder_x = (_x(landmarks, 'LEFT_SHOULDER') + _x(landmarks, 'RIGHT_SHOULDER')) / 2
+    hip_y = (_y(landmarks, 'LEFT_HIP') + _y(landmarks, 'RIGHT_HIP')) / 2
+    hip_x = (_x(landmarks, 'LEFT_HIP') + _x(landmarks, 'RIGHT_HIP')) / 2
+    knee_mid_y = (_y(landmarks, 'LEFT_KNEE') + _y(landmarks, 'RIGHT_KNEE')) / 2
+    knee_mid_x = (_x(landmarks, 'LEFT_KNEE') + _x(landmarks, 'RIGHT_KNEE')) / 2
+    ankle_mid_y = (_y(landmarks, 'LEFT_ANKLE') + _y(landmarks, 'RIGHT_ANKLE')) / 2
+    nose_y = _or(_y(landmarks, 'NOSE'), shoulder_y - 0.15)
+
+    # 머리 높이 히스토리는 유효 프레임에서만 쌓임 -> 유효 프레임만 모아 이동 평균
+    k = np.cumsum(valid) - 1  # 유효 프레임 순번
+    valid_nose = nose_y[valid]
+    avg_head = _scatter(trailing_mean(valid_nose, thresholds['height_history_size']), valid, np.nan)
+    has_baseline = valid & (k >= 4)
+    initial_height = valid_nose[:5].min() if len(valid_nose) >= 5 else np.nan
+    height_drop = avg_head - initial_height
+
+    knee_ok = knee_vis > 0.3
+    knee_angle = np.where(knee_ok, (_visible_angle(landmarks, 'LEFT_HIP', 'LEFT_KNEE', 'LEFT_ANKLE') +
+                                    _visible_angle(landmarks, 'RIGHT_HIP', 'RIGHT_KNEE', 'RIGHT_ANKLE')) / 2, 180.0)
+    torso = np.abs(shoulder_y - hip_y)
+
+    # --- 앉음 ---
+    knee_y = np.where(knee_ok, knee_mid_y, hip_y + 0.2)
+    knee_x = np.where(knee_ok, knee_mid_x, hip_x)
+    ankle_y = _or(ankle_mid_y, knee_y + 0.2)
+    ratio = np.where(torso > 0.05, np.abs(hip_y - ankle_y) / torso, 2.0)
+    hip_knee = knee_y - hip_y
+
+    sit = np.zeros(n)
+    sit = sit + np.where(ratio < 1.4, np.minimum(1, (1.4 - ratio) / 0.9) * 40, 0)
+    sit = sit + np.where(hip_knee < 0.12, np.minimum(1, (0.18 - hip_knee) / 0.18) * 35, 0)
+    sit = sit + np.where(has_baseline & (height_drop > 0.08), np.minimum(1, height_drop / 0.2) * 20, 0)
+    in_range = knee_ok & (knee_angle >= 50) & (knee_angle <= 140)
+    sit = sit + np.where(in_range, (1 - np.abs(knee_angle - 95) / 55) * 15, 0)
+    alignment = np.abs(shoulder_x - hip_x) + np.abs(hip_x - knee_x)
+    sit = sit + np.where((alignment < 0.1) & (ratio < 1.3), 10, 0)
+
+    # --- 서있음 ---
+    knee_y = _or(knee_mid_y, hip_y + 0.3)
+    ankle_y = _or(ankle_mid_y, knee_y + 0.3)
+    ratio = np.where(torso > 0.05, np.abs(hip_y - ankle_y) / torso, 0.5)
+    hip_knee = knee_y - hip_y
+
+    stand = np.zeros(n)
+    stand = stand + np.where(ratio > 1.5, np.minimum(1, (ratio - 1.3) / 1.0) * 35, 0)
+    stand = stand + np.where(hip_knee > 0.15, np.minimum(1, (hip_knee - 0.12) / 0.15) * 30, 0)
+    stand = stand + np.where(has_baseline & (height_drop < 0.05), 20, 0)
+    stand = stand + np.where(valid & (k < 4), 15, 0)  # 기준 높이 설정 전에는 서있다고 가정
+    stand = stand + np.where(knee_ok & (knee_angle >= 150), np.minimum(1, (knee_angle - 140) / 30) * 15, 0)
+    stand = stand + np.where(ankle_y - shoulder_y > 0.5, 10, 0)
+
+    sit = np.where(valid, sit, 0.0)
+    stand = np.where(valid, stand, 0.0)
+    return {
+        'sitting_confidence': np.minimum(100, sit),
+        'is_sitting': valid & (sit >= thresholds['sitting_confidence']),
+        'standing_confidence': np.minimum(100, stand),
+        'is_standing': valid & (stand >= thresholds['standing_confidence']),
+        'valid': valid,
+    }
+
+
+def raw_states(postures):
+    """안정화 전 프레임별 상태 (앉음에 약간의 우선권)"""
+    sit, stand = postures['sitting_confidence'], postures['standing_confidence']
+    return np.select(
+        [postures['is_sitting'] & (sit >= stand - 10),
+         postures['is_standing'] & (stand > sit + 10),
+         sit > 30,
+         stand > 50],
+        [SITTING, STANDING, SITTING, STANDING], UNKNOWN).astype(np.int8)
+
+
+# ============================================================
+# 상태 안정화 (getStableState)
+# ============================================================
+
+def majority_states(states, size):
+    """최근 size개 상태 중 최다 상태와 그 개수 (동점이면 창 안에서 먼저 나온 상태 - JS 객체 키 순서)"""
+    n = len(states)
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - size, 0)
+    counts = []
+    firsts = []
+    for code in (UNKNOWN, SITTING, STANDING):
+        hit = states == code
+        csum = np.concatenate([[0], np.cumsum(hit)])
+        counts.append(csum[end] - csum[start])
+        # 각 위치 이후 처음 나오는 위치 (뒤에서부터 누적 최소)
+        next_hit = np.where(hit, np.arange(n), n)
+        next_hit = np.minimum.accumulate(next_hit[::-1])[::-1]
+        firsts.append(next_hit[start])
+    counts = np.stack(counts)
+    firsts = np.stack(firsts)
+    key = counts * (n + 1) - firsts
+    best = np.argmax(key, axis=0)
+    return best.astype(np.int8), counts[best, np.arange(n)], end - start
+
+
+def stable_states(states, thresholds):
+    """히스테리시스 상태 확정 - 다수결/비율은 배열로 미리 계산하고 확정 카운터만 순차 처리"""
+    best, count, length = majority_states(states, thresholds['state_history_size'])
+    strong = (count >= length * 0.8).tolist()
+    half = (count >= length * 0.5).tolist()
+    best = best.tolist()
+    current = states.tolist()
+    need = thresholds['state_confirm_threshold']
+
+    out = []
+    confirmed = None
+    confirm_count = 0
+    for t in range(len(current)):
+        if confirmed is not None:
+            if best[t] == confirmed:
+                confirm_count = 0
+            elif strong[t]:
+                confirm_count += 1
+                if confirm_count >= need:
+                    confirmed = best[t]
+                    confirm_count = 0
+            else:
+                confirm_count = max(0, confirm_count - 1)
+            out.append(confirmed)
+        elif half[t]:
+            confirmed = best[t]
+            out.append(confirmed)
+        else:
+            out.append(current[t])
+    return np.array(out, dtype=np.int8)
+
+
+# ============================================================
+# 손 사용 / 밀기 감지 (detectHandPosition + detectPushingMotion)
+# ============================================================
+
+def hand_support(landmarks, stable, thresholds):
+    n = len(landmarks)
+    wrist_ok = (_vis(landmarks, 'LEFT_WRIST') > 0.3) | (_vis(landmarks, 'RIGHT_WRIST') > 0.3)
+
+    knee_y = _or((_y(landmarks, 'LEFT_KNEE') + _y(landmarks, 'RIGHT_KNEE')) / 2, 0.7)
+    hip_y = _or((_y(landmarks, 'LEFT_HIP') + _y(landmarks, 'RIGHT_HIP')) / 2, 0.5)
+    shoulder_y = _or((_y(landmarks, 'LEFT_SHOULDER') + _y(landmarks, 'RIGHT_SHOULDER')) / 2, 0.3)
+    wrist_y = (_or(_y(landmarks, 'LEFT_WRIST'), 1) + _or(_y(landmarks, 'RIGHT_WRIST'), 1)) / 2
+    elbow = (_visible_angle(landmarks, 'LEFT_SHOULDER', 'LEFT_ELBOW', 'LEFT_WRIST') +
+             _visible_angle(landmarks, 'RIGHT_SHOULDER', 'RIGHT_ELBOW', 'RIGHT_WRIST')) / 2
+
+    on_knee = (wrist_y >= hip_y - 0.1) & (wrist_y <= knee_y + 0.1)
+    below_hip = wrist_y > hip_y + 0.05
+    hands_down = wrist_y > shoulder_y + 0.15
+
+    previous = np.concatenate([[UNKNOWN], stable[:-1]])
+    transitioning = (previous == SITTING) & (stable != SITTING)
+    active = transitioning & wrist_ok  # detectPushingMotion은 손목이 보이는 프레임에서만 실행
+
+    # 손목 히스토리 (손목 보이는 프레임만 쌓임) - 창 앞쪽/뒤쪽 8개 평균, 최근 8개 중 무릎 영역 수
+    size = thresholds['wrist_history_size']
+    history_len = _scatter(np.minimum(np.arange(1, wrist_ok.sum() + 1), size), wrist_ok, 0)
+    old_wrist = _scatter(_window_slice_mean(wrist_y[wrist_ok], size, 8, True), wrist_ok, np.nan)
+    recent_wrist = _scatter(_window_slice_mean(wrist_y[wrist_ok], size, 8, False), wrist_ok, np.nan)
+    old_elbow = _scatter(_window_slice_mean(elbow[wrist_ok], size, 8, True), wrist_ok, np.nan)
+    recent_elbow = _scatter(_window_slice_mean(elbow[wrist_ok], size, 8, False), wrist_ok, np.nan)
+    recent_count = np.minimum(history_len, 8)
+    knee_frames = _scatter(_window_slice_mean(on_knee[wrist_ok].astype(np.float64), size, 8, False),
+                           wrist_ok, 0.0) * recent_count
+
+    # 일어서기 시작 시점 (첫 전환 프레임) 기준 상승량
+    starts = np.flatnonzero(active)
+    is_pushing = np.zeros(n, dtype=bool)
+    if len(starts):
+        s = starts[0]
+        shoulder_rise = shoulder_y[s] - shoulder_y
+        wrist_rise = wrist_y[s] - wrist_y
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rise_ratio = wrist_rise / shoulder_rise
+        check = active & (history_len >= 5)
+        is_pushing = check & (
+            ((shoulder_rise > 0.05) & (rise_ratio < thresholds['push_rise_ratio']) & on_knee) |
+            ((recent_wrist > old_wrist + 0.015) & on_knee) |
+            ((recent_elbow > old_elbow + 12) & on_knee & (shoulder_rise > 0.03)) |
+            ((knee_frames >= thresholds['knee_frames'] - 1e-9) & (shoulder_rise > 0.06))
+        )
+
+    # 전환 중 한 번이라도 -> 이후 계속 유지되는 플래그 (누적 OR)
+    pushed = np.logical_or.accumulate(is_pushing)
+    knee_during = np.logical_or.accumulate(active & on_knee)
+    below_during = np.logical_or.accumulate(active & below_hip)
+
+    sitting_now = (stable == SITTING) & ~transitioning
+    standing_now = stable == STANDING
+    conditions = [
+        ~wrist_ok,
+        sitting_now & on_knee,
+        sitting_now & (below_hip | hands_down),
+        transitioning & (is_pushing | pushed),
+        transitioning & on_knee,
+        transitioning & (below_hip | hands_down),
+        standing_now & pushed,
+        standing_now & knee_during & ~below_during,
+        standing_now,
+    ]
+    position = np.select(conditions, [POS_UNKNOWN, POS_ON_KNEE, POS_UP, POS_PUSHING, POS_ON_KNEE, POS_UP,
+                                      POS_PUSHING, POS_ON_KNEE, POS_UP], POS_UNKNOWN)
+    support = np.select(conditions, [SUP_UNKNOWN, SUP_NONE, SUP_NONE, SUP_HEAVY, SUP_LIGHT, SUP_NONE,
+                                     SUP_HEAVY, SUP_LIGHT, SUP_NONE], SUP_NONE)
+    return {
+        'position': position.astype(np.int8),
+        'support': support.astype(np.int8),
+        'is_pushing': is_pushing,
+        'pushed_during_transition': pushed,
+    }
+
+
+def analyze_trial(landmarks, thresholds=None):
+    """한 시행 전체를 analyzeSitToStand 매 프레임 호출과 같은 결과로 (resetStateHistory 직후부터)"""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+
+    postures = posture_confidences(landmarks, thresholds)
+    stable = stable_states(raw_states(postures), thresholds)
+    hands = hand_support(landmarks, stable, thresholds)
+
+    previous = np.concatenate([[UNKNOWN], stable[:-1]])
+    return {
+        'state': stable,
+        'sitting_confidence': postures['sitting_confidence'],
+        'standing_confidence': postures['standing_confidence'],
+        'hand_position': hands['position'],
+        'hand_support': hands['support'],
+        'is_transitioning': (previous == SITTING) & ((stable == STANDING) | (postures['standing_confidence'] > 30)),
+        # 상태가 바뀌는 프레임 (일괄 추출)
+        'transitions': np.flatnonzero(np.diff(stable)) + 1,
+    }
+
+
+def score_trial(result, end=None):
+    """calculateSitToStandScore - end 프레임(기본 마지막)까지 최근 SCORE_HISTORY_FRAMES개로 채점"""
+    end = len(result['state']) if end is None else end + 1
+    window = slice(max(0, end - SCORE_HISTORY_FRAMES), end)
+    state = result['state'][window]
+    support = result['hand_support'][window]
+    position = result['hand_position'][window]
+    transitioning = result['is_transitioning'][window]
+    if len(state) < 5:
+        return {'score': 0, 'reason': '분석 데이터 부족', 'details': {}}
+
+    had_sitting = bool((state == SITTING).any())
+    had_standing = bool((state == STANDING).any())
+    heavy = bool((support == SUP_HEAVY).any())
+    light = bool((support == SUP_LIGHT).any())
+    hands_down = bool(((position == POS_UP) & transitioning).any())
+    transition_count = int(((state[:-1] == SITTING) & (state[1:] == STANDING)).sum())
+    standing_ratio = float((state == STANDING).mean())
+    details = {
+        'had_sitting': had_sitting,
+        'had_standing': had_standing,
+        'used_hands_heavy': heavy,
+        'used_hands_light': light,
+        'hands_down_during_transition': hands_down,
+        'transition_count': transition_count,
+        'standing_ratio': round(standing_ratio, 3),
+    }
+
+    if not had_sitting or not had_standing:
+        return {'score': 0, 'reason': '앉기/서기 동작 미완료', 'details': details}
+    if heavy:
+        return {'score': 2, 'reason': '무릎을 짚고 밀어서 일어남', 'details': details}
+    if light and not hands_down:
+        return {'score': 3, 'reason': '손이 무릎에 있었으나 밀지 않음', 'details': details}
+    if transition_count >= 1 and (hands_down or (not heavy and not light)):
+        if standing_ratio > 0.2:
+            return {'score': 4, 'reason': '손 사용 없이 안정적으로 일어섬', 'details': details}
+        return {'score': 3, 'reason': '손 사용 없이 일어났으나 약간 불안정', 'details': details}
+    return {'score': 3, 'reason': '약간의 어려움이 있었음', 'details': details}
+
+
+def rescore_trials(paths, thresholds=None):
+    """저장된 시행들을 (새 임계값으로) 다시 채점 {파일 이름: 점수 결과}"""
+    return {os.path.basename(p): score_trial(analyze_trial(load_landmarks(p), thresholds)) for p in paths}
+
+
+# ============================================================
+# JS 결과 비교 / 벤치마크
+# ============================================================
+
+_JS_REFERENCE = r"""
+import fs from 'fs';
+import { analyzeSitToStand, calculateSitToStandScore, resetStateHistory } from '%(module)s';
+
+console.log = () => {};
+const fixture = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+const results = fixture.trials.map(trial => {
+  resetStateHistory();
+  const frames = trial.map(f => f.map(([x, y, z, visibility]) => ({ x, y, z, visibility })));
+  let previous = null;
+  const history = [];
+  const rows = frames.map(landmarks => {
+    const a = analyzeSitToStand(landmarks, previous);
+    previous = a;
+    history.push(a);
+    if (history.length > %(history)d) history.shift();
+    return [a.state, a.sitting.confidence, a.standing.confidence,
+            a.handPosition.position, a.handPosition.support, a.isTransitioning];
+  });
+  return { rows, score: calculateSitToStandScore(history).score };
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+
+def make_trial(frames=240, push=False, rise_sec=1.0, fps=30, seed=0):
+    """정면 합성 시행: 서 있기 -> 앉기 -> rise_sec 동안 일어서기
+    push가 아니면 팔짱 (BBS 지시), push면 일어서는 내내 손으로 무릎을 짚음"""
+    rng = np.random.default_rng(seed)
+    standing = {'NOSE': 0.15, 'SHOULDER': 0.3, 'ELBOW': 0.38, 'WRIST': 0.4, 'HIP': 0.55, 'KNEE': 0.75, 'ANKLE': 0.95}
+    sitting = {'NOSE': 0.33, 'SHOULDER': 0.48, 'ELBOW': 0.56, 'WRIST': 0.58, 'HIP': 0.7, 'KNEE': 0.72, 'ANKLE': 0.95}
+    widths = {'SHOULDER': 0.1, 'ELBOW': 0.12, 'WRIST': 0.03, 'HIP': 0.07, 'KNEE': 0.08, 'ANKLE': 0.08}
+
+    # 0: 서있음, 1: 앉음 사이 보간 비율
+    t = np.arange(frames)
+    a, b, c = (int(frames * r) for r in (0.1, 0.2, 0.45))
+    d = c + int(rise_sec * fps)
+    sit = np.clip(np.minimum((t - a) / max(1, b - a), 1 - (t - c) / max(1, d - c)), 0, 1)
+
+    landmarks = np.zeros((frames, 33, 4))
+    landmarks[..., 0] = 0.5
+    landmarks[..., 3] = 0.95
+    for name, y_stand in standing.items():
+        y = y_stand + (sitting[name] - y_stand) * sit
+        if name == 'NOSE':
+            landmarks[:, POSE_LANDMARKS['NOSE'], 1] = y
+            continue
+        for side, sign in (('LEFT', 1), ('RIGHT', -1)):
+            idx = POSE_LANDMARKS[f'{side}_{name}']
+            landmarks[:, idx, 0] = 0.5 + sign * widths[name]
+            landmarks[:, idx, 1] = y
+
+    if push:
+        # 앉아서부터 일어선 뒤 2초까지 손목은 무릎 위 (상태 확정 지연 동안에도 짚고 있음)
+        on_knee = (t >= b) & (t < d + 2 * fps)
+        knee_y = landmarks[on_knee, POSE_LANDMARKS['LEFT_KNEE'], 1]
+        for side, sign in (('LEFT', 1), ('RIGHT', -1)):
+            landmarks[on_knee, POSE_LANDMARKS[f'{side}_WRIST'], 0] = 0.5 + sign * 0.08
+            landmarks[on_knee, POSE_LANDMARKS[f'{side}_WRIST'], 1] = knee_y - 0.02
+            landmarks[on_knee, POSE_LANDMARKS[f'{side}_ELBOW'], 0] = 0.5 + sign * 0.16
+
+    landmarks[..., :2] += rng.normal(0, 0.003, landmarks[..., :2].shape)
+    return landmarks
+
+
+def compare_with_js(trials, atol=1e-6):
+    """node로 JS 상태 기계를 프레임별 실행한 결과와 비교 -> 시행별 불일치 필드 (node 없으면 None)"""
+    work_dir = tempfile.mkdtemp(prefix='sts_js_')
+    script_path = os.path.join(work_dir, 'reference.mjs')
+    fixture_path = os.path.join(work_dir, 'fixture.json')
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(_JS_REFERENCE % {'module': 'file://' + JS_MODULE_PATH, 'history': SCORE_HISTORY_FRAMES})
+    with open(fixture_path, 'w', encoding='utf-8') as f:
+        json.dump({'trials': [np.asarray(tr).tolist() for tr in trials]}, f)
+
+    try:
+        output = subprocess.run(['node', script_path, fixture_path], capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"  JS 참조 실행 실패: {e}")
+        return None
+
+    report = []
+    for trial, js in zip(trials, json.loads(output)):
+        ours = analyze_trial(trial)
+        rows = list(zip(*js['rows']))
+        bad = []
+        if [STATE_NAMES[s] for s in ours['state']] != list(rows[0]):
+            bad.append('state')
+        if not np.allclose(ours['sitting_confidence'], rows[1], atol=atol):
+            bad.append('sitting_confidence')
+        if not np.allclose(ours['standing_confidence'], rows[2], atol=atol):
+            bad.append('standing_confidence')
+        if [HAND_POSITIONS[p] for p in ours['hand_position']] != list(rows[3]):
+            bad.append('hand_position')
+        if [HAND_SUPPORTS[s] for s in ours['hand_support']] != list(rows[4]):
+            bad.append('hand_support')
+        if ours['is_transitioning'].tolist() != list(rows[5]):
+            bad.append('is_transitioning')
+        if score_trial(ours)['score'] != js['score']:
+            bad.append('score')
+        report.append({'score': js['score'], 'mismatches': bad})
+    return report
+
+
+def benchmark(trials=2000, frames=240):
+    """합성 시행 (8초 x 30fps) 일괄 재분석 처리량"""
+    data = [make_trial(frames, push=i % 2 == 1, seed=i) for i in range(trials)]
+    started = time.perf_counter()
+    for landmarks in data:
+        score_trial(analyze_trial(landmarks, {'push_rise_ratio': 0.3}))
+    elapsed = time.perf_counter() - started
+    print(f"  {trials}개 시행 x {frames}프레임: {elapsed:.2f}초 ({trials / elapsed:.0f} 시행/초)")
+
+
+def main():
+    print(f"\n{'='*60}")
+    print("앉기/일어서기 상태 기계 JS 비교 (합성 시행)")
+    print(f"{'='*60}")
+    trials = [make_trial(push=False, seed=0), make_trial(push=True, seed=1),
+              make_trial(frames=360, rise_sec=2.0, seed=2), make_trial(frames=360, push=True, rise_sec=0.5, seed=3)]
+    report = compare_with_js(trials)
+    if report is not None:
+        for i, r in enumerate(report):
+            print(f"  시행 {i}: JS 점수 {r['score']}, {'일치' if not r['mismatches'] else '불일치 ' + ', '.join(r['mismatches'])}")
+
+    print(f"\n{'='*60}")
+    print("재분석 벤치마크")
+    print(f"{'='*60}")
+    benchmark()
+
+    if os.path.isdir(TRIAL_DIR):
+        paths = sorted(os.path.join(TRIAL_DIR, f) for f in os.listdir(TRIAL_DIR)
+                       if f.endswith(('.npy', '.npz', '.json')))
+        for name, result in rescore_trials(paths).items():
+            print(f"  {name}: {result['score']}점 ({result['reason']})")
+
+
+if __name__ == "__main__":
+    main()
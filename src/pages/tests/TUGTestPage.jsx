@@ -5,6 +5,7 @@ import { PatientInfoForm } from '../../components/forms';
 import { drawConnections, drawLandmarks } from '../../utils/poseDrawing';
 import { analyzePose } from '../../utils/poseAnalysis';
 import { calculateTUGRisk, getRiskColorClasses } from '../../utils/riskCalculation';
+import { analyzeTUGVideo, attachTUGOverlay } from '../../utils/tugOverlay';
 import { useNavigation, PAGES } from '../../context/NavigationContext';
 import { useTestHistory } from '../../context/TestHistoryContext';
 
@@ -23,12 +24,20 @@ function TUGTestPage() {
   const [videoDuration, setVideoDuration] = useState(0);
   const [currentTime, setCurrentTime] = useState(0);
 
+  // 서버 분석 START/FINISH 선 오버레이 (사이드카)
+  const [overlaySidecar, setOverlaySidecar] = useState(null);
+  const [overlayStatus, setOverlayStatus] = useState('idle'); // idle, processing, ready, failed
+  const [overlayError, setOverlayError] = useState(null);
+
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
   const fileInputRef = useRef(null);
   const timerRef = useRef(null);
   const poseRef = useRef(null);
   const animationRef = useRef(null);
+  const overlayVideoRef = useRef(null);
+  const overlayCanvasRef = useRef(null);
+  const overlayAbortRef = useRef(null);
 
   const { navigateTo } = useNavigation();
   const { addTestResult } = useTestHistory();
@@ -111,10 +120,33 @@ function TUGTestPage() {
     }
   }, []);
 
+  // 서버 분석 요청 (자세 분석과 동시에 진행) -> 결과 화면에서 START/FINISH 선 표시
+  const requestOverlay = (file) => {
+    overlayAbortRef.current?.abort();
+    const controller = new AbortController();
+    overlayAbortRef.current = controller;
+
+    setOverlaySidecar(null);
+    setOverlayError(null);
+    setOverlayStatus('processing');
+    analyzeTUGVideo(file, { signal: controller.signal, patientId: patientInfo.id })
+      .then(({ sidecar }) => {
+        setOverlaySidecar(sidecar);
+        setOverlayStatus('ready');
+      })
+      .catch((error) => {
+        if (controller.signal.aborted) return;
+        console.error('TUG overlay error:', error);
+        setOverlayError(error.message);
+        setOverlayStatus('failed');
+      });
+  };
+
   // 영상 분석 시작
   const startAnalysis = async () => {
     if (!videoRef.current || !canvasRef.current) return;
 
+    requestOverlay(videoFile);
     setIsAnalyzing(true);
     setStep('measuring');
     setTimer(0);
@@ -223,12 +255,28 @@ function TUGTestPage() {
     setVideoUrl(null);
     setAnalysisProgress(0);
     setCurrentTime(0);
+    overlayAbortRef.current?.abort();
+    setOverlaySidecar(null);
+    setOverlayStatus('idle');
+    setOverlayError(null);
 
     if (fileInputRef.current) {
       fileInputRef.current.value = '';
     }
   };
 
+  // 결과 화면: 사이드카가 준비되면 재생 영상 위 캔버스에 선 그리기
+  useEffect(() => {
+    if (step !== 'complete' || !overlaySidecar) return undefined;
+    const video = overlayVideoRef.current;
+    const canvas = overlayCanvasRef.current;
+    if (!video || !canvas) return undefined;
+    return attachTUGOverlay(video, canvas, overlaySidecar);
+  }, [step, overlaySidecar]);
+
+  // 언마운트 시 진행 중인 서버 분석 조회 중단
+  useEffect(() => () => overlayAbortRef.current?.abort(), []);
+
   // 컴포넌트 언마운트 시 정리
   useEffect(() => {
     return () => {
@@ -505,6 +553,32 @@ function TUGTestPage() {
               </div>
             </Card>
 
+            {/* 서버 분석 START/FINISH 선 (재인코딩 없이 원본 위에 표시) */}
+            <Card padding="md" className="max-w-2xl mx-auto text-left">
+              <h3 className="text-white font-semibold mb-4">START/FINISH 선</h3>
+              <div className="aspect-video bg-slate-800 rounded-xl overflow-hidden relative">
+                <video
+                  ref={overlayVideoRef}
+                  src={videoUrl}
+                  className="absolute inset-0 w-full h-full object-contain"
+                  controls
+                  playsInline
+                />
+                <canvas
+                  ref={overlayCanvasRef}
+                  className="absolute inset-0 w-full h-full object-contain pointer-events-none"
+                />
+              </div>
+              {overlayStatus === 'processing' && (
+                <p className="text-slate-400 text-sm mt-3">서버에서 START/FINISH 선을 분석하는 중입니다...</p>
+              )}
+              {overlayStatus === 'failed' && (
+                <Alert type="warning" className="mt-3">
+                  선을 표시할 수 없습니다: {overlayError}
+                </Alert>
+              )}
+            </Card>
+
             <div className="flex gap-4 justify-center">
               <Button
                 variant="secondary"
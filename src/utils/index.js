@@ -1,3 +1,4 @@
 export * from './poseAnalysis';
 export * from './poseDrawing';
 export * from './riskCalculation';
+export * from './tugOverlay';
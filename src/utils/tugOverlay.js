@@ -0,0 +1,132 @@
+// TUG 사이드카(.tug.json) 기반 START/FINISH 선 오버레이
+// Python motion_detect_v3의 OUTPUT_MODE = 'sidecar' 결과를 재인코딩 없이 플레이어에서 그림
+
+// 사이드카 JSON 로드
+export async function loadTUGSidecar(url) {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error('사이드카 로드 실패');
+  }
+  return response.json();
+}
+
+// 현재 재생 시간에 보여야 하는 선 목록
+export function getActiveTUGLines(sidecar, currentTime) {
+  if (!sidecar?.lines) return [];
+  return sidecar.lines.filter(
+    (line) => currentTime >= line.from_time && currentTime <= line.to_time
+  );
+}
+
+// 캔버스에 START/FINISH 선 그리기 (캔버스 크기에 맞춰 x 비율로 배치)
+export function drawTUGLines(ctx, sidecar, currentTime, width, height, options = {}) {
+  const { lineWidth = 5, font = 'bold 18px sans-serif' } = options;
+  const top = height * (sidecar?.line_top_ratio ?? 0.75);
+
+  getActiveTUGLines(sidecar, currentTime).forEach((line) => {
+    const x = line.x_ratio * width;
+
+    ctx.strokeStyle = line.color;
+    ctx.lineWidth = lineWidth;
+    ctx.beginPath();
+    ctx.moveTo(x, top);
+    ctx.lineTo(x, height);
+    ctx.stroke();
+
+    ctx.fillStyle = line.color;
+    ctx.font = font;
+    ctx.textAlign = 'center';
+    ctx.fillText(line.label, x, top - 15);
+  });
+}
+
+// 재생 중인 <video> 위 캔버스에 선을 계속 그림 -> 정리 함수 반환
+// requestVideoFrameCallback 지원 시 실제 표시 프레임(mediaTime) 기준, 아니면 timeupdate (초당 4회 정도)
+export function attachTUGOverlay(video, canvas, sidecar, options = {}) {
+  const ctx = canvas.getContext('2d');
+  const frameCallback = 'requestVideoFrameCallback' in video;
+  let handle = null;
+
+  const draw = (currentTime) => {
+    if (!video.videoWidth) return;
+    // 캔버스 해상도 = 영상 해상도 (object-contain으로 영상과 같은 영역에 맞춰짐)
+    if (canvas.width !== video.videoWidth || canvas.height !== video.videoHeight) {
+      canvas.width = video.videoWidth;
+      canvas.height = video.videoHeight;
+    }
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    drawTUGLines(ctx, sidecar, currentTime, canvas.width, canvas.height, options);
+  };
+
+  const onFrame = (now, metadata) => {
+    draw(metadata.mediaTime);
+    handle = video.requestVideoFrameCallback(onFrame);
+  };
+  const onTime = () => draw(video.currentTime);
+
+  if (frameCallback) {
+    handle = video.requestVideoFrameCallback(onFrame);
+  } else {
+    video.addEventListener('timeupdate', onTime);
+  }
+  // 일시정지 상태의 탐색/첫 프레임
+  video.addEventListener('seeked', onTime);
+  video.addEventListener('loadeddata', onTime);
+  onTime();
+
+  return () => {
+    if (frameCallback && handle !== null) video.cancelVideoFrameCallback(handle);
+    video.removeEventListener('timeupdate', onTime);
+    video.removeEventListener('seeked', onTime);
+    video.removeEventListener('loadeddata', onTime);
+  };
+}
+
+// 로컬 TUG 분석 서비스 (tug_server.py)
+const API_BASE = 'http://localhost:5000';
+const JOB_POLL_MS = 1000;
+const FINISHED_STATUSES = ['done', 'no_person', 'failed'];
+
+// 영상 업로드 -> 분석 작업 등록 (본문 = 영상 원본 바이트, 환자/세션 ID는 결과 저장소 기록용)
+export async function submitTUGJob(file, { signal, patientId, sessionId } = {}) {
+  const headers = { 'X-Filename': file.name };
+  if (patientId) headers['X-Patient-Id'] = patientId;
+  if (sessionId) headers['X-Session-Id'] = sessionId;
+
+  const response = await fetch(`${API_BASE}/api/tug/jobs`, {
+    method: 'POST',
+    headers,
+    body: file,
+    signal,
+  });
+  const job = await response.json();
+  if (!response.ok) {
+    throw new Error(job.error || '분석 작업 등록 실패');
+  }
+  return job;
+}
+
+// 작업이 끝날 때까지 상태 조회 -> 마지막 작업 상태
+export async function waitForTUGJob(jobId, { signal, interval = JOB_POLL_MS } = {}) {
+  for (;;) {
+    const response = await fetch(`${API_BASE}/api/tug/jobs/${jobId}`, { signal });
+    const job = await response.json();
+    if (!response.ok) {
+      throw new Error(job.error || '작업 상태 조회 실패');
+    }
+    if (FINISHED_STATUSES.includes(job.status)) {
+      return job;
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+}
+
+// 업로드부터 사이드카까지: 사람 미감지/실패면 오류
+export async function analyzeTUGVideo(file, { signal, patientId, sessionId } = {}) {
+  const { id } = await submitTUGJob(file, { signal, patientId, sessionId });
+  const job = await waitForTUGJob(id, { signal });
+  if (job.status !== 'done') {
+    throw new Error(job.error || '분석 실패');
+  }
+  return { job, sidecar: await loadTUGSidecar(`${API_BASE}/api/tug/jobs/${id}/timeline`) };
+}
@@ -0,0 +1,307 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# 얇은 TUG CLI - 여기서는 표준 라이브러리만 import (cv2/numpy/검출 모듈은 실제로 분석할 때만)
+# 상주 워커(serve)가 떠 있으면 Unix 소켓으로 작업만 보내고 결과를 받음 -> 영상마다 import 비용 없음
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "tug_worker.sock")
+OUTPUT_DIR = "/Users/aisoft/Documents/TUG/final_output"
+
+CONNECT_TIMEOUT = 0.2
+STARTUP_TIMEOUT = 30.0
+RECV_CHUNK = 64 * 1024
+
+
+def _send(sock, message):
+    """한 줄 JSON 메시지"""
+    sock.sendall(json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b"\n")
+
+
+def _recv(sock):
+    buffer = bytearray()
+    while not buffer.endswith(b"\n"):
+        chunk = sock.recv(RECV_CHUNK)
+        if not chunk:
+            break
+        buffer += chunk
+    if not buffer:
+        raise ConnectionError("워커 연결이 끊겼습니다.")
+    return json.loads(buffer)
+
+
+def request_worker(message, socket_path=SOCKET_PATH):
+    """워커에 요청 -> 응답 dict (워커가 없으면 None)"""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)  # 분석은 오래 걸릴 수 있음
+    with sock:
+        _send(sock, message)
+        return _recv(sock)
+
+
+def analyze_local(video_path, output_dir, output_mode=None, camera_id=None, patient_id=None, session_id=None):
+    """워커 없이 이 프로세스에서 분석 (여기서 처음 cv2/numpy를 로드)"""
+    from motion_detect_v3 import analyze_and_output
+    return analyze_and_record(analyze_and_output, video_path, output_dir, output_mode, camera_id,
+                              patient_id, session_id)
+
+
+def analyze_and_record(analyze, video_path, output_dir, output_mode=None, camera_id=None,
+                       patient_id=None, session_id=None):
+    """분석 + 결과 저장소 기록 (워커/로컬 공용 - 실패도 기록하고 예외는 그대로)
+
+    patient_id/session_id: 없으면 파일 이름 규칙에서 (results_store.subject_from_filename)"""
+    from motion_detect_v3 import DETECTOR_PARAMS
+    from results_store import record_run
+
+    subject = {'patient_id': patient_id, 'session_id': session_id}
+    try:
+        result = analyze(video_path, output_dir, output_mode, camera_id)
+    except Exception:
+        try:
+            record_run(video_path, status='failed', params=DETECTOR_PARAMS, **subject)
+        except OSError:
+            pass  # 파일 자체가 없으면 해시를 못 구함 - 원래 오류를 그대로 알림
+        raise
+    record_run(video_path, result, status='done' if result is not None else 'no_person', params=DETECTOR_PARAMS,
+               **subject)
+    return result
+
+
+# ============================================================
+# 상주 워커
+# ============================================================
+
+class WarmWorker:
+    """cv2/numpy/검출 모듈을 한 번만 로드하고 OpenCV 첫 호출 초기화까지 미리 끝낸 상태로 대기"""
+
+    def __init__(self):
+        import numpy as np
+        import motion_detect_v3
+
+        self.analyze_and_output = motion_detect_v3.analyze_and_output
+        # 첫 MOG2 생성/적용 시 OpenCV 내부 초기화 (스레드 풀, 커널 등)
+        motion_detect_v3.make_engine().apply(np.zeros((64, 64, 3), np.uint8))
+        self.started = time.time()
+        self.handled = 0
+
+    def handle(self, message):
+        cmd = message.get('cmd')
+        if cmd == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'handled': self.handled,
+                    'uptime': round(time.time() - self.started, 1)}
+        if cmd == 'shutdown':
+            return {'ok': True, 'shutdown': True}
+        if cmd == 'analyze':
+            started = time.perf_counter()
+            result = analyze_and_record(self.analyze_and_output, message['video'], message['output_dir'],
+                                        message.get('output_mode'), message.get('camera_id'),
+                                        message.get('patient_id'), message.get('session_id'))
+            self.handled += 1
+            return {'ok': True, 'result': result, 'worker_sec': round(time.perf_counter() - started, 4)}
+        return {'ok': False, 'error': f"알 수 없는 명령: {cmd}"}
+
+
+def serve(socket_path=SOCKET_PATH):
+    """Unix 소켓 워커 - 요청을 하나씩 순서대로 처리 (분석은 CPU 작업이라 동시 처리 이득 없음)"""
+    if request_worker({'cmd': 'ping'}, socket_path) is not None:
+        print(f"이미 워커가 실행 중입니다: {socket_path}")
+        return
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # 이전 워커가 비정상 종료하며 남긴 소켓
+
+    started = time.perf_counter()
+    worker = WarmWorker()
+    print(f"워커 준비 완료 ({time.perf_counter() - started:.2f}초): {socket_path}", flush=True)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    server.listen(8)
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    response = worker.handle(_recv(conn))
+                except Exception as e:
+                    response = {'ok': False, 'error': str(e)}
+                try:
+                    _send(conn, response)
+                except OSError:
+                    pass  # 클라이언트가 먼저 끊음
+            if response.get('shutdown'):
+                break
+    finally:
+        server.close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    print("워커 종료")
+
+
+def start_worker(socket_path=SOCKET_PATH, timeout=STARTUP_TIMEOUT):
+    """백그라운드로 워커 실행 후 ping이 될 때까지 대기 -> Popen"""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', '--socket', socket_path],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if request_worker({'cmd': 'ping'}, socket_path) is not None:
+            return process
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("워커를 시작하지 못했습니다.")
+
+
+# ============================================================
+# 명령
+# ============================================================
+
+def cmd_analyze(args):
+    results = []
+    for video_path in args.videos:
+        video_path = os.path.abspath(video_path)
+        started = time.perf_counter()
+        response = None
+        if not args.local:
+            response = request_worker({'cmd': 'analyze', 'video': video_path, 'output_dir': args.output_dir,
+                                       'output_mode': args.mode, 'camera_id': args.camera,
+                                       'patient_id': args.patient, 'session_id': args.session}, args.socket)
+        if response is None:
+            via = 'local'
+            os.makedirs(args.output_dir, exist_ok=True)
+            result = analyze_local(video_path, args.output_dir, args.mode, args.camera, args.patient, args.session)
+        elif response['ok']:
+            via = 'worker'
+            result = response['result']
+        else:
+            print(f"{os.path.basename(video_path)}: 오류 - {response['error']}")
+            continue
+        elapsed = time.perf_counter() - started
+
+        results.append({'file': os.path.basename(video_path), 'via': via, 'latency': round(elapsed, 4),
+                        'result': result})
+        if not args.json:
+            if result is None:
+                print(f"{os.path.basename(video_path)}: 사람 미감지 ({via}, {elapsed:.2f}초)")
+            else:
+                print(f"{os.path.basename(video_path)}: START {result['start_time']:.2f}초, "
+                      f"FINISH {result['finish_time']:.2f}초, "
+                      f"소요 {result['finish_time'] - result['start_time']:.2f}초 ({via}, {elapsed:.2f}초)")
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, default=str))
+
+
+def cmd_status(args):
+    response = request_worker({'cmd': 'ping'}, args.socket)
+    if response is None:
+        print("워커가 실행 중이 아닙니다.")
+    else:
+        print(f"워커 pid {response['pid']}, 처리 {response['handled']}개, 가동 {response['uptime']}초")
+
+
+def cmd_stop(args):
+    response = request_worker({'cmd': 'shutdown'}, args.socket)
+    print("워커 종료 요청 완료" if response is not None else "워커가 실행 중이 아닙니다.")
+
+
+def cmd_bench(args):
+    """10초 합성 TUG 영상 기준 영상당 지연시간: 콜드(매번 새 프로세스) vs 상주 워커"""
+    from load_test import make_synthetic_clip
+
+    work_dir = tempfile.mkdtemp(prefix='tug_cli_')
+    clips = []
+    for i in range(args.clips):
+        path = os.path.join(work_dir, f"clip_{i:02d}.mp4")
+        make_synthetic_clip(path, seed=i)
+        clips.append(path)
+    output_dir = os.path.join(work_dir, 'out')
+    socket_path = os.path.join(work_dir, 'worker.sock')
+    cli = [sys.executable, os.path.abspath(__file__)]
+
+    def run(extra):
+        times = []
+        for clip in clips:
+            started = time.perf_counter()
+            subprocess.run(cli + ['analyze', clip, '-o', output_dir, '--socket', socket_path] + extra,
+                           check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - started)
+        return times
+
+    def report(name, times):
+        times = sorted(times)
+        print(f"  {name:<24} 중앙값 {times[len(times) // 2]:6.3f}초, 최대 {times[-1]:6.3f}초")
+
+    print(f"\n{'='*60}")
+    print(f"CLI 지연시간 벤치마크 (10초 합성 영상 {len(clips)}개)")
+    print(f"{'='*60}")
+
+    started = time.perf_counter()
+    subprocess.run(cli + ['status', '--socket', socket_path], check=True, stdout=subprocess.DEVNULL)
+    print(f"  {'CLI 시작만 (import 없음)':<24} {time.perf_counter() - started:6.3f}초")
+
+    report('콜드 (프로세스당 1개)', run(['--local']))
+
+    worker = start_worker(socket_path)
+    try:
+        report('워커 경유 CLI', run([]))
+        times = []
+        for clip in clips:
+            started = time.perf_counter()
+            request_worker({'cmd': 'analyze', 'video': clip, 'output_dir': output_dir}, socket_path)
+            times.append(time.perf_counter() - started)
+        report('워커 직접 요청', times)
+    finally:
+        request_worker({'cmd': 'shutdown'}, socket_path)
+        worker.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='tug', description="TUG 영상 분석 CLI")
+    parser.add_argument('--socket', default=SOCKET_PATH, help="워커 Unix 소켓 경로")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('analyze', help="영상 분석 (워커가 있으면 워커로)")
+    p.add_argument('videos', nargs='+')
+    p.add_argument('-o', '--output-dir', default=OUTPUT_DIR)
+    p.add_argument('--mode', choices=('sidecar', 'burn', 'both'), default=None)
+    p.add_argument('--camera', default=None, help="바닥 캘리브레이션 카메라 ID")
+    p.add_argument('--patient', default=None, help="결과 저장소에 기록할 환자 ID (없으면 파일 이름 규칙)")
+    p.add_argument('--session', default=None, help="결과 저장소에 기록할 세션 ID")
+    p.add_argument('--local', action='store_true', help="워커를 쓰지 않고 이 프로세스에서 분석")
+    p.add_argument('--json', action='store_true', help="결과를 JSON으로 출력")
+    p.add_argument('--socket', default=argparse.SUPPRESS)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('serve', help="상주 워커 실행")
+    p.add_argument('--socket', default=argparse.SUPPRESS)
+    p.set_defaults(func=lambda a: serve(a.socket))
+
+    for name, func, text in (('status', cmd_status, "워커 상태"), ('stop', cmd_stop, "워커 종료")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('--socket', default=argparse.SUPPRESS)
+        p.set_defaults(func=func)
+
+    p = sub.add_parser('bench', help="콜드/워커 지연시간 측정")
+    p.add_argument('--clips', type=int, default=5)
+    p.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import time
+
+import numpy as np
+
+from floor_calibration import timeline_arrays, moving_average, _fill_gaps
+
+# TUG 단계 분할 - 앱 단계 이름 (TUGTestPage phases)과 동일, 앞뒤로 앉아 있는 구간
+PHASES = ('seated', 'sitToStand', 'walkGo', 'turn', 'walkBack', 'standToSit', 'seatedEnd')
+REPORTED_PHASES = PHASES[1:-1]
+
+SMOOTH_WINDOW_SEC = 0.3
+# 단계별 예상 길이 (초) - 왼쪽->오른쪽 HMM의 머무름 확률
+EXPECTED_PHASE_SEC = (2.0, 1.5, 3.0, 1.5, 3.0, 1.5, 2.0)
+# 전이/기립 단계는 감지 안 될 수 있으므로 한 단계 건너뛰기 허용 (작은 확률)
+SKIP_LOG_PROB = np.log(0.02)
+MIN_WALK_SPEED = 0.3  # 키 단위/초, 이보다 느리면 걷기 속도 추정값으로 쓰지 않음
+
+# 단계별 (수평 속도, 높이 변화율, 상대 높이) 평균과 표준편차
+# 수평 속도는 걸어가는 방향이 + 가 되도록 부호를 맞춘 값 (키/초)
+EMISSION_SIGMA = np.array([0.25, 0.35, 0.15])
+
+
+def _emission_means(walk_speed):
+    return np.array([
+        [0.0, 0.0, 0.7],               # seated
+        [0.05, 0.25, 0.85],            # sitToStand
+        [walk_speed, 0.0, 1.0],        # walkGo
+        [0.0, 0.0, 1.0],               # turn
+        [-walk_speed, 0.0, 1.0],       # walkBack
+        [-0.05, -0.25, 0.85],          # standToSit
+        [0.0, 0.0, 0.7],               # seatedEnd
+    ])
+
+
+def phase_features(arrays, times, fps):
+    """프레임별 특징 (T x 3): 방향 맞춘 수평 속도, 높이 변화율, 상대 높이. 미감지 프레임은 NaN"""
+    detected = arrays['detected'] & ~np.isnan(arrays['x'])
+    x = _fill_gaps(arrays['x'], times)
+    height = _fill_gaps(arrays['height'], times)
+
+    # 서 있을 때 키 = 상위 분위수 (앉은 자세/가림보다 큼)
+    standing = np.nanpercentile(arrays['height'][detected], 90)
+    window = int(round(SMOOTH_WINDOW_SEC * fps))
+    x = moving_average(x, window) / standing
+    h_rel = moving_average(height, window) / standing
+
+    v = np.gradient(x, times)
+    dh = np.gradient(h_rel, times)
+
+    # 가장 멀리 간 지점 쪽이 + 방향
+    first = int(np.argmax(detected))
+    far = int(np.nanargmax(np.abs(x - x[first])))
+    direction = 1.0 if x[far] >= x[first] else -1.0
+
+    features = np.stack([v * direction, dh, h_rel], axis=1)
+    features[~detected] = np.nan
+    return features
+
+
+def emission_log_likelihood(features, means):
+    """모든 프레임 x 모든 단계 가우시안 로그우도를 한 번에 (T x K). NaN 특징은 정보 없음(0)"""
+    z = (features[:, None, :] - means[None, :, :]) / EMISSION_SIGMA
+    return np.nansum(-0.5 * z * z, axis=2)
+
+
+def viterbi_left_to_right(log_emission, fps):
+    """왼쪽->오른쪽 HMM Viterbi (머무름/다음/한 단계 건너뛰기) - O(T*K)"""
+    n, k = log_emission.shape
+    durations = np.maximum(np.asarray(EXPECTED_PHASE_SEC) * fps, 2.0)
+    log_stay = np.log(1 - 1 / durations)
+    log_next = np.log(1 / durations)
+
+    neg_inf = -np.inf
+    score = np.full(k, neg_inf)
+    score[0] = log_emission[0, 0]
+    score[1] = log_emission[0, 1] + SKIP_LOG_PROB  # 이미 일어서는 중에 감지 시작
+    back = np.zeros((n, k), dtype=np.int8)
+    states = np.arange(k)
+
+    for t in range(1, n):
+        stay = score + log_stay
+        advance = np.concatenate([[neg_inf], score[:-1] + log_next[:-1]])
+        skip = np.concatenate([[neg_inf, neg_inf], score[:-2] + SKIP_LOG_PROB])
+        candidates = np.stack([stay, advance, skip])
+        best = np.argmax(candidates, axis=0)
+        back[t] = states - best
+        score = candidates[best, states] + log_emission[t]
+
+    path = np.empty(n, dtype=np.int8)
+    path[-1] = int(np.argmax(score))
+    for t in range(n - 1, 0, -1):
+        path[t - 1] = back[t, path[t]]
+    return path
+
+
+def segment_phases(person_timeline, times, fps):
+    """타임라인 한 시행 -> 단계 구간 목록 [{'phase', 'start_frame', 'end_frame', 'start_time', 'end_time', 'duration'}]"""
+    arrays = timeline_arrays(person_timeline)
+    times = np.asarray(times, dtype=np.float64)
+    detected = arrays['detected'] & ~np.isnan(arrays['x'])
+    if detected.sum() < 2:
+        return []
+
+    # 처음/마지막 감지 사이만 분할 (바깥은 앉아 있거나 화면 밖)
+    first = int(np.argmax(detected))
+    last = len(detected) - 1 - int(np.argmax(detected[::-1]))
+    active = slice(first, last + 1)
+    sub = {k: v[active] for k, v in arrays.items()}
+    sub_times = times[active]
+
+    features = phase_features(sub, sub_times, fps)
+    walk_speed = max(MIN_WALK_SPEED, float(np.nanpercentile(np.abs(features[:, 0]), 75)))
+    log_emission = emission_log_likelihood(features, _emission_means(walk_speed))
+    path = viterbi_left_to_right(log_emission, fps)
+
+    # 단계가 바뀌는 지점만 찾아 구간으로
+    change = np.flatnonzero(np.diff(path)) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [len(path)]]) - 1
+
+    frames = sub['frame']
+    segments = []
+    for s, e in zip(starts, ends):
+        # 구간 끝 시간 = 다음 구간 시작 (마지막은 마지막 프레임)
+        end_time = sub_times[e + 1] if e + 1 < len(sub_times) else sub_times[e]
+        segments.append({
+            'phase': PHASES[path[s]],
+            'start_frame': int(frames[s]),
+            'end_frame': int(frames[e]),
+            'start_time': round(float(sub_times[s]), 3),
+            'end_time': round(float(end_time), 3),
+            'duration': round(float(end_time - sub_times[s]), 3),
+        })
+    return segments
+
+
+def phase_durations(segments):
+    """앱 phases 형식 {'sitToStand': '2.1', ...} (없는 단계는 '-')"""
+    totals = {}
+    for seg in segments:
+        totals[seg['phase']] = totals.get(seg['phase'], 0.0) + seg['duration']
+    return {p: f"{totals[p]:.1f}" if p in totals else '-' for p in REPORTED_PHASES}
+
+
+def _synthetic_trial(fps, rng):
+    """앉음 -> 기립 -> 걷기 -> 회전 -> 돌아오기 -> 착석 bbox 타임라인 (벤치마크용)"""
+    plan = [('seated', 1.0), ('sitToStand', 1.5), ('walkGo', 3.0), ('turn', 1.5),
+            ('walkBack', 3.0), ('standToSit', 1.5), ('seatedEnd', 1.0)]
+    timeline = []
+    x, h = 100.0, 280.0
+    for phase, sec in plan:
+        n = int(sec * fps)
+        for i in range(n):
+            if phase == 'sitToStand':
+                h = 280 + 120 * (i + 1) / n
+            elif phase == 'standToSit':
+                h = 400 - 120 * (i + 1) / n
+            elif phase == 'walkGo':
+                x += 600 / n
+            elif phase == 'walkBack':
+                x -= 600 / n
+            w = 120 + rng.normal(0, 3)
+            hh = h + rng.normal(0, 4)
+            timeline.append({'detected': True, 'x': int(x), 'area': int(w * hh),
+                             'bbox': (int(x - w / 2), int(500 - hh), int(w), int(hh))})
+    return plan, timeline
+
+
+def benchmark(hours=1.0, fps=30):
+    """합성 타임라인 길이를 늘려 가며 분할 시간 측정 (선형 증가 확인)"""
+    rng = np.random.default_rng(0)
+    plan, trial = _synthetic_trial(fps, rng)
+    print(f"\n{'='*60}")
+    print("단계 분할 벤치마크 (합성 타임라인)")
+    print(f"{'='*60}")
+
+    times = np.arange(len(trial)) / fps
+    timeline = [{'frame': i, **d} for i, d in enumerate(trial)]
+    print(f"  실제:  {', '.join(f'{p} {s:.1f}' for p, s in plan[1:-1])}")
+    print(f"  추정:  {phase_durations(segment_phases(timeline, times, fps))}")
+
+    total = int(hours * 3600 * fps)
+    for n in (total // 16, total // 4, total):
+        timeline = [{'frame': i, **trial[i % len(trial)]} for i in range(n)]
+        times = np.arange(n) / fps
+        started = time.perf_counter()
+        segment_phases(timeline, times, fps)
+        elapsed = time.perf_counter() - started
+        print(f"  {n:>8} 프레임 ({n / fps / 60:5.1f}분): {elapsed:6.2f}초 ({n / elapsed / 1000:.0f}k 프레임/초)")
+
+
+def main():
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+from motion_detect_v3 import DETECTOR_PARAMS, analyze_and_output
+from pipeline_metrics import registry as metrics
+from results_store import record_run
+from sidecar import load_sidecar
+from tug_watch import warm_worker
+from video_index import INDEX_SUFFIX
+
+# 로컬 TUG 분석 서비스 (프론트엔드 API_BASE = http://localhost:5000)
+UPLOAD_DIR = "/Users/aisoft/Documents/TUG/uploads"
+RESULT_DIR = "/Users/aisoft/Documents/TUG/results"
+
+MAX_WORKERS = 2
+# 대기 + 처리 중 작업이 이 수를 넘으면 429 반환
+MAX_QUEUE_DEPTH = 16
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# 끝난 작업의 상태/결과 파일 보관 시간 (새 작업 등록 때 지난 것 정리)
+JOB_TTL_SEC = 24 * 60 * 60
+ALLOWED_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
+app = Flask(__name__)
+
+jobs = {}
+futures = {}
+uploading = 0  # 자리를 잡고 업로드 중인 요청 수 (아직 futures에 없음)
+jobs_lock = threading.Lock()
+executor = None
+
+
+def _get_executor():
+    """OpenCV를 미리 로드한 워커 풀 (첫 요청 때 한 번 생성)"""
+    global executor
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, initializer=warm_worker)
+    return executor
+
+
+def _queue_depth():
+    """대기 + 처리 중 + 업로드 중인 작업 수"""
+    with jobs_lock:
+        return len(futures) + uploading
+
+
+def _reserve_slot():
+    """업로드 받기 전에 대기열 자리 확보 -> (확보 여부, 현재 깊이). 동시 업로드가 모두 검사를 통과해 넘치지 않게"""
+    global uploading
+    with jobs_lock:
+        depth = len(futures) + uploading
+        if depth >= MAX_QUEUE_DEPTH:
+            return False, depth
+        uploading += 1
+        return True, depth + 1
+
+
+def _release_slot():
+    global uploading
+    with jobs_lock:
+        uploading -= 1
+
+
+def _prune_jobs(now=None):
+    """JOB_TTL_SEC 지난 끝난 작업 기록 삭제 + 진행 중이 아닌 오래된 업로드/결과 폴더 삭제 (서버 재시작 전에 남은 것 포함)"""
+    now = time.time() if now is None else now
+    with jobs_lock:
+        expired = [job_id for job_id, job in jobs.items()
+                   if job.get('finished') is not None and now - job['finished'] > JOB_TTL_SEC]
+        for job_id in expired:
+            del jobs[job_id]
+        active = set(jobs)
+
+    removed = 0
+    # 업로드: "<job_id>_<파일 이름>", 결과: "<job_id>/"
+    for root in (UPLOAD_DIR, RESULT_DIR):
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.split('_', 1)[0] in active:
+                continue
+            try:
+                if now - os.path.getmtime(path) <= JOB_TTL_SEC:
+                    continue  # 업로드 중이거나 아직 보관 기간
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+def _remove_upload(path):
+    """분석이 끝난 업로드 원본 (+ PTS 인덱스 캐시) 삭제 - 결과 파일은 결과 폴더에 있음"""
+    for p in (path, path + INDEX_SUFFIX):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def _run_job(upload_path, output_dir):
+    """워커에서 실행 -> (처리 시작 시각, 분석 결과). 대기열 대기와 처리 시간을 나눠 집계하려고"""
+    started = time.time()
+    return started, analyze_and_output(upload_path, output_dir, 'both')
+
+
+def _file_url(job_id, path):
+    return f"/api/tug/files/{job_id}/{os.path.basename(path)}"
+
+
+def _on_job_done(job_id, future):
+    """워커 완료 콜백 - 결과 저장소 기록 + 작업 상태/결과 갱신"""
+    _record_job(job_id, future)
+    with jobs_lock:
+        job = jobs[job_id]
+        futures.pop(job_id, None)
+        job['finished'] = time.time()
+        job['latency'] = round(job['finished'] - job['created'], 3)
+        _remove_upload(job['path'])
+        try:
+            started, result = future.result()
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            metrics.inc('tug_videos_total', status='failed', detector_version=DETECTOR_PARAMS['version'])
+            return
+
+        # 대기열 대기와 실제 처리 시간을 따로 (등록 -> 워커 시작 -> 완료)
+        job['queue_wait'] = round(max(started - job['created'], 0.0), 3)
+        metrics.observe('tug_queue_wait_seconds', job['queue_wait'])
+        metrics.observe('tug_video_seconds', max(job['finished'] - started, 0.0))
+
+        if result is None:
+            job['status'] = 'no_person'
+            job['error'] = '사람을 감지하지 못했습니다.'
+            metrics.inc('tug_videos_total', status='no_person', detector_version=DETECTOR_PARAMS['version'])
+            return
+
+        metrics.inc('tug_videos_total', status='done', detector_version=DETECTOR_PARAMS['version'])
+        for stage, seconds in result.get('timings', {}).items():
+            metrics.observe('tug_stage_seconds', seconds, stage=stage)
+
+        outputs = result.pop('outputs')
+        job['status'] = 'done'
+        job['result'] = result
+        job['files'] = {os.path.basename(p): _file_url(job_id, p) for p in outputs}
+        job['sidecar'] = next((p for p in outputs if p.endswith('.tug.json')), None)
+        # 번인 결과 영상만 (디버그 영상 .debug.mp4 등 다른 mp4 제외)
+        job['video_url'] = next((_file_url(job_id, p) for p in outputs
+                                 if os.path.basename(p).startswith('marked_') and p.endswith('.mp4')), None)
+
+
+def _record_job(job_id, future):
+    """결과 저장소 기록 (콜백 스레드마다 연결을 따로 열어서 - jobs_lock 밖에서)"""
+    with jobs_lock:
+        job = jobs[job_id]
+    error = future.exception()
+    result = None if error is not None else future.result()[1]
+    status = 'failed' if error is not None else ('no_person' if result is None else 'done')
+    try:
+        record_run(job['path'], result, status=status, params=DETECTOR_PARAMS, file=job['file'],
+                   patient_id=job['patient_id'], session_id=job['session_id'])
+    except Exception as e:
+        print(f"결과 저장소 기록 실패 ({job_id}): {e}")  # 작업 상태 갱신은 계속
+
+
+def _job_view(job):
+    view = {k: v for k, v in job.items() if k not in ('path', 'sidecar')}
+    future = futures.get(job['id'])
+    if view['status'] == 'queued' and future is not None and future.running():
+        view['status'] = 'running'
+    return view
+
+
+@app.after_request
+def allow_frontend(response):
+    """프론트엔드(vite 개발 서버 등 다른 origin)의 업로드/사이드카 조회 허용 (X-Filename 사전 요청 포함)"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Filename, X-Patient-Id, X-Session-Id'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+
+@app.route('/api/tug/jobs', methods=['POST'])
+def create_job():
+    """영상 업로드 -> 분석 작업 등록. 본문은 영상 원본 바이트 (chunked 전송 가능)"""
+    _prune_jobs()
+    reserved, depth = _reserve_slot()
+    if not reserved:
+        # 과부하: 업로드를 받기 전에 거절
+        response = jsonify({'error': '대기열이 가득 찼습니다.', 'queue_depth': depth})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, depth // MAX_WORKERS))
+        return response
+    try:
+        response, registered = _accept_upload()
+    except BaseException:
+        _release_slot()  # 업로드 중 끊김 등
+        raise
+    if not registered:
+        _release_slot()  # 빈 파일/형식 오류
+    return response
+
+
+def _accept_upload():
+    """업로드 저장 + 작업 등록 -> (응답, 등록 여부). 등록되면 확보한 자리는 futures로 넘어감"""
+    global uploading
+    filename = os.path.basename(request.headers.get('X-Filename') or request.args.get('filename') or 'upload.mp4')
+    if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+        return (jsonify({'error': '지원하지 않는 파일 형식입니다.'}), 400), False
+
+    job_id = uuid.uuid4().hex[:12]
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    upload_path = os.path.join(UPLOAD_DIR, f"{job_id}_{filename}")
+
+    # 메모리에 올리지 않고 청크 단위로 바로 디스크에 기록
+    size = 0
+    try:
+        with open(upload_path, 'wb') as f:
+            while True:
+                chunk = request.stream.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                f.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        os.remove(upload_path)
+        raise
+
+    if size == 0:
+        os.remove(upload_path)
+        return (jsonify({'error': '빈 파일입니다.'}), 400), False
+
+    output_dir = os.path.join(RESULT_DIR, job_id)
+    os.makedirs(output_dir, exist_ok=True)
+
+    job = {
+        'id': job_id,
+        'file': filename,
+        # 없으면 결과 저장소가 파일 이름 규칙에서 읽음
+        'patient_id': request.headers.get('X-Patient-Id') or request.args.get('patient_id'),
+        'session_id': request.headers.get('X-Session-Id') or request.args.get('session_id'),
+        'size': size,
+        'status': 'queued',
+        'created': time.time(),
+        'path': upload_path,
+    }
+    future = _get_executor().submit(_run_job, upload_path, output_dir)
+    with jobs_lock:
+        jobs[job_id] = job
+        futures[job_id] = future
+        uploading -= 1  # 자리가 futures로 넘어감
+        view = _job_view(job)
+    future.add_done_callback(lambda f: _on_job_done(job_id, f))
+
+    view['queue_depth'] = _queue_depth()
+    return (jsonify(view), 202), True
+
+
+@app.route('/api/tug/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """작업 상태/결과 (START/FINISH, 결과 파일 URL)"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+        view = _job_view(job)
+    view['queue_depth'] = _queue_depth()
+    return jsonify(view)
+
+
+@app.route('/api/tug/jobs/<job_id>/timeline', methods=['GET'])
+def get_job_timeline(job_id):
+    """프레임별 감지 타임라인 + START/FINISH 선 정보 (사이드카 JSON)"""
+    with jobs_lock:
+        job = jobs.get(job_id)
+        sidecar_path = job.get('sidecar') if job else None
+    if sidecar_path is None:
+        return jsonify({'error': '타임라인이 아직 없습니다.'}), 404
+    return jsonify(load_sidecar(sidecar_path))
+
+
+@app.route('/api/tug/files/<job_id>/<path:filename>', methods=['GET'])
+def get_job_file(job_id, filename):
+    return send_from_directory(os.path.join(RESULT_DIR, job_id), filename)
+
+
+@app.route('/api/tug/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok', 'queue_depth': _queue_depth(),
+                    'max_queue_depth': MAX_QUEUE_DEPTH, 'workers': MAX_WORKERS})
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 스크레이프용 (처리량/큐/실패 집계)"""
+    metrics.set('tug_queue_depth', _queue_depth(), queue='jobs')
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+if __name__ == "__main__":
+    # 디버그 리로더는 워커 풀을 두 번 만들기 때문에 끔
+    app.run(host='127.0.0.1', port=5000, threaded=True, use_reloader=False)
@@ -0,0 +1,194 @@
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from motion_detect_v3 import (DETECTOR_PARAMS, video_meta, scan_timeline, build_settings, resolve_thresholds,
+                              engine_warmup, open_output_writer, draw_lines)
+from floor_calibration import timeline_arrays, moving_average
+from sidecar import write_sidecar
+from audio_cues import audio_cues, cross_check, describe_check
+from tug_phases import segment_phases, phase_durations
+from video_index import FrameSeeker, frame_time, frame_times
+
+# 한 영상 안의 여러 TUG 시행 분리 (히스테리시스 + 간격 규칙)
+ACTIVITY_WINDOW_SEC = 1.0   # 움직임 비율 이동 평균 창
+ENTER_RATIO = 0.5           # 창 안 움직임 프레임 비율이 이 이상이면 시행 시작
+EXIT_RATIO = 0.1            # 이 이하로 떨어지면 시행 종료 (사이 값은 이전 상태 유지)
+MERGE_GAP_SEC = 2.0         # 이보다 짧은 정지는 같은 시행 (회전/잠깐 멈춤)
+MIN_TRIAL_SEC = 3.0         # 이보다 짧은 구간은 시행이 아님 (지나가는 사람 등)
+CLIP_PAD_SEC = 1.0          # 시행 잘라낸 영상 앞뒤 여유
+
+
+def hysteresis(signal, enter, exit_):
+    """enter 이상이면 켜짐, exit_ 이하면 꺼짐, 사이는 직전 상태 유지 (반복문 없이)"""
+    signal = np.asarray(signal, dtype=np.float64)
+    decided = (signal >= enter) | (signal <= exit_)
+    # 각 프레임에서 마지막으로 결정된 위치를 누적 최대값으로 전파
+    last = np.maximum.accumulate(np.where(decided, np.arange(len(signal)), -1))
+    state = signal[np.maximum(last, 0)] >= enter
+    return state & (last >= 0)
+
+
+def runs(mask):
+    """True 구간들 [(시작, 끝 포함)]"""
+    padded = np.concatenate([[False], mask, [False]]).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return list(zip(edges[::2], edges[1::2] - 1))
+
+
+def split_trials(person_timeline, fps, motion_area=None):
+    """타임라인 -> 시행별 (첫 움직임, 마지막 움직임) 타임라인 인덱스 목록"""
+    arrays = timeline_arrays(person_timeline)
+    motion = arrays['detected'] & (arrays['area'] > (motion_area or DETECTOR_PARAMS['motion_area']))
+    motion[:engine_warmup()] = False  # 배경 학습 구간 (배경 모델 없는 엔진은 0)
+
+    window = int(round(ACTIVITY_WINDOW_SEC * fps))
+    active = hysteresis(moving_average(motion.astype(np.float64), window), ENTER_RATIO, EXIT_RATIO)
+
+    # 짧은 정지로 끊긴 구간 합치기
+    merged = []
+    for start, end in runs(active):
+        if merged and (start - merged[-1][1]) / fps < MERGE_GAP_SEC:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    trials = []
+    for start, end in merged:
+        # 이동 평균 때문에 넓어진 경계를 실제 움직임 프레임으로 좁힘
+        moving = np.flatnonzero(motion[start:end + 1])
+        if len(moving) == 0:
+            continue
+        first, last = start + moving[0], start + moving[-1]
+        if (last - first) / fps >= MIN_TRIAL_SEC:
+            trials.append((int(first), int(last)))
+    return trials
+
+
+def trial_settings(person_timeline, meta, thresholds=None):
+    """시행별 START/FINISH 설정 목록 (시행 타임라인은 앞뒤 CLIP_PAD_SEC 포함)
+
+    thresholds: 이미 resolve_thresholds로 다시 판정한 타임라인이면 그 임계값 (analyze_and_output)"""
+    fps = meta['fps']
+    pad = int(round(CLIP_PAD_SEC * fps))
+    index = meta['index']
+    results = []
+    # 임계값은 영상 전체 분포로 한 번 결정 (시행 구간마다 따로 정하지 않음)
+    if thresholds is None:
+        person_timeline, thresholds = resolve_thresholds(person_timeline, meta)
+
+    spans = split_trials(person_timeline, fps, thresholds['motion_area'])
+    for number, (first, last) in enumerate(spans, start=1):
+        # 앞뒤 여유는 이웃 시행의 움직임 구간 전까지만 (이웃 시행 움직임이 이 시행 START/FINISH가 되지 않게)
+        prev_last = spans[number - 2][1] if number > 1 else -1
+        next_first = spans[number][0] if number < len(spans) else len(person_timeline)
+        lo, hi = max(0, first - pad, prev_last + 1), min(len(person_timeline), last + pad + 1, next_first)
+        timeline = person_timeline[lo:hi]
+        print(f"\n  [시행 {number}]")
+        settings = build_settings(timeline, meta, warmup=0, thresholds=thresholds)
+        if settings is None:
+            continue
+
+        times = frame_times(index, [d['frame'] for d in timeline], fps)
+        settings['trial'] = number
+        settings['clip_start_frame'] = timeline[0]['frame']
+        settings['clip_end_frame'] = timeline[-1]['frame']
+        settings['phase_segments'] = segment_phases(timeline, times, fps)
+        settings['phases'] = phase_durations(settings['phase_segments'])
+        settings['line_end_frame'] = settings['clip_end_frame']
+        settings['line_end_time'] = float(times[-1])
+        results.append(settings)
+
+    # 선은 그 시행 클립 끝까지만, 앞뒤 여유가 겹치면 다음 시행 START 직전까지 (세션 전체 플레이어에서 겹치지 않게)
+    for settings, following in zip(results, results[1:]):
+        end = max(following['start_frame'] - 1, settings['finish_frame'])
+        if settings['line_end_frame'] > end:
+            settings['line_end_frame'] = end
+            settings['line_end_time'] = frame_time(index, end, fps)
+    return results
+
+
+def write_trial_clips(video_path, trials, output_dir):
+    """모든 시행 잘라낸 영상을 한 번의 순차 디코딩으로 생성 (선은 원본 프레임 번호 기준)"""
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    paths = [os.path.join(output_dir, f"marked_{base}_trial{s['trial']}.mp4") for s in trials]
+    if not trials:
+        return paths
+
+    cap = cv2.VideoCapture(video_path)
+    seeker = FrameSeeker(cap, video_meta(video_path)['index'])
+    writers = {}
+
+    # 시행 구간의 합집합만 디코딩 (사이 구간은 grab으로 건너뜀)
+    frames = sorted({f for s in trials for f in range(s['clip_start_frame'], s['clip_end_frame'] + 1)})
+    for frame_idx in frames:
+        ret, frame = seeker.read(frame_idx)
+        if not ret:
+            break
+        for i, settings in enumerate(trials):
+            if not settings['clip_start_frame'] <= frame_idx <= settings['clip_end_frame']:
+                continue
+            if i not in writers:
+                writers[i] = open_output_writer(paths[i], settings)
+            # 구간이 겹치면 같은 프레임에 다른 시행 선이 그려지지 않도록 복사본에 그림
+            image = frame.copy() if len(trials) > 1 else frame
+            draw_lines(image, frame_idx, settings)
+            writers[i].write(image)
+            if frame_idx == settings['clip_end_frame']:
+                writers.pop(i).release()
+
+    for writer in writers.values():
+        writer.release()
+    cap.release()
+    return paths
+
+
+def analyze_session(video_path, output_dir, output_mode='sidecar'):
+    """여러 시행이 담긴 세션 영상 분석: 시행별 사이드카 (+ 잘라낸 영상)"""
+    meta = video_meta(video_path)
+    filename = os.path.basename(video_path)
+    print(f"\n{'='*60}")
+    print(f"세션: {filename} (총 프레임: {meta['total_frames']}, FPS: {meta['fps']:.3f})")
+    print(f"{'='*60}")
+
+    person_timeline = scan_timeline(video_path, total_frames=meta['total_frames'])
+    trials = trial_settings(person_timeline, meta)
+    print(f"\n  시행 {len(trials)}개 감지")
+    # 시행마다 START 직전의 오디오 신호 확인 (세션은 시행 전부를 찾아야 하므로 구간 제한은 안 함)
+    if DETECTOR_PARAMS.get('audio_cues'):
+        cues = audio_cues(video_path)
+        for settings in trials:
+            settings['audio_cue'] = cross_check(settings['start_time'], cues)
+            print(f"  시행 {settings['trial']}: {describe_check(settings['audio_cue'])}")
+
+    base = os.path.join(output_dir, os.path.splitext(filename)[0])
+    for settings in trials:
+        settings['outputs'] = []
+        if output_mode in ('sidecar', 'both'):
+            settings['outputs'] += list(write_sidecar(video_path, f"{base}_trial{settings['trial']}", settings))
+    if output_mode in ('burn', 'both'):
+        for settings, path in zip(trials, write_trial_clips(video_path, trials, output_dir)):
+            settings['outputs'].append(path)
+
+    return [{k: v for k, v in s.items() if k != 'timeline'} for s in trials]
+
+
+def main():
+    video_files = sorted(glob.glob("/Users/aisoft/Documents/TUG/sessions/*.mp4"))
+    if not video_files:
+        print("세션 동영상 파일을 찾을 수 없습니다.")
+        return
+
+    output_dir = "/Users/aisoft/Documents/TUG/final_output/sessions"
+    os.makedirs(output_dir, exist_ok=True)
+
+    for video_path in video_files:
+        for trial in analyze_session(video_path, output_dir, 'both'):
+            print(f"  시행 {trial['trial']}: {trial['start_time']:.2f}초 ~ {trial['finish_time']:.2f}초, "
+                  f"단계 {trial['phases']}")
+
+
+if __name__ == "__main__":
+    main()
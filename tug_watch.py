@@ -0,0 +1,220 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from batch_manifest import BatchManifest, content_hash
+from motion_detect_v3 import DETECTOR_PARAMS, analyze_and_output
+from results_store import ResultsStore
+from video_index import INDEX_SUFFIX
+
+try:
+    from inotify_simple import INotify, flags  # 선택 - 없으면 폴링
+except ImportError:
+    INotify = None
+
+# 감시 폴더 설정
+INBOX_DIR = "/Users/aisoft/Documents/TUG/inbox"
+OUTBOX_DIR = "/Users/aisoft/Documents/TUG/outbox"
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+# 복사 중인 임시 파일 (다운로드/동기화 도구)
+PARTIAL_SUFFIXES = ('.part', '.crdownload', '.tmp', '.download')
+
+# 크기/수정시각이 이 시간 동안 변하지 않으면 복사 완료로 판단
+STABLE_SECONDS = 3.0
+POLL_INTERVAL = 1.0
+IDLE_INTERVAL = 30.0  # inotify 사용 시 처리할 게 없을 때 대기 시간
+
+MAX_WORKERS = 2
+MAX_IN_FLIGHT = MAX_WORKERS * 2
+
+
+def warm_worker():
+    """워커 프로세스 시작 시 한 번만 cv2/numpy/검출 모듈 로드 (작업마다 import 비용 없음)"""
+    import cv2  # noqa: F401
+    import numpy  # noqa: F401
+    import motion_detect_v3  # noqa: F401
+
+
+class InboxWatcher:
+    """inotify가 있으면 이벤트 대기, 없으면 주기적 폴링"""
+
+    def __init__(self, inbox_dir):
+        self.inbox_dir = inbox_dir
+        self.inotify = None
+        if INotify is not None:
+            self.inotify = INotify()
+            self.inotify.add_watch(inbox_dir, flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+
+    def wait(self, busy):
+        """새 이벤트가 오거나 시간이 지나면 반환"""
+        if self.inotify is None:
+            time.sleep(POLL_INTERVAL)
+            return
+        # 안정화 대기/진행 중인 작업이 있으면 짧게, 없으면 이벤트가 올 때까지 길게 대기
+        timeout = POLL_INTERVAL if busy else IDLE_INTERVAL
+        self.inotify.read(timeout=int(timeout * 1000))
+
+    def candidates(self):
+        for name in sorted(os.listdir(self.inbox_dir)):
+            if name.startswith('.') or name.lower().endswith(PARTIAL_SUFFIXES):
+                continue
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                yield os.path.join(self.inbox_dir, name)
+
+
+class StabilityTracker:
+    """파일 크기/수정시각이 STABLE_SECONDS 동안 그대로인지 추적"""
+
+    def __init__(self, stable_seconds=STABLE_SECONDS):
+        self.stable_seconds = stable_seconds
+        self.seen = {}  # path -> (size, mtime, 처음 이 상태를 본 시각)
+
+    def is_stable(self, path, now):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.seen.pop(path, None)
+            return False
+
+        state = (stat.st_size, stat.st_mtime)
+        prev = self.seen.get(path)
+        if prev is None or prev[:2] != state:
+            self.seen[path] = (*state, now)
+            return False
+        return stat.st_size > 0 and now - prev[2] >= self.stable_seconds
+
+    def forget(self, path):
+        self.seen.pop(path, None)
+
+    def prune(self, paths):
+        """이번 목록에 없는 파일(삭제/이름 변경/이동됨) 기록 정리"""
+        for path in self.seen.keys() - set(paths):
+            del self.seen[path]
+
+    @property
+    def pending(self):
+        return bool(self.seen)
+
+
+def _move(path, target_dir):
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, os.path.basename(path))
+    if os.path.exists(target):
+        base, ext = os.path.splitext(target)
+        target = f"{base}_{int(time.time())}{ext}"
+    shutil.move(path, target)
+    # PTS 인덱스 캐시도 원본과 함께 이동
+    if os.path.exists(path + INDEX_SUFFIX):
+        shutil.move(path + INDEX_SUFFIX, target + INDEX_SUFFIX)
+    return target
+
+
+def _start_pool(max_workers):
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=warm_worker)
+
+
+def run_daemon(inbox_dir=INBOX_DIR, outbox_dir=OUTBOX_DIR, max_workers=MAX_WORKERS,
+               max_in_flight=MAX_IN_FLIGHT):
+    """감시 폴더 데몬: 안정화된 영상을 워커 풀에 넣고 결과/원본을 outbox로 이동"""
+    os.makedirs(inbox_dir, exist_ok=True)
+    os.makedirs(outbox_dir, exist_ok=True)
+
+    manifest = BatchManifest(os.path.join(outbox_dir, "manifest.jsonl"))
+    store = ResultsStore()  # 결과는 부모 프로세스에서만 기록 (SQLite 쓰기 한 곳)
+    watcher = InboxWatcher(inbox_dir)
+    tracker = StabilityTracker()
+    in_flight = {}  # future -> (path, hash, 제출한 워커 풀)
+
+    mode = 'inotify' if watcher.inotify is not None else '폴링'
+    print(f"감시 시작 ({mode}): {inbox_dir} -> {outbox_dir}, 워커 {max_workers}개")
+
+    executor = _start_pool(max_workers)
+    try:
+        while True:
+            watcher.wait(busy=bool(in_flight) or tracker.pending)
+            now = time.time()
+            queued = {path for path, _, _ in in_flight.values()}
+            queued_hashes = {video_hash for _, video_hash, _ in in_flight.values()}
+
+            candidates = list(watcher.candidates())
+            tracker.prune(candidates)
+            for path in candidates:
+                if len(in_flight) >= max_in_flight:
+                    break  # 나머지는 다음 턴에 (동시 처리 수 제한)
+                if path in queued or not tracker.is_stable(path, now):
+                    continue
+
+                filename = os.path.basename(path)
+                try:
+                    video_hash = content_hash(path)
+                except FileNotFoundError:
+                    tracker.forget(path)  # 안정화 판정 직후 삭제/이동됨
+                    continue
+                if video_hash in queued_hashes:
+                    continue  # 같은 영상이 처리 중 - 끝난 뒤 중복으로 정리
+                tracker.forget(path)
+
+                entry = manifest.get(video_hash)
+                if manifest.is_done(video_hash, DETECTOR_PARAMS):
+                    print(f"  중복/처리 완료 ({entry['file']}) - {filename} 건너뜀")
+                    _move(path, os.path.join(outbox_dir, "duplicates"))
+                    continue
+
+                manifest.record(video_hash, 'processing', file=filename, params=DETECTOR_PARAMS)
+                try:
+                    future = executor.submit(analyze_and_output, path, outbox_dir)
+                except BrokenProcessPool:
+                    # 아직 결과를 못 본 사이 워커가 죽어 풀이 깨짐 - 새 풀로 교체 후 다시 제출
+                    executor.shutdown(wait=False)
+                    executor = _start_pool(max_workers)
+                    future = executor.submit(analyze_and_output, path, outbox_dir)
+                in_flight[future] = (path, video_hash, executor)
+                queued_hashes.add(video_hash)
+                print(f"  대기열 추가: {filename} (진행 중 {len(in_flight)})")
+
+            for future in [f for f in in_flight if f.done()]:
+                path, video_hash, pool = in_flight.pop(future)
+                filename = os.path.basename(path)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool) and pool is executor:
+                        # 워커 프로세스가 비정상 종료(메모리 부족 등)하면 풀 전체가 깨지고
+                        # 이후 제출도 모두 실패 - 새 풀로 교체 (같은 풀의 나머지 작업은 실패로 정리)
+                        executor.shutdown(wait=False)
+                        executor = _start_pool(max_workers)
+                    manifest.record(video_hash, 'failed', error=str(e))
+                    store.record(video_hash, filename, status='failed', params=DETECTOR_PARAMS)
+                    store.flush()
+                    _move(path, os.path.join(outbox_dir, "failed"))
+                    print(f"  실패: {filename} ({e})")
+                    continue
+
+                if result is None:
+                    manifest.record(video_hash, 'no_person')
+                    store.record(video_hash, filename, status='no_person', params=DETECTOR_PARAMS)
+                    store.flush()
+                    _move(path, os.path.join(outbox_dir, "no_person"))
+                    print(f"  사람 미감지: {filename}")
+                    continue
+
+                store.record(video_hash, filename, result, params=DETECTOR_PARAMS)
+                store.flush()
+                outputs = result.pop('outputs')
+                manifest.record(video_hash, 'done', result=result, outputs=outputs)
+                _move(path, outbox_dir)
+                print(f"  완료: {filename} (START {result['start_time']:.2f}초, "
+                      f"FINISH {result['finish_time']:.2f}초)")
+    except KeyboardInterrupt:
+        print("\n종료 중... (진행 중인 작업 완료 대기)")
+    finally:
+        executor.shutdown(wait=True)
+        manifest.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    run_daemon()
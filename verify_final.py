@@ -1,41 +1,26 @@
-import cv2
 import os
 
+from contact_sheet import make_contact_sheets, verification_frames
+from results_store import ResultsStore
+from video_index import video_meta
+
 output_dir = "/Users/aisoft/Documents/TUG/final_verification"
 os.makedirs(output_dir, exist_ok=True)
 
-# 최종 결과 정보
-videos = [
-    {"file": "/Users/aisoft/Documents/TUG/final_output/marked_KakaoTalk_Video_2026-01-20-15-58-45.mp4",
-     "start": 50, "finish": 326},
-]
-
-for v in videos:
-    cap = cv2.VideoCapture(v['file'])
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    base = os.path.basename(v['file']).replace('.mp4', '')
+final_dir = "/Users/aisoft/Documents/TUG/final_output"
 
-    # START 전, START, START 후, 중간, FINISH 전, FINISH, FINISH 후
-    frames = [
-        v['start'] - 10,
-        v['start'],
-        v['start'] + 30,
-        (v['start'] + v['finish']) // 2,
-        v['finish'] - 10,
-        v['finish'],
-        min(v['finish'] + 30, total - 1)
+# 최종 결과 정보: 결과 저장소의 파일별 최근 기록 중 번인 영상이 있는 것
+with ResultsStore() as store:
+    videos = [
+        {"file": os.path.join(final_dir, f"marked_{run['file']}"),
+         "start": run['start_frame'], "finish": run['finish_frame']}
+        for run in store.latest_runs()
+        if os.path.exists(os.path.join(final_dir, f"marked_{run['file']}"))
     ]
 
-    for f in frames:
-        if f < 0:
-            f = 0
-        cap.set(cv2.CAP_PROP_POS_FRAMES, f)
-        ret, frame = cap.read()
-        if ret:
-            path = os.path.join(output_dir, f"{base}_f{f:04d}.jpg")
-            cv2.imwrite(path, frame)
-            print(f"저장: {path}")
-
-    cap.release()
+# 영상당 컨택트 시트 한 장 (START 전후, 중간, FINISH 전후)
+jobs = [{'video': v['file'], 'frames': verification_frames(v['start'], v['finish'], video_meta(v['file'])['total_frames'])}
+        for v in videos]
+make_contact_sheets(jobs, output_dir)
 
 print("\n완료!")
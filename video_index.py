@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import struct
+import subprocess
+
+import cv2
+import numpy as np
+
+from pipeline_metrics import registry as metrics
+
+try:
+    import av  # PyAV (선택) - 있으면 ffprobe 없이 패킷 스캔
+except ImportError:
+    av = None
+
+# 바이너리 인덱스 파일 형식
+# 헤더: magic(8) + 원본 크기(Q) + 원본 mtime(d) + 프레임 수(I) + 키프레임 수(I)
+# 본문: float64 PTS(초) x 프레임 수 + uint32 키프레임 프레임 번호 x 키프레임 수
+INDEX_MAGIC = b'TUGIDX01'
+INDEX_HEADER = struct.Struct('<8sQdII')
+INDEX_SUFFIX = '.tugidx'
+
+
+def _scan_pyav(video_path):
+    """PyAV로 패킷 PTS/키프레임 스캔 (디코딩 없음)"""
+    pts = []
+    key_pts = []
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        time_base = float(stream.time_base)
+        for packet in container.demux(stream):
+            if packet.pts is None:
+                continue
+            t = packet.pts * time_base
+            pts.append(t)
+            if packet.is_keyframe:
+                key_pts.append(t)
+    return pts, key_pts
+
+
+def _scan_ffprobe(video_path):
+    """ffprobe로 패킷 PTS/키프레임 스캔 (디코딩 없음)"""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'json', video_path,
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    pts = []
+    key_pts = []
+    for packet in json.loads(out).get('packets', []):
+        t = packet.get('pts_time')
+        if t in (None, 'N/A'):
+            continue
+        t = float(t)
+        pts.append(t)
+        if 'K' in packet.get('flags', ''):
+            key_pts.append(t)
+    return pts, key_pts
+
+
+def _scan_cv2(video_path):
+    """ffprobe/PyAV가 없을 때: grab()으로 프레임별 타임스탬프만 수집 (키프레임 정보 없음)"""
+    cap = cv2.VideoCapture(video_path)
+    pts = []
+    while cap.grab():
+        pts.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+    cap.release()
+    return pts, []
+
+
+def build_index(video_path):
+    """영상의 모든 프레임 PTS와 키프레임 위치 인덱스 생성"""
+    if av is not None:
+        pts, key_pts = _scan_pyav(video_path)
+    elif shutil.which('ffprobe'):
+        pts, key_pts = _scan_ffprobe(video_path)
+    else:
+        pts, key_pts = _scan_cv2(video_path)
+
+    # 패킷은 디코딩 순서(B-프레임)이므로 표시 순서로 정렬
+    pts = np.sort(np.asarray(pts, dtype=np.float64))
+    keyframes = np.searchsorted(pts, np.asarray(key_pts, dtype=np.float64)).astype(np.uint32)
+    keyframes = np.unique(keyframes)
+
+    return {'pts': pts, 'keyframes': keyframes}
+
+
+def save_index(index_path, video_path, index):
+    """인덱스를 바이너리 사이드카로 저장"""
+    stat = os.stat(video_path)
+    pts = index['pts'].astype('<f8')
+    keyframes = index['keyframes'].astype('<u4')
+    with open(index_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime, len(pts), len(keyframes)))
+        f.write(pts.tobytes())
+        f.write(keyframes.tobytes())
+
+
+def load_index(index_path, video_path=None):
+    """바이너리 사이드카 로드 (원본이 바뀌었으면 None)"""
+    with open(index_path, 'rb') as f:
+        header = f.read(INDEX_HEADER.size)
+        if len(header) != INDEX_HEADER.size:
+            return None
+        magic, size, mtime, n_frames, n_keys = INDEX_HEADER.unpack(header)
+        if magic != INDEX_MAGIC:
+            return None
+        if video_path is not None:
+            stat = os.stat(video_path)
+            if stat.st_size != size or stat.st_mtime != mtime:
+                return None
+        pts = np.frombuffer(f.read(n_frames * 8), dtype='<f8')
+        keyframes = np.frombuffer(f.read(n_keys * 4), dtype='<u4')
+    return {'pts': pts, 'keyframes': keyframes}
+
+
+def get_index(video_path, index_dir=None):
+    """캐시된 인덱스가 있으면 로드, 없으면 한 번 스캔해서 저장"""
+    if index_dir:
+        index_path = os.path.join(index_dir, os.path.basename(video_path) + INDEX_SUFFIX)
+    else:
+        index_path = video_path + INDEX_SUFFIX
+
+    if os.path.exists(index_path):
+        index = load_index(index_path, video_path)
+        if index is not None:
+            metrics.inc('tug_cache_requests_total', cache='video_index', result='hit')
+            return index
+
+    metrics.inc('tug_cache_requests_total', cache='video_index', result='miss')
+    index = build_index(video_path)
+    try:
+        save_index(index_path, video_path, index)
+    except OSError:
+        pass  # 읽기 전용 폴더면 캐시 없이 사용
+    return index
+
+
+def true_fps(index):
+    """실제 PTS로 계산한 평균 FPS (29.97 등 소수 FPS 유지)"""
+    pts = index['pts']
+    if len(pts) < 2 or pts[-1] <= pts[0]:
+        return 0.0
+    return float((len(pts) - 1) / (pts[-1] - pts[0]))
+
+
+def video_meta(video_path):
+    """프레임 수/FPS/해상도 (가변 프레임레이트 영상 대응: 실제 PTS 인덱스 사용)"""
+    cap = cv2.VideoCapture(video_path)
+    index = get_index(video_path)
+    meta = {
+        'index': index,
+        'total_frames': len(index['pts']) or int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'fps': true_fps(index) or cap.get(cv2.CAP_PROP_FPS),
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return meta
+
+
+def frame_time(index, frame, fps=None):
+    """프레임 번호 -> 영상 시작 기준 실제 시간(초). PTS가 없는 인덱스(빈 스캔)면 frame / fps"""
+    pts = index['pts']
+    if len(pts) == 0:
+        return max(int(frame), 0) / fps if fps else 0.0
+    frame = min(max(int(frame), 0), len(pts) - 1)
+    return float(pts[frame] - pts[0])
+
+
+def frame_times(index, frames, fps=None):
+    """프레임 번호 배열 -> 실제 시간(초) 배열 (벡터화). PTS가 없는 인덱스면 frame / fps"""
+    pts = index['pts']
+    frames = np.asarray(frames, dtype=np.int64)
+    if len(pts) == 0:
+        return np.maximum(frames, 0) / fps if fps else np.zeros(frames.shape)
+    frames = np.clip(frames, 0, len(pts) - 1)
+    return pts[frames] - pts[0]
+
+
+def time_to_frame(index, seconds, fps=None):
+    """시간(초) -> 해당 시각에 표시되는 프레임 번호. PTS가 없는 인덱스면 seconds * fps"""
+    pts = index['pts']
+    if len(pts) == 0:
+        return max(int(seconds * fps), 0) if fps else 0
+    frame = int(np.searchsorted(pts, pts[0] + seconds, side='right')) - 1
+    return min(max(frame, 0), len(pts) - 1)
+
+
+def nearest_keyframe(index, frame):
+    """frame 이전(포함) 가장 가까운 키프레임 번호"""
+    keyframes = index['keyframes']
+    if len(keyframes) == 0:
+        return None
+    i = int(np.searchsorted(keyframes, frame, side='right')) - 1
+    return int(keyframes[max(i, 0)])
+
+
+class FrameSeeker:
+    """인덱스 기반 프레임 탐색 - 같은 GOP 안에서는 다시 seek하지 않고 앞으로 grab"""
+
+    def __init__(self, cap, index):
+        self.cap = cap
+        self.index = index
+        self.position = 0  # 다음 read()가 돌려줄 프레임 번호
+        self.last_frame = None
+        self.last_image = None
+
+    def read(self, frame):
+        """frame 번호의 이미지 반환 (ret, image)"""
+        if frame == self.last_frame and self.last_image is not None:
+            return True, self.last_image
+
+        keyframe = nearest_keyframe(self.index, frame)
+
+        # 현재 위치에서 앞으로 가는 게 키프레임부터 디코딩하는 것보다 싸면 그대로 진행
+        forward_ok = self.position <= frame and (keyframe is None or self.position >= keyframe)
+        if not forward_ok:
+            target = keyframe if keyframe is not None else frame
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self.position = target
+
+        # 필요한 프레임까지 디코딩만 하고 색 변환(retrieve)은 생략
+        while self.position < frame:
+            if not self.cap.grab():
+                return False, None
+            self.position += 1
+
+        ret, image = self.cap.read()
+        if ret:
+            self.position += 1
+            self.last_frame = frame
+            self.last_image = image
+        return ret, image
+
+
+if __name__ == "__main__":
+    import glob
+
+    for video_path in sorted(glob.glob("/Users/aisoft/Documents/TUG/KakaoTalk_Video_*.mp4")):
+        index = get_index(video_path)
+        print(f"{os.path.basename(video_path)}: {len(index['pts'])} 프레임, "
+              f"키프레임 {len(index['keyframes'])}개, FPS {true_fps(index):.3f}")
@@ -0,0 +1,307 @@
+import glob
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from floor_calibration import timeline_arrays, moving_average
+from motion_detect_v3 import video_meta, scan_timeline, build_settings
+from sidecar import write_sidecar
+from tug_watch import warm_worker
+from video_index import frame_times
+
+# 측면/정면 영상 싱크 (src/utils/videoSync.js 백엔드) - 결과 형식은 BBSTestPage와 같음
+# offset_sec = 정면 시각 - 측면 시각 (양수: 정면이 늦게 시작 -> 정면 앞부분 front_trim초 건너뜀)
+PAIR_DIR = "/Users/aisoft/Documents/TUG/dual"
+
+SIGNAL_RATE = 100          # 동작 에너지 리샘플 주기 (Hz) - 두 영상 FPS가 달라도 같은 격자에서 비교
+ENVELOPE_RATE = 1000       # 오디오 포락선 주기 (Hz) - 밀리초 단위 오프셋
+AUDIO_SAMPLE_RATE = 16000
+MAX_OFFSET_SEC = 10.0
+DIFF_SIZE = (160, 90)      # 프레임 차이 계산 해상도 (detectMotionStartClient와 같음)
+SMOOTH_SEC = 0.1
+# 정규화 상관 최대값이 이보다 낮으면 오디오 결과를 버리고 동작으로 재시도
+MIN_AUDIO_CONFIDENCE = 0.2
+MAX_WORKERS = 4
+
+
+# ============================================================
+# 신호 추출
+# ============================================================
+
+def frame_diff_energy(video_path):
+    """축소 흑백 프레임 간 평균 절대 차이 -> (프레임 시각, 에너지) (배경 모델 없이 가장 빠름)"""
+    meta = video_meta(video_path)
+    cap = cv2.VideoCapture(video_path)
+    energy = []
+    prev = None
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        gray = cv2.cvtColor(cv2.resize(frame, DIFF_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        energy.append(0.0 if prev is None else float(cv2.absdiff(gray, prev).mean()))
+        prev = gray
+    cap.release()
+    times = frame_times(meta['index'], np.arange(len(energy)), meta['fps'])
+    return times, np.asarray(energy)
+
+
+def timeline_energy(person_timeline, index, fps=None):
+    """이미 돌린 MOG2 패스 타임라인 -> (프레임 시각, 전경 면적) (분석 패스 재사용)"""
+    arrays = timeline_arrays(person_timeline)
+    area = np.where(arrays['detected'], arrays['area'], 0.0)
+    return frame_times(index, arrays['frame'], fps), area
+
+
+def audio_envelope(video_path, sample_rate=AUDIO_SAMPLE_RATE):
+    """ffmpeg로 모노 PCM 추출 -> ENVELOPE_RATE Hz RMS 포락선 (ffmpeg/오디오 없으면 None)"""
+    if shutil.which('ffmpeg') is None:
+        return None
+    cmd = ['ffmpeg', '-v', 'error', '-i', video_path, '-vn', '-ac', '1', '-ar', str(sample_rate),
+           '-f', 's16le', '-']
+    try:
+        pcm = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError:
+        return None
+    samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+    hop = sample_rate // ENVELOPE_RATE
+    n = len(samples) // hop
+    if n < ENVELOPE_RATE:  # 1초 미만 (오디오 트랙 없음 등)
+        return None
+    frames = samples[:n * hop].reshape(n, hop)
+    return np.sqrt((frames * frames).mean(axis=1))
+
+
+def resample(times, values, rate=SIGNAL_RATE):
+    """가변 간격 (PTS) 신호 -> 일정 간격 신호"""
+    grid = np.arange(0.0, times[-1] + 0.5 / rate, 1.0 / rate)
+    return np.interp(grid, times, values)
+
+
+def onset_signal(values, rate):
+    """시작/변화 시점이 뾰족해지도록: 로그 압축 -> 평활 -> 증가분만 -> 정규화
+    (카메라 위치마다 에너지 크기가 달라도 '언제 변했는지'만 비교)"""
+    values = moving_average(np.log1p(np.asarray(values, dtype=np.float64)), int(round(SMOOTH_SEC * rate)))
+    rise = np.maximum(np.diff(values, prepend=values[:1]), 0.0)
+    rise -= rise.mean()
+    norm = np.linalg.norm(rise)
+    return rise / norm if norm > 0 else rise
+
+
+# ============================================================
+# FFT 상호상관
+# ============================================================
+
+def xcorr_offset(side, front, rate, max_offset=MAX_OFFSET_SEC):
+    """FFT 상호상관 O(n log n) -> (오프셋 초, 신뢰도)
+    front(t) ~= side(t - offset) 이 되는 offset (양수: 정면에서 같은 사건이 늦게 나타남)"""
+    n = len(side) + len(front) - 1
+    size = 1 << (n - 1).bit_length()
+    spectrum = np.fft.rfft(front, size) * np.conj(np.fft.rfft(side, size))
+    corr = np.fft.irfft(spectrum, size)
+    # 음수 지연은 배열 뒤쪽에 있음 -> [-max_lag, max_lag]만 남김
+    max_lag = min(int(max_offset * rate), len(front) - 1, len(side) - 1)
+    lags = np.arange(-max_lag, max_lag + 1)
+    window = corr[lags % size]
+    peak = int(np.argmax(window))
+
+    # 포물선 보간으로 샘플 이하 정밀도
+    shift = 0.0
+    if 0 < peak < len(window) - 1:
+        y0, y1, y2 = window[peak - 1], window[peak], window[peak + 1]
+        denom = y0 - 2 * y1 + y2
+        if denom != 0:
+            shift = 0.5 * (y0 - y2) / denom
+    norm = np.linalg.norm(side) * np.linalg.norm(front)
+    confidence = float(np.clip(window[peak] / norm, 0.0, 1.0)) if norm > 0 else 0.0
+    return (lags[peak] + shift) / rate, confidence
+
+
+def sync_result(offset_sec, confidence, method):
+    """videoSync.js detectOffset* 응답 형식"""
+    offset_sec = float(offset_sec)
+    return {
+        'offset_sec': round(offset_sec, 4),
+        'offset_ms': round(offset_sec * 1000, 1),
+        'side_trim': round(max(0.0, -offset_sec), 4),
+        'front_trim': round(max(0.0, offset_sec), 4),
+        'confidence': round(confidence, 3),
+        'method': method,
+    }
+
+
+def detect_offset_audio(side_path, front_path, max_offset=MAX_OFFSET_SEC):
+    """오디오 포락선 상호상관 (오디오를 못 읽으면 None)"""
+    side = audio_envelope(side_path)
+    front = audio_envelope(front_path)
+    if side is None or front is None:
+        return None
+    offset, confidence = xcorr_offset(onset_signal(side, ENVELOPE_RATE), onset_signal(front, ENVELOPE_RATE),
+                                      ENVELOPE_RATE, max_offset)
+    return sync_result(offset, confidence, 'audio')
+
+
+def detect_offset_motion(side_signal, front_signal, max_offset=MAX_OFFSET_SEC):
+    """동작 에너지 상호상관 - 신호는 (프레임 시각, 에너지)"""
+    side = onset_signal(resample(*side_signal), SIGNAL_RATE)
+    front = onset_signal(resample(*front_signal), SIGNAL_RATE)
+    offset, confidence = xcorr_offset(side, front, SIGNAL_RATE, max_offset)
+    return sync_result(offset, confidence, 'motion')
+
+
+def detect_offset(side_path, front_path, prefer_audio=True, max_offset=MAX_OFFSET_SEC):
+    """detectOffsetAuto와 같은 순서: 오디오 우선, 실패/저신뢰면 프레임 차이 동작 에너지"""
+    if prefer_audio:
+        result = detect_offset_audio(side_path, front_path, max_offset)
+        if result is not None and result['confidence'] >= MIN_AUDIO_CONFIDENCE:
+            return result
+    return detect_offset_motion(frame_diff_energy(side_path), frame_diff_energy(front_path), max_offset)
+
+
+def sync_pairs(pairs, n_workers=MAX_WORKERS, prefer_audio=True):
+    """여러 (측면, 정면) 쌍을 워커 프로세스에서 병렬로 싱크 -> 입력 순서대로 결과 목록"""
+    results = [None] * len(pairs)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=warm_worker) as executor:
+        futures = {executor.submit(detect_offset, side, front, prefer_audio): i
+                   for i, (side, front) in enumerate(pairs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = {'error': str(e)}
+    return results
+
+
+# ============================================================
+# 두 시점 분석을 한 시간축으로
+# ============================================================
+
+def common_timeline(side_timeline, side_times, front_timeline, front_times, offset_sec):
+    """측면 프레임 시각 기준 공통 타임라인: 각 측면 프레임에 같은 순간의 정면 기록을 붙임"""
+    front_times = np.asarray(front_times)
+    # 측면 t초 = 정면 t + offset초, 그 시각에 표시 중인 정면 프레임 (한 번의 이진 탐색)
+    idx = np.searchsorted(front_times, np.asarray(side_times) + offset_sec, side='right') - 1
+    inside = (idx >= 0) & (np.asarray(side_times) + offset_sec <= front_times[-1])
+    merged = []
+    for side, t, i, ok in zip(side_timeline, side_times, idx.tolist(), inside.tolist()):
+        merged.append({
+            'time': round(float(t), 4),
+            'side': side,
+            'front': front_timeline[i] if ok else None,
+        })
+    return merged
+
+
+def analyze_dual(side_path, front_path, output_dir, output_mode='sidecar', prefer_audio=True):
+    """측면/정면 영상을 한 번씩만 스캔 -> 싱크 (오디오 또는 같은 MOG2 패스) -> 공통 시간축 START/FINISH"""
+    side_meta = video_meta(side_path)
+    front_meta = video_meta(front_path)
+    print(f"\n{'='*60}")
+    print(f"측면: {os.path.basename(side_path)} / 정면: {os.path.basename(front_path)}")
+    print(f"{'='*60}")
+
+    # 두 영상 감지 패스를 동시에
+    with ProcessPoolExecutor(max_workers=2, initializer=warm_worker) as executor:
+        side_future = executor.submit(scan_timeline, side_path, total_frames=side_meta['total_frames'])
+        front_future = executor.submit(scan_timeline, front_path, total_frames=front_meta['total_frames'])
+        side_timeline, front_timeline = side_future.result(), front_future.result()
+
+    sync = detect_offset_audio(side_path, front_path) if prefer_audio else None
+    if sync is None or sync['confidence'] < MIN_AUDIO_CONFIDENCE:
+        sync = detect_offset_motion(timeline_energy(side_timeline, side_meta['index'], side_meta['fps']),
+                                    timeline_energy(front_timeline, front_meta['index'], front_meta['fps']))
+    offset = sync['offset_sec']
+    print(f"  오프셋: {sync['offset_ms']:.1f}ms ({sync['method']}, 신뢰도 {sync['confidence']})")
+
+    side = build_settings(side_timeline, side_meta)
+    front = build_settings(front_timeline, front_meta)
+    views = {}
+    for name, settings in (('side', side), ('front', front)):
+        if settings is None:
+            views[name] = None
+            continue
+        # 정면 시각은 offset만큼 빼서 측면(공통) 시각으로
+        shift = offset if name == 'front' else 0.0
+        views[name] = {
+            'start_frame': settings['start_frame'],
+            'finish_frame': settings['finish_frame'],
+            'start_time': round(settings['start_time'] - shift, 3),
+            'finish_time': round(settings['finish_time'] - shift, 3),
+        }
+
+    result = {
+        'side': os.path.basename(side_path),
+        'front': os.path.basename(front_path),
+        'sync': sync,
+        'views': views,
+        'outputs': [],
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    if output_mode in ('sidecar', 'both'):
+        for path, settings in ((side_path, side), (front_path, front)):
+            if settings is not None:
+                base = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0])
+                result['outputs'] += list(write_sidecar(path, base, settings))
+        sync_path = os.path.join(output_dir, os.path.splitext(os.path.basename(side_path))[0] + '.sync.json')
+        with open(sync_path, 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in result.items() if k != 'outputs'}, f, ensure_ascii=False, indent=2)
+        result['outputs'].append(sync_path)
+
+    side_times = frame_times(side_meta['index'], [d['frame'] for d in side_timeline], side_meta['fps'])
+    front_times = frame_times(front_meta['index'], [d['frame'] for d in front_timeline], front_meta['fps'])
+    result['timeline'] = common_timeline(side_timeline, side_times, front_timeline, front_times, offset)
+    return result
+
+
+def benchmark(minutes=(1, 4, 16), rate=ENVELOPE_RATE):
+    """FFT 상호상관 vs 직접 상관 (np.correlate) 시간 - 합성 포락선"""
+    rng = np.random.default_rng(0)
+    print(f"\n{'='*60}")
+    print("상호상관 벤치마크 (합성 포락선, 실제 오프셋 1.234초)")
+    print(f"{'='*60}")
+    for m in minutes:
+        n = int(m * 60 * rate)
+        shift = int(1.234 * rate)
+        # 드문 충격음 + 정면 쪽은 1.234초 늦게 같은 소리, 잡음 추가
+        events = np.abs(rng.normal(0, 1, n)) * (rng.random(n) < 0.01)
+        side = onset_signal(events, rate)
+        front = onset_signal(np.concatenate([np.zeros(shift), events[:n - shift]]) + rng.normal(0, 0.05, n) ** 2, rate)
+
+        started = time.perf_counter()
+        offset, confidence = xcorr_offset(side, front, rate)
+        fft_elapsed = time.perf_counter() - started
+        line = f"  {m:>3}분 ({n} 샘플): FFT {fft_elapsed * 1000:7.1f}ms -> {offset:+.4f}초 (신뢰도 {confidence:.2f})"
+        if m == minutes[0]:
+            # 직접 상관은 O(n * 지연 수) - 짧은 신호만
+            started = time.perf_counter()
+            max_lag = int(MAX_OFFSET_SEC * rate)
+            padded = np.concatenate([np.zeros(max_lag), front, np.zeros(max_lag)])
+            direct = np.correlate(padded, side, mode='valid')
+            line += f", 직접 {(time.perf_counter() - started) * 1000:7.1f}ms -> {(np.argmax(direct) - max_lag) / rate:+.4f}초"
+        print(line)
+
+
+def main():
+    benchmark()
+
+    side_files = sorted(glob.glob(os.path.join(PAIR_DIR, "*_side.mp4")))
+    pairs = [(p, p.replace('_side.mp4', '_front.mp4')) for p in side_files
+             if os.path.exists(p.replace('_side.mp4', '_front.mp4'))]
+    if not pairs:
+        print("측면/정면 영상 쌍 (*_side.mp4, *_front.mp4)을 찾을 수 없습니다.")
+        return
+
+    print(f"\n영상 쌍 {len(pairs)}개 싱크 (워커 {MAX_WORKERS}개)")
+    for (side, _), result in zip(pairs, sync_pairs(pairs)):
+        print(f"  {os.path.basename(side)}: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import shutil
+import subprocess
+
+import cv2
+
+# H.264 인코딩 설정 (ffmpeg libx264)
+DEFAULT_PRESET = 'veryfast'
+DEFAULT_CRF = 23
+
+# frag_keyframe+empty_moov: 키프레임마다 조각(fragment)을 써서 쓰는 도중에도 재생 가능
+# faststart: 완료 후 moov를 앞으로 옮김 (조각화 안 할 때만 의미 있음)
+FRAGMENTED_MOVFLAGS = '+frag_keyframe+empty_moov+default_base_moof'
+FASTSTART_MOVFLAGS = '+faststart'
+
+
+class FFmpegWriter:
+    """ffmpeg 파이프로 H.264 MP4 쓰기 (cv2.VideoWriter와 같은 write/release 인터페이스)"""
+
+    def __init__(self, output_path, fps, frame_size, preset=DEFAULT_PRESET,
+                 crf=DEFAULT_CRF, fragmented=True, keyframe_sec=1.0,
+                 ffmpeg_bin='ffmpeg'):
+        width, height = frame_size
+        self.output_path = output_path
+        self.frame_size = (width, height)
+
+        # 조각 길이 = 키프레임 간격 (짧을수록 일찍 재생 가능, 파일은 약간 커짐)
+        gop = max(1, int(round(fps * keyframe_sec)))
+        movflags = FRAGMENTED_MOVFLAGS if fragmented else FASTSTART_MOVFLAGS
+
+        cmd = [
+            ffmpeg_bin, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f"{width}x{height}", '-r', str(fps),
+            '-i', '-',
+            '-an',
+            '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+            '-pix_fmt', 'yuv420p',
+            '-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+            '-movflags', movflags,
+            output_path,
+        ]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def isOpened(self):
+        return self.proc.poll() is None
+
+    def write(self, frame):
+        self.proc.stdin.write(frame.tobytes())
+
+    def release(self):
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+        if self.proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg 인코딩 실패 (code {self.proc.returncode}): {self.output_path}")
+
+
+def ffmpeg_available(ffmpeg_bin='ffmpeg'):
+    """로컬 ffmpeg 실행 파일이 있는지 확인"""
+    return shutil.which(ffmpeg_bin) is not None
+
+
+def open_video_writer(output_path, fps, frame_size, backend='auto', **kwargs):
+    """출력 백엔드 선택: 'ffmpeg' (조각화 H.264), 'cv2' (mp4v, 인코딩 옵션 무시), 'auto'"""
+    if backend == 'auto':
+        backend = 'ffmpeg' if ffmpeg_available(kwargs.get('ffmpeg_bin', 'ffmpeg')) else 'cv2'
+
+    if backend == 'ffmpeg':
+        return FFmpegWriter(output_path, fps, frame_size, **kwargs)
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(output_path, fourcc, fps, frame_size)